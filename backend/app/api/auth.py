@@ -1,28 +1,41 @@
 from fastapi import APIRouter, Depends, HTTPException, status
-from sqlalchemy.orm import Session
-from app.core.database import get_db
-from app.core.security import get_password_hash, verify_password, create_access_token
+from sqlalchemy import select
+from sqlalchemy.ext.asyncio import AsyncSession
+from app.core.database import get_async_db
+from app.core.security import create_access_token
 from app.models.models import User
 from app.schemas.schemas import UserCreate, UserLogin, Token, UserResponse
+from app.services.password_hasher import HasherBusy, get_password_hasher
 from datetime import timedelta
 from app.core.config import settings
 
 router = APIRouter(prefix="/auth", tags=["auth"])
 
 
+def hasher_busy():
+    return HTTPException(
+        status_code=status.HTTP_503_SERVICE_UNAVAILABLE,
+        detail="Too many authentication requests, please retry",
+        headers={"Retry-After": "1"}
+    )
+
+
 @router.post("/register", response_model=UserResponse)
-def register(user_data: UserCreate, db: Session = Depends(get_db)):
+async def register(user_data: UserCreate, db: AsyncSession = Depends(get_async_db)):
     """Register a new user"""
     # Check if user exists
-    existing_user = db.query(User).filter(User.email == user_data.email).first()
+    existing_user = (await db.execute(select(User).where(User.email == user_data.email))).scalar_one_or_none()
     if existing_user:
         raise HTTPException(
             status_code=status.HTTP_400_BAD_REQUEST,
             detail="Email already registered"
         )
     
-    # Create new user
-    hashed_password = get_password_hash(user_data.password)
+    # Create new user; bcrypt runs on the hasher's process pool
+    try:
+        hashed_password = await get_password_hasher().hash(user_data.password)
+    except HasherBusy:
+        raise hasher_busy()
     new_user = User(
         email=user_data.email,
         hashed_password=hashed_password,
@@ -30,17 +43,17 @@ def register(user_data: UserCreate, db: Session = Depends(get_db)):
     )
     
     db.add(new_user)
-    db.commit()
-    db.refresh(new_user)
+    await db.commit()
+    await db.refresh(new_user)
     
     return new_user
 
 
 @router.post("/login", response_model=Token)
-def login(user_data: UserLogin, db: Session = Depends(get_db)):
+async def login(user_data: UserLogin, db: AsyncSession = Depends(get_async_db)):
     """Login user and return access token"""
     # Find user
-    user = db.query(User).filter(User.email == user_data.email).first()
+    user = (await db.execute(select(User).where(User.email == user_data.email))).scalar_one_or_none()
     if not user:
         raise HTTPException(
             status_code=status.HTTP_401_UNAUTHORIZED,
@@ -48,7 +61,11 @@ def login(user_data: UserLogin, db: Session = Depends(get_db)):
         )
     
     # Verify password
-    if not verify_password(user_data.password, user.hashed_password):
+    try:
+        valid, new_hash = await get_password_hasher().verify_and_update(user_data.password, user.hashed_password)
+    except HasherBusy:
+        raise hasher_busy()
+    if not valid:
         raise HTTPException(
             status_code=status.HTTP_401_UNAUTHORIZED,
             detail="Invalid credentials"
@@ -60,6 +77,11 @@ def login(user_data: UserLogin, db: Session = Depends(get_db)):
             detail="User account is inactive"
         )
     
+    # Upgrade hashes created with outdated cost parameters
+    if new_hash:
+        user.hashed_password = new_hash
+        await db.commit()
+    
     # Create access token
     access_token_expires = timedelta(minutes=settings.ACCESS_TOKEN_EXPIRE_MINUTES)
     access_token = create_access_token(
@@ -1,16 +1,104 @@
-from fastapi import APIRouter, Depends, HTTPException, status
+from fastapi import APIRouter, Depends, HTTPException, Query, Request, status
+from fastapi.concurrency import run_in_threadpool
+from sqlalchemy import bindparam, insert, update
+from sqlalchemy.ext.asyncio import AsyncSession
 from sqlalchemy.orm import Session
-from typing import List
-from app.core.database import get_db
-from app.models.models import Chain, ExecutionLog, ExecutionStatus, User
-from app.schemas.schemas import ChainCreate, ChainUpdate, ChainResponse, ExecutionTrigger, ExecutionLogResponse
-from app.api.dependencies import get_current_user
-from app.workers.tasks import execute_chain
-from datetime import datetime
+from typing import List, Optional
+from app.core.config import settings
+from app.core.database import get_async_db, get_db
+from app.models.models import Chain, ExecutionBatch, ExecutionDailyRollup, ExecutionLog, ExecutionStatus, TriggerType, User
+from app.schemas.schemas import (
+    ArchiveDayResponse, BulkItemResult, BulkResponse, ChainBulkCreate, ChainBulkUpdate, ChainCreate, ChainIdList,
+    ChainUpdate, ChainResponse, ChainStatsResponse, ExecutionBatchResponse, ExecutionTrigger, ExecutionLogResponse, Page
+)
+from app.api.dependencies import get_current_user, get_page_params
+from app.services.action_graph import ActionGraphError, validate_action_graph
+from app.services.admission import admit
+from app.services.chain_cache import get_cached_chain_async, invalidate_chain, invalidate_chains
+from app.services.execution_batches import batch_progress, insert_chunk, read_trigger_data
+from app.services.execution_stats import chain_stats
+from app.services.pagination import PageParams, paginate
+from app.services.payload_store import load_payload, set_trigger_data
+from app.services.principal_cache import invalidate_principal
+from app.services.retention import read_archive, rollup_summary
+from app.services.schedule import first_run_at, next_run_at
+from app.workers.tasks import execute_chain, publish_executions
+from datetime import date, datetime
 
 router = APIRouter(prefix="/chains", tags=["chains"])
 
 
+def validate_actions(actions: list):
+    """Reject action lists whose dependencies are unknown or cyclic"""
+    try:
+        validate_action_graph(actions)
+    except ActionGraphError as e:
+        raise HTTPException(
+            status_code=status.HTTP_400_BAD_REQUEST,
+            detail=str(e)
+        )
+
+
+def schedule_run_at(trigger_config: dict, first: bool = False) -> datetime:
+    """Compute next_run_at for a schedule chain, rejecting invalid schedules"""
+    now = datetime.utcnow()
+    try:
+        return first_run_at(trigger_config, now) if first else next_run_at(trigger_config, now)
+    except ValueError as e:
+        raise HTTPException(
+            status_code=status.HTTP_400_BAD_REQUEST,
+            detail=f"Invalid schedule: {e}"
+        )
+
+
+def apply_chain_update(chain: Chain, chain_data: ChainUpdate, now: datetime):
+    """Apply a ChainUpdate to a loaded chain; invalid updates raise before anything changes"""
+    if chain_data.actions is not None:
+        validate_actions(chain_data.actions)
+    
+    reschedule = chain.trigger_type == TriggerType.SCHEDULE and (
+        chain_data.trigger_config is not None or chain_data.is_active
+    )
+    if reschedule:
+        next_run = schedule_run_at(
+            chain_data.trigger_config if chain_data.trigger_config is not None else chain.trigger_config
+        )
+    
+    # Update fields
+    if chain_data.name is not None:
+        chain.name = chain_data.name
+    if chain_data.description is not None:
+        chain.description = chain_data.description
+    if chain_data.trigger_config is not None:
+        chain.trigger_config = chain_data.trigger_config
+    if chain_data.actions is not None:
+        chain.actions = chain_data.actions
+    if chain_data.max_parallel_actions is not None:
+        chain.max_parallel_actions = chain_data.max_parallel_actions
+    if chain_data.is_active is not None:
+        chain.is_active = chain_data.is_active
+    if chain_data.execution_cost is not None:
+        chain.execution_cost = chain_data.execution_cost
+    if reschedule:
+        chain.next_run_at = next_run
+    
+    chain.updated_at = now
+
+
+def check_bulk_size(items: list):
+    if len(items) > settings.CHAIN_BULK_MAX_ITEMS:
+        raise HTTPException(
+            status_code=status.HTTP_413_REQUEST_ENTITY_TOO_LARGE,
+            detail=f"At most {settings.CHAIN_BULK_MAX_ITEMS} chains per request"
+        )
+
+
+def bulk_response(results: list) -> BulkResponse:
+    results.sort(key=lambda result: result.index)
+    succeeded = sum(1 for result in results if result.ok)
+    return BulkResponse(succeeded=succeeded, failed=len(results) - succeeded, results=results)
+
+
 @router.post("/", response_model=ChainResponse)
 def create_chain(
     chain_data: ChainCreate,
@@ -18,6 +106,8 @@ def create_chain(
     db: Session = Depends(get_db)
 ):
     """Create a new automation chain"""
+    validate_actions(chain_data.actions)
+    
     new_chain = Chain(
         name=chain_data.name,
         description=chain_data.description,
@@ -25,9 +115,13 @@ def create_chain(
         trigger_type=chain_data.trigger_type,
         trigger_config=chain_data.trigger_config,
         actions=chain_data.actions,
+        max_parallel_actions=chain_data.max_parallel_actions,
         execution_cost=chain_data.execution_cost
     )
     
+    if chain_data.trigger_type == TriggerType.SCHEDULE:
+        new_chain.next_run_at = schedule_run_at(chain_data.trigger_config, first=True)
+    
     db.add(new_chain)
     db.commit()
     db.refresh(new_chain)
@@ -35,14 +129,187 @@ def create_chain(
     return new_chain
 
 
-@router.get("/", response_model=List[ChainResponse])
-def list_chains(
+@router.post("/bulk", response_model=BulkResponse)
+def bulk_create_chains(
+    payload: ChainBulkCreate,
     current_user: User = Depends(get_current_user),
     db: Session = Depends(get_db)
 ):
-    """List all chains for current user"""
-    chains = db.query(Chain).filter(Chain.user_id == current_user.id).all()
-    return chains
+    """Create many chains with one multi-row INSERT.
+
+    Every item is validated first; valid ones are created in a single
+    transaction and invalid ones are reported in their result.
+    """
+    check_bulk_size(payload.chains)
+    
+    results = []
+    rows = []
+    indexes = []
+    for index, chain_data in enumerate(payload.chains):
+        try:
+            validate_actions(chain_data.actions)
+            next_run = None
+            if chain_data.trigger_type == TriggerType.SCHEDULE:
+                next_run = schedule_run_at(chain_data.trigger_config, first=True)
+        except HTTPException as e:
+            results.append(BulkItemResult(index=index, ok=False, error=e.detail))
+            continue
+        rows.append({
+            "name": chain_data.name,
+            "description": chain_data.description,
+            "user_id": current_user.id,
+            "trigger_type": chain_data.trigger_type,
+            "trigger_config": chain_data.trigger_config,
+            "actions": chain_data.actions,
+            "max_parallel_actions": chain_data.max_parallel_actions,
+            "execution_cost": chain_data.execution_cost,
+            "next_run_at": next_run
+        })
+        indexes.append(index)
+    
+    if rows:
+        chain_ids = db.execute(
+            insert(Chain).returning(Chain.id, sort_by_parameter_order=True),
+            rows
+        ).scalars().all()
+        db.commit()
+        results.extend(BulkItemResult(index=index, id=chain_id, ok=True) for index, chain_id in zip(indexes, chain_ids))
+    
+    return bulk_response(results)
+
+
+@router.patch("/bulk", response_model=BulkResponse)
+def bulk_update_chains(
+    payload: ChainBulkUpdate,
+    current_user: User = Depends(get_current_user),
+    db: Session = Depends(get_db)
+):
+    """Update many chains in one transaction.
+
+    The chains are loaded with one query and flushed together, so items
+    changing the same fields share one executemany UPDATE. Items naming
+    an unknown chain, or one already updated earlier in the request, are
+    reported in their result.
+    """
+    check_bulk_size(payload.chains)
+    
+    chains = {
+        chain.id: chain for chain in db.query(Chain).filter(
+            Chain.id.in_({item.id for item in payload.chains}),
+            Chain.user_id == current_user.id
+        )
+    }
+    
+    now = datetime.utcnow()
+    results = []
+    updated = set()
+    for index, item in enumerate(payload.chains):
+        chain = chains.get(item.id)
+        error = None
+        if chain is None:
+            error = "Chain not found"
+        elif item.id in updated:
+            error = "Chain appears more than once in the request"
+        else:
+            try:
+                apply_chain_update(chain, item, now)
+            except HTTPException as e:
+                error = e.detail
+        if error:
+            results.append(BulkItemResult(index=index, id=item.id, ok=False, error=error))
+            continue
+        updated.add(item.id)
+        results.append(BulkItemResult(index=index, id=item.id, ok=True))
+    
+    db.commit()
+    invalidate_chains(list(updated))
+    
+    return bulk_response(results)
+
+
+def set_chains_active(db: Session, user_id: int, chain_ids: list, is_active: bool) -> BulkResponse:
+    """Activate or deactivate the user's chains with one UPDATE.
+
+    Activated schedule chains get their next run recomputed, as in
+    update_chain, with one executemany UPDATE.
+    """
+    check_bulk_size(chain_ids)
+    
+    chains = {
+        chain_id: (trigger_type, trigger_config)
+        for chain_id, trigger_type, trigger_config in db.query(Chain.id, Chain.trigger_type, Chain.trigger_config).filter(
+            Chain.id.in_(set(chain_ids)),
+            Chain.user_id == user_id
+        )
+    }
+    
+    now = datetime.utcnow()
+    results = []
+    seen = set()
+    toggled = []
+    schedules = []
+    for index, chain_id in enumerate(chain_ids):
+        if chain_id not in chains:
+            results.append(BulkItemResult(index=index, id=chain_id, ok=False, error="Chain not found"))
+            continue
+        if chain_id in seen:
+            results.append(BulkItemResult(index=index, id=chain_id, ok=False, error="Chain appears more than once in the request"))
+            continue
+        seen.add(chain_id)
+        trigger_type, trigger_config = chains[chain_id]
+        if is_active and trigger_type == TriggerType.SCHEDULE:
+            try:
+                schedules.append({"chain_pk": chain_id, "next_run": schedule_run_at(trigger_config)})
+            except HTTPException as e:
+                results.append(BulkItemResult(index=index, id=chain_id, ok=False, error=e.detail))
+                continue
+        toggled.append(chain_id)
+        results.append(BulkItemResult(index=index, id=chain_id, ok=True))
+    
+    if toggled:
+        db.execute(
+            update(Chain).where(Chain.id.in_(toggled)).values(is_active=is_active, updated_at=now)
+        )
+    if schedules:
+        chains_table = Chain.__table__
+        db.execute(
+            chains_table.update().where(chains_table.c.id == bindparam("chain_pk")).values(next_run_at=bindparam("next_run")),
+            schedules
+        )
+    db.commit()
+    invalidate_chains(toggled)
+    
+    return bulk_response(results)
+
+
+@router.post("/bulk/activate", response_model=BulkResponse)
+def bulk_activate_chains(
+    payload: ChainIdList,
+    current_user: User = Depends(get_current_user),
+    db: Session = Depends(get_db)
+):
+    """Activate many chains at once"""
+    return set_chains_active(db, current_user.id, payload.ids, True)
+
+
+@router.post("/bulk/deactivate", response_model=BulkResponse)
+def bulk_deactivate_chains(
+    payload: ChainIdList,
+    current_user: User = Depends(get_current_user),
+    db: Session = Depends(get_db)
+):
+    """Deactivate many chains at once"""
+    return set_chains_active(db, current_user.id, payload.ids, False)
+
+
+@router.get("/", response_model=Page[ChainResponse])
+def list_chains(
+    current_user: User = Depends(get_current_user),
+    db: Session = Depends(get_db),
+    page: PageParams = Depends(get_page_params)
+):
+    """List chains for current user, newest first"""
+    return paginate(db.query(Chain).filter(Chain.user_id == current_user.id), Chain, page)
 
 
 @router.get("/{chain_id}", response_model=ChainResponse)
@@ -85,23 +352,10 @@ def update_chain(
             detail="Chain not found"
         )
     
-    # Update fields
-    if chain_data.name is not None:
-        chain.name = chain_data.name
-    if chain_data.description is not None:
-        chain.description = chain_data.description
-    if chain_data.trigger_config is not None:
-        chain.trigger_config = chain_data.trigger_config
-    if chain_data.actions is not None:
-        chain.actions = chain_data.actions
-    if chain_data.is_active is not None:
-        chain.is_active = chain_data.is_active
-    if chain_data.execution_cost is not None:
-        chain.execution_cost = chain_data.execution_cost
-    
-    chain.updated_at = datetime.utcnow()
+    apply_chain_update(chain, chain_data, datetime.utcnow())
     
     db.commit()
+    invalidate_chain(chain.id)
     db.refresh(chain)
     
     return chain
@@ -127,6 +381,7 @@ def delete_chain(
     
     db.delete(chain)
     db.commit()
+    invalidate_chain(chain_id)
     
     return {"message": "Chain deleted successfully"}
 
@@ -156,31 +411,250 @@ def trigger_chain_execution(
             detail="Chain is not active"
         )
     
+    # Reserve the execution cost; committed together with the execution log
+    admission = admit(db, current_user.id, chain.execution_cost)
+    if admission.status is None:
+        raise HTTPException(
+            status_code=status.HTTP_402_PAYMENT_REQUIRED,
+            detail="Insufficient balance"
+        )
+    
     # Create execution log
     execution_log = ExecutionLog(
         chain_id=chain_id,
-        trigger_data=trigger_data.trigger_data,
-        status=ExecutionStatus.PENDING
+        status=admission.status,
+        reserved_amount=admission.reserved,
+        reserved_at=datetime.utcnow() if admission.reserved is not None else None
     )
+    set_trigger_data(db, execution_log, trigger_data.trigger_data)
     
     db.add(execution_log)
     db.commit()
     db.refresh(execution_log)
+    if admission.reserved is not None:
+        invalidate_principal(current_user.id)
     
-    # Trigger async execution
-    execute_chain.delay(execution_log.id)
+    # Trigger async execution; parked ones are queued by admit_parked_executions
+    if execution_log.status == ExecutionStatus.PENDING:
+        execute_chain.delay(execution_log.id)
     
     return execution_log
 
 
-@router.get("/{chain_id}/executions", response_model=List[ExecutionLogResponse])
+@router.post("/{chain_id}/execute/batch", response_model=ExecutionBatchResponse, status_code=status.HTTP_202_ACCEPTED)
+async def trigger_chain_batch(
+    chain_id: int,
+    request: Request,
+    current_user: User = Depends(get_current_user),
+    db: AsyncSession = Depends(get_async_db)
+):
+    """Trigger many executions of a chain at once.
+
+    The body is ``{"trigger_data": [...]}`` or NDJSON with one trigger
+    payload per line. Execution logs are inserted in chunks, committed
+    together and queued in Celery groups; the returned batch id tracks
+    their progress.
+    """
+    chain = await get_cached_chain_async(db, chain_id)
+    
+    if not chain or chain.user_id != current_user.id:
+        raise HTTPException(
+            status_code=status.HTTP_404_NOT_FOUND,
+            detail="Chain not found"
+        )
+    
+    if not chain.is_active:
+        raise HTTPException(
+            status_code=status.HTTP_400_BAD_REQUEST,
+            detail="Chain is not active"
+        )
+    
+    batch = ExecutionBatch(chain_id=chain_id, total=0)
+    db.add(batch)
+    await db.flush()
+    
+    queued = []
+    reserved_users = set()
+    chunk = []
+    total = 0
+    async for payload in read_trigger_data(request):
+        total += 1
+        if total > settings.EXECUTION_BATCH_MAX_ITEMS:
+            raise HTTPException(
+                status_code=status.HTTP_413_REQUEST_ENTITY_TOO_LARGE,
+                detail=f"At most {settings.EXECUTION_BATCH_MAX_ITEMS} executions per batch"
+            )
+        chunk.append(payload)
+        if len(chunk) >= settings.EXECUTION_BATCH_CHUNK_SIZE:
+            queued.extend(await insert_chunk(db, chain, batch.id, chunk, reserved_users))
+            chunk = []
+    if chunk:
+        queued.extend(await insert_chunk(db, chain, batch.id, chunk, reserved_users))
+    
+    if not total:
+        raise HTTPException(
+            status_code=status.HTTP_400_BAD_REQUEST,
+            detail="The batch is empty"
+        )
+    
+    batch.total = total
+    await db.commit()
+    
+    # Publishing to the broker or the invalidation bus blocks, so keep it off the event loop
+    for user_id in reserved_users:
+        await run_in_threadpool(invalidate_principal, user_id)
+    await run_in_threadpool(publish_executions, queued, settings.SCHEDULER_PUBLISH_BATCH_SIZE)
+    
+    status_counts = {ExecutionStatus.PENDING.value: len(queued), ExecutionStatus.PARKED.value: total - len(queued)}
+    return {
+        "id": batch.id,
+        "chain_id": chain_id,
+        "total": total,
+        "created_at": batch.created_at,
+        "status_counts": {key: count for key, count in status_counts.items() if count},
+        "finished": 0,
+        "done": False
+    }
+
+
+@router.get("/{chain_id}/batches/{batch_id}", response_model=ExecutionBatchResponse)
+def get_chain_batch(
+    chain_id: int,
+    batch_id: int,
+    current_user: User = Depends(get_current_user),
+    db: Session = Depends(get_db)
+):
+    """Progress of a batch trigger: its executions counted by status"""
+    batch = db.query(ExecutionBatch).join(Chain).filter(
+        ExecutionBatch.id == batch_id,
+        ExecutionBatch.chain_id == chain_id,
+        Chain.user_id == current_user.id
+    ).first()
+    
+    if not batch:
+        raise HTTPException(
+            status_code=status.HTTP_404_NOT_FOUND,
+            detail="Batch not found"
+        )
+    
+    return batch_progress(db, batch)
+
+
+@router.get("/{chain_id}/executions", response_model=Page[ExecutionLogResponse])
 def list_chain_executions(
     chain_id: int,
     current_user: User = Depends(get_current_user),
     db: Session = Depends(get_db),
-    limit: int = 50
+    page: PageParams = Depends(get_page_params)
+):
+    """List execution logs for a chain, newest first"""
+    chain = db.query(Chain).filter(
+        Chain.id == chain_id,
+        Chain.user_id == current_user.id
+    ).first()
+    
+    if not chain:
+        raise HTTPException(
+            status_code=status.HTTP_404_NOT_FOUND,
+            detail="Chain not found"
+        )
+    
+    return paginate(db.query(ExecutionLog).filter(ExecutionLog.chain_id == chain_id), ExecutionLog, page)
+
+
+@router.get("/{chain_id}/executions/{execution_id}", response_model=ExecutionLogResponse)
+def get_chain_execution(
+    chain_id: int,
+    execution_id: int,
+    current_user: User = Depends(get_current_user),
+    db: Session = Depends(get_db)
+):
+    """Get an execution log with its full trigger data and results"""
+    execution_log = db.query(ExecutionLog).join(Chain).filter(
+        ExecutionLog.id == execution_id,
+        ExecutionLog.chain_id == chain_id,
+        Chain.user_id == current_user.id
+    ).first()
+    
+    if not execution_log:
+        raise HTTPException(
+            status_code=status.HTTP_404_NOT_FOUND,
+            detail="Execution not found"
+        )
+    
+    # Offloaded payloads are only fetched for this detail view
+    response = ExecutionLogResponse.model_validate(execution_log)
+    response.trigger_data = load_payload(db, execution_log.trigger_data, execution_log.trigger_data_ref)
+    response.execution_result = load_payload(db, execution_log.execution_result, execution_log.execution_result_ref)
+    
+    return response
+
+
+@router.get("/{chain_id}/stats", response_model=ChainStatsResponse)
+def get_chain_stats(
+    chain_id: int,
+    current_user: User = Depends(get_current_user),
+    db: Session = Depends(get_db),
+    period: str = Query("day", pattern="^(hour|day)$"),
+    buckets: Optional[int] = Query(None, ge=1, le=744)
+):
+    """Execution counts, success rate, spend and duration percentiles of a chain.
+
+    Covers the last ``buckets`` hours or days (default 24 hours or 30
+    days), read from the pre-aggregated execution_stats rows.
+    """
+    chain = db.query(Chain).filter(
+        Chain.id == chain_id,
+        Chain.user_id == current_user.id
+    ).first()
+    
+    if not chain:
+        raise HTTPException(
+            status_code=status.HTTP_404_NOT_FOUND,
+            detail="Chain not found"
+        )
+    
+    if buckets is None:
+        buckets = 24 if period == "hour" else 30
+    return chain_stats(db, chain_id, period, buckets, datetime.utcnow())
+
+
+@router.get("/{chain_id}/archives", response_model=List[ArchiveDayResponse])
+def list_chain_archives(
+    chain_id: int,
+    current_user: User = Depends(get_current_user),
+    db: Session = Depends(get_db)
+):
+    """List the archived days of a chain with their aggregates, newest first"""
+    chain = db.query(Chain).filter(
+        Chain.id == chain_id,
+        Chain.user_id == current_user.id
+    ).first()
+    
+    if not chain:
+        raise HTTPException(
+            status_code=status.HTTP_404_NOT_FOUND,
+            detail="Chain not found"
+        )
+    
+    rollups = db.query(ExecutionDailyRollup).filter(
+        ExecutionDailyRollup.chain_id == chain_id
+    ).order_by(ExecutionDailyRollup.day.desc()).all()
+    
+    return [rollup_summary(rollup) for rollup in rollups]
+
+
+@router.get("/{chain_id}/archives/{day}", response_model=List[ExecutionLogResponse])
+def get_chain_archive(
+    chain_id: int,
+    day: date,
+    current_user: User = Depends(get_current_user),
+    db: Session = Depends(get_db),
+    execution_status: Optional[ExecutionStatus] = Query(None, alias="status"),
+    offset: int = Query(0, ge=0),
+    limit: int = Query(100, ge=1, le=1000)
 ):
-    """List execution logs for a chain"""
+    """Read archived execution logs of a chain for one day"""
     chain = db.query(Chain).filter(
         Chain.id == chain_id,
         Chain.user_id == current_user.id
@@ -192,8 +666,11 @@ def list_chain_executions(
             detail="Chain not found"
         )
     
-    executions = db.query(ExecutionLog).filter(
-        ExecutionLog.chain_id == chain_id
-    ).order_by(ExecutionLog.created_at.desc()).limit(limit).all()
+    records = read_archive(chain_id, day, execution_status.value if execution_status else None, offset, limit)
+    if records is None:
+        raise HTTPException(
+            status_code=status.HTTP_404_NOT_FOUND,
+            detail="No archive for this day"
+        )
     
-    return executions
+    return records
@@ -1,18 +1,18 @@
-from fastapi import Depends, HTTPException, status
+from fastapi import Depends, HTTPException, Query, status
 from fastapi.security import HTTPBearer, HTTPAuthorizationCredentials
 from sqlalchemy.orm import Session
+from typing import Optional
 from app.core.database import get_db
 from app.core.security import verify_token
 from app.models.models import User
+from app.services.pagination import PageParams, decode_cursor
+from app.services.principal_cache import get_cached_principal
 
 security = HTTPBearer()
 
 
-def get_current_user(
-    credentials: HTTPAuthorizationCredentials = Depends(security),
-    db: Session = Depends(get_db)
-) -> User:
-    """Get current authenticated user"""
+def get_token_user_id(credentials: HTTPAuthorizationCredentials = Depends(security)) -> int:
+    """Verify the bearer token and return the user id it was issued for"""
     token = credentials.credentials
     payload = verify_token(token)
     
@@ -29,7 +29,10 @@ def get_current_user(
             detail="Invalid token payload"
         )
     
-    user = db.query(User).filter(User.id == user_id).first()
+    return user_id
+
+
+def check_user(user):
     if not user:
         raise HTTPException(
             status_code=status.HTTP_401_UNAUTHORIZED,
@@ -43,3 +46,39 @@ def get_current_user(
         )
     
     return user
+
+
+def get_current_user(
+    user_id: int = Depends(get_token_user_id),
+    db: Session = Depends(get_db)
+) -> User:
+    """Get current authenticated user.
+    
+    Served from the short-lived principal cache, so the returned object is
+    a read-only snapshot; endpoints that read the balance for a decision or
+    modify the user depend on get_current_user_fresh instead.
+    """
+    return check_user(get_cached_principal(db, user_id))
+
+
+def get_current_user_fresh(
+    user_id: int = Depends(get_token_user_id),
+    db: Session = Depends(get_db)
+) -> User:
+    """Get current authenticated user as a row of the request's session, bypassing the cache"""
+    return check_user(db.query(User).filter(User.id == user_id).first())
+
+
+def get_page_params(
+    cursor: Optional[str] = None,
+    limit: int = Query(50, ge=1, le=200)
+) -> PageParams:
+    """Parse the cursor and page size of a paginated listing"""
+    try:
+        after = decode_cursor(cursor) if cursor else None
+    except ValueError:
+        raise HTTPException(
+            status_code=status.HTTP_400_BAD_REQUEST,
+            detail="Invalid cursor"
+        )
+    return PageParams(after, limit)
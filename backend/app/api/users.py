@@ -1,11 +1,14 @@
 from fastapi import APIRouter, Depends, HTTPException, status
 from sqlalchemy.orm import Session
-from typing import List
 from app.core.database import get_db
-from app.models.models import User, Transaction
-from app.schemas.schemas import UserResponse, TransactionResponse, DepositRequest
-from app.api.dependencies import get_current_user
+from app.models.models import ExecutionLog, User, Transaction
+from app.schemas.schemas import ExecutionLogResponse, UserResponse, TransactionResponse, DepositRequest, Page
+from app.api.dependencies import get_current_user, get_current_user_fresh, get_page_params
 from app.core.config import settings
+from app.services.billing import credit, to_money
+from app.services.pagination import PageParams, paginate
+from app.services.principal_cache import invalidate_principal
+from app.workers.tasks import admit_parked_executions
 import stripe
 
 router = APIRouter(prefix="/users", tags=["users"])
@@ -20,31 +23,50 @@ def get_current_user_info(current_user: User = Depends(get_current_user)):
     return current_user
 
 
-@router.get("/me/transactions", response_model=List[TransactionResponse])
+@router.get("/me/transactions", response_model=Page[TransactionResponse])
 def get_user_transactions(
     current_user: User = Depends(get_current_user),
     db: Session = Depends(get_db),
-    limit: int = 50
+    page: PageParams = Depends(get_page_params)
 ):
-    """Get user transaction history"""
-    transactions = db.query(Transaction).filter(
+    """Get user transaction history, newest first"""
+    return paginate(db.query(Transaction).filter(Transaction.user_id == current_user.id), Transaction, page)
+
+
+@router.get("/me/transactions/{transaction_id}/executions", response_model=Page[ExecutionLogResponse])
+def get_transaction_executions(
+    transaction_id: int,
+    current_user: User = Depends(get_current_user),
+    db: Session = Depends(get_db),
+    page: PageParams = Depends(get_page_params)
+):
+    """List the executions a transaction charged for, newest first"""
+    transaction = db.query(Transaction).filter(
+        Transaction.id == transaction_id,
         Transaction.user_id == current_user.id
-    ).order_by(Transaction.created_at.desc()).limit(limit).all()
+    ).first()
     
-    return transactions
+    if not transaction:
+        raise HTTPException(
+            status_code=status.HTTP_404_NOT_FOUND,
+            detail="Transaction not found"
+        )
+    
+    return paginate(db.query(ExecutionLog).filter(ExecutionLog.transaction_id == transaction_id), ExecutionLog, page)
 
 
 @router.post("/me/deposit", response_model=TransactionResponse)
 def deposit_funds(
     deposit_data: DepositRequest,
-    current_user: User = Depends(get_current_user),
+    current_user: User = Depends(get_current_user_fresh),
     db: Session = Depends(get_db)
 ):
     """Deposit funds to user account via Stripe"""
+    amount = to_money(deposit_data.amount)
     try:
         # Create Stripe payment intent
         payment_intent = stripe.PaymentIntent.create(
-            amount=int(deposit_data.amount * 100),  # Convert to cents
+            amount=int(amount * 100),  # Convert to cents
             currency="usd",
             payment_method=deposit_data.payment_method_id,
             confirm=True,
@@ -56,20 +78,25 @@ def deposit_funds(
         
         if payment_intent.status == "succeeded":
             # Add funds to user balance
-            current_user.balance += deposit_data.amount
+            credit(db, current_user.id, amount)
             
             # Create transaction record
             transaction = Transaction(
                 user_id=current_user.id,
-                amount=deposit_data.amount,
+                amount=amount,
                 description=f"Deposit via Stripe",
                 stripe_payment_intent_id=payment_intent.id
             )
             
             db.add(transaction)
             db.commit()
+            invalidate_principal(current_user.id)
             db.refresh(transaction)
             
+            # Parked executions may fit the new balance
+            if settings.ADMISSION_CONTROL == "park":
+                admit_parked_executions.delay()
+            
             return transaction
         else:
             raise HTTPException(
@@ -1,23 +1,95 @@
-from fastapi import APIRouter, Depends, Request
-from sqlalchemy.orm import Session
-from app.core.database import get_db
-from app.models.models import Chain, ExecutionLog, ExecutionStatus, TriggerType
+from fastapi import APIRouter, Depends, HTTPException, Request, status
+from fastapi.concurrency import run_in_threadpool
+from fastapi.responses import JSONResponse
+from sqlalchemy import select
+from sqlalchemy.exc import IntegrityError
+from sqlalchemy.ext.asyncio import AsyncSession
+from app.core.config import settings
+from app.core.database import get_async_db
+from app.models.models import ExecutionIdempotencyKey, ExecutionLog, ExecutionStatus, TriggerType
+from app.services.admission import admit_async
+from app.services.chain_cache import get_cached_chain_async
+from app.services.idempotency import PENDING, get_idempotency_front, idempotency_key
+from app.services.payload_store import set_trigger_data
+from app.services.principal_cache import invalidate_principal
+from app.services.webhook_buffer import get_webhook_buffer
 from app.workers.tasks import execute_chain
+from datetime import datetime
 import hashlib
 import hmac
+import json
 
 router = APIRouter(prefix="/webhooks", tags=["webhooks"])
 
 
+async def find_execution(db: AsyncSession, chain_id: int, key: str):
+    """Id of the execution log created for an idempotency key, if any"""
+    return (await db.execute(
+        select(ExecutionIdempotencyKey.execution_log_id).where(
+            ExecutionIdempotencyKey.chain_id == chain_id,
+            ExecutionIdempotencyKey.idempotency_key == key
+        )
+    )).scalar_one_or_none()
+
+
+async def read_webhook_body(request: Request, secret: str = None, max_bytes: int = None) -> tuple:
+    """Read the request body once, as it streams in.
+
+    Returns (body as a bytearray, hex HMAC-SHA256 of the body or None
+    without a secret). Bodies over ``max_bytes`` are rejected with 413 as soon as
+    the declared Content-Length or the bytes received exceed it.
+    """
+    max_bytes = max_bytes or settings.WEBHOOK_MAX_BODY_BYTES
+    declared = request.headers.get("content-length")
+    if declared and declared.isdigit() and int(declared) > max_bytes:
+        raise HTTPException(
+            status_code=status.HTTP_413_REQUEST_ENTITY_TOO_LARGE,
+            detail=f"Webhook body exceeds {max_bytes} bytes"
+        )
+    
+    mac = hmac.new(secret.encode(), digestmod=hashlib.sha256) if secret else None
+    body = bytearray()
+    async for chunk in request.stream():
+        if len(body) + len(chunk) > max_bytes:
+            raise HTTPException(
+                status_code=status.HTTP_413_REQUEST_ENTITY_TOO_LARGE,
+                detail=f"Webhook body exceeds {max_bytes} bytes"
+            )
+        body += chunk
+        if mac:
+            mac.update(chunk)
+    
+    return body, mac.hexdigest() if mac else None
+
+
+def allowed_headers(headers, trigger_config: dict) -> dict:
+    """Request headers to keep in trigger_data: the chain's allowlist, else WEBHOOK_HEADER_ALLOWLIST"""
+    allowlist = trigger_config.get("header_allowlist")
+    if allowlist is None:
+        allowlist = [name.strip() for name in settings.WEBHOOK_HEADER_ALLOWLIST.split(",") if name.strip()]
+    if "*" in allowlist:
+        return dict(headers)
+    allowlist = {name.lower() for name in allowlist}
+    return {name: value for name, value in headers.items() if name.lower() in allowlist}
+
+
+def duplicate_response(execution_log_id: int):
+    return {
+        "message": "Duplicate webhook ignored",
+        "execution_log_id": execution_log_id,
+        "duplicate": True
+    }
+
+
 @router.post("/{chain_id}")
 async def webhook_trigger(
     chain_id: int,
     request: Request,
-    db: Session = Depends(get_db)
+    db: AsyncSession = Depends(get_async_db)
 ):
     """Webhook endpoint to trigger chain execution"""
     # Get chain
-    chain = db.query(Chain).filter(Chain.id == chain_id).first()
+    chain = await get_cached_chain_async(db, chain_id)
     
     if not chain:
         return {"error": "Chain not found"}, 404
@@ -28,43 +100,112 @@ async def webhook_trigger(
     if chain.trigger_type != TriggerType.WEBHOOK:
         return {"error": "Chain is not configured for webhook trigger"}, 400
     
-    # Get webhook data
+    # Optionally verify webhook secret
+    webhook_secret = chain.trigger_config.get("secret")
+    signature = request.headers.get("X-Webhook-Signature")
+    if webhook_secret and not signature:
+        return {"error": "Missing webhook signature"}, 401
+    
+    # Get webhook data, signing it as it is read (simple HMAC verification)
+    body_bytes, expected_signature = await read_webhook_body(request, webhook_secret)
+    if webhook_secret and not hmac.compare_digest(signature, expected_signature):
+        return {"error": "Invalid webhook signature"}, 401
+    
     try:
-        body = await request.json()
-    except:
+        body = json.loads(body_bytes)
+    except ValueError:
         body = {}
     
-    # Optionally verify webhook secret
-    webhook_secret = chain.trigger_config.get("secret")
-    if webhook_secret:
-        signature = request.headers.get("X-Webhook-Signature")
-        if not signature:
-            return {"error": "Missing webhook signature"}, 401
-        
-        # Verify signature (simple HMAC verification)
-        body_bytes = await request.body()
-        expected_signature = hmac.new(
-            webhook_secret.encode(),
-            body_bytes,
-            hashlib.sha256
-        ).hexdigest()
-        
-        if not hmac.compare_digest(signature, expected_signature):
-            return {"error": "Invalid webhook signature"}, 401
+    trigger_data = {"webhook_data": body, "headers": allowed_headers(request.headers, chain.trigger_config)}
+    
+    # Retries of a delivery we have already seen get the original execution back
+    key = idempotency_key(chain.trigger_config, request.headers, body_bytes)
+    front = get_idempotency_front() if key else None
+    ttl = settings.WEBHOOK_IDEMPOTENCY_TTL
+    seen = await front.claim(chain_id, key, ttl) if front else None
+    
+    # Write-behind: buffer the event and let the ingest consumer create the execution
+    if settings.WEBHOOK_INGEST_MODE == "buffered":
+        if seen is not None:
+            content = {"message": "Duplicate webhook ignored", "duplicate": True}
+            if seen.startswith("event:"):
+                content["event_id"] = seen[len("event:"):]
+            return JSONResponse(status_code=202, content=content)
+        try:
+            event_id = await get_webhook_buffer().append_async({
+                "chain_id": chain_id,
+                "trigger_data": trigger_data,
+                "idempotency_key": key,
+                "received_at": datetime.utcnow().isoformat()
+            })
+        except Exception:
+            # Nothing was buffered: let the sender's retry through
+            if front:
+                await front.forget(chain_id, key)
+            raise
+        if front:
+            await front.remember(chain_id, key, f"event:{event_id}", ttl)
+        return JSONResponse(
+            status_code=202,
+            content={"message": "Webhook accepted for execution", "event_id": event_id}
+        )
+    
+    if seen is not None:
+        if seen != PENDING and not seen.startswith("event:"):
+            return duplicate_response(int(seen))
+        # The first delivery may still be in flight; the unique constraint settles it
+        original_id = await find_execution(db, chain_id, key)
+        if original_id is not None:
+            return duplicate_response(original_id)
+    
+    # Reserve the execution cost; committed together with the execution log
+    admission = await admit_async(db, chain.user_id, chain.execution_cost)
+    if admission.status is None:
+        raise HTTPException(
+            status_code=status.HTTP_402_PAYMENT_REQUIRED,
+            detail="Insufficient balance"
+        )
     
     # Create execution log
     execution_log = ExecutionLog(
         chain_id=chain_id,
-        trigger_data={"webhook_data": body, "headers": dict(request.headers)},
-        status=ExecutionStatus.PENDING
+        status=admission.status,
+        reserved_amount=admission.reserved,
+        reserved_at=datetime.utcnow() if admission.reserved is not None else None,
+        idempotency_key=key
     )
+    await db.run_sync(lambda session: set_trigger_data(session, execution_log, trigger_data))
     
     db.add(execution_log)
-    db.commit()
-    db.refresh(execution_log)
+    try:
+        if key:
+            # The key table's primary key rejects a concurrent duplicate
+            await db.flush()
+            db.add(ExecutionIdempotencyKey(chain_id=chain_id, idempotency_key=key, execution_log_id=execution_log.id))
+        await db.commit()
+    except IntegrityError:
+        await db.rollback()
+        original_id = await find_execution(db, chain_id, key) if key else None
+        if original_id is None:
+            raise
+        return duplicate_response(original_id)
+    
+    if admission.reserved is not None:
+        await run_in_threadpool(invalidate_principal, chain.user_id)
+    if front:
+        await front.remember(chain_id, key, str(execution_log.id), ttl)
+    
+    if execution_log.status == ExecutionStatus.PARKED:
+        return JSONResponse(
+            status_code=202,
+            content={
+                "message": "Webhook received; execution parked until the balance covers it",
+                "execution_log_id": execution_log.id
+            }
+        )
     
-    # Trigger async execution
-    execute_chain.delay(execution_log.id)
+    # Trigger async execution; publishing to the broker blocks, so keep it off the event loop
+    await run_in_threadpool(execute_chain.delay, execution_log.id)
     
     return {
         "message": "Webhook received and chain execution triggered",
@@ -1,11 +1,14 @@
 from fastapi import FastAPI
 from fastapi.middleware.cors import CORSMiddleware
 from app.core.config import settings
-from app.core.database import engine, Base
+from app.core.database import async_engine, engine, Base
 from app.api import auth, chains, users, webhooks
+from app.services.password_hasher import get_password_hasher
+from app.workers.webhook_ingest import WebhookIngestConsumer
 
-# Create database tables
-Base.metadata.create_all(bind=engine)
+# Schema migrations are applied with `alembic upgrade head`
+if settings.DATABASE_AUTO_CREATE:
+    Base.metadata.create_all(bind=engine)
 
 app = FastAPI(
     title=settings.APP_NAME,
@@ -29,6 +32,32 @@ app.include_router(users.router)
 app.include_router(webhooks.router)
 
 
+@app.on_event("startup")
+async def connect_async_engine():
+    # The first async connection initializes the dialect under a lock;
+    # do it once here rather than racing concurrent first requests into it
+    async with async_engine.connect():
+        pass
+
+
+@app.on_event("startup")
+def start_webhook_ingest():
+    if settings.WEBHOOK_INGEST_MODE == "buffered" and settings.WEBHOOK_INGEST_IN_API:
+        app.state.webhook_ingest = WebhookIngestConsumer()
+        app.state.webhook_ingest.start()
+
+
+@app.on_event("shutdown")
+def stop_webhook_ingest():
+    if getattr(app.state, "webhook_ingest", None):
+        app.state.webhook_ingest.stop(timeout=settings.WEBHOOK_BUFFER_FLUSH_INTERVAL + 5)
+
+
+@app.on_event("shutdown")
+def stop_password_hasher():
+    get_password_hasher().shutdown()
+
+
 @app.get("/")
 def root():
     return {
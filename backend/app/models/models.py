@@ -1,10 +1,28 @@
-from sqlalchemy import Column, Integer, String, Float, DateTime, Boolean, Text, ForeignKey, JSON, Enum
+from sqlalchemy import Column, BigInteger, Integer, String, Float, Date, DateTime, Boolean, Text, ForeignKey, JSON, Enum, LargeBinary, Index, UniqueConstraint, false, text
 from sqlalchemy.orm import relationship
+from sqlalchemy.types import TypeDecorator
 from datetime import datetime
+from decimal import ROUND_HALF_UP, Decimal
 import enum
 from app.core.database import Base
 
 
+class Money(TypeDecorator):
+    """Exact amounts: Decimal in Python, integer cents in the database"""
+    impl = BigInteger
+    cache_ok = True
+    
+    def process_bind_param(self, value, dialect):
+        if value is None:
+            return None
+        if not isinstance(value, Decimal):
+            value = Decimal(str(value))
+        return int((value * 100).to_integral_value(rounding=ROUND_HALF_UP))
+    
+    def process_result_value(self, value, dialect):
+        return None if value is None else Decimal(value).scaleb(-2)
+
+
 class TriggerType(str, enum.Enum):
     WEBHOOK = "webhook"
     SCHEDULE = "schedule"
@@ -22,6 +40,7 @@ class ExecutionStatus(str, enum.Enum):
     RUNNING = "running"
     SUCCESS = "success"
     FAILED = "failed"
+    PARKED = "parked"  # Waiting for the balance to cover it (ADMISSION_CONTROL=park)
 
 
 class User(Base):
@@ -30,8 +49,10 @@ class User(Base):
     id = Column(Integer, primary_key=True, index=True)
     email = Column(String, unique=True, index=True, nullable=False)
     hashed_password = Column(String, nullable=False)
-    balance = Column(Float, default=0.0)
+    balance = Column(Money(), nullable=False, default=Decimal("0.00"))
+    reserved = Column(Money(), nullable=False, default=Decimal("0.00"), server_default="0")  # Held for admitted executions
     is_active = Column(Boolean, default=True)
+    plan = Column(String, nullable=False, default="free", server_default="free")  # Selects the execution log retention
     created_at = Column(DateTime, default=datetime.utcnow)
     
     chains = relationship("Chain", back_populates="owner")
@@ -53,13 +74,23 @@ class Chain(Base):
     # Actions configuration
     actions = Column(JSON, nullable=False)  # List of actions with configs
     
+    max_parallel_actions = Column(Integer, nullable=True)  # Falls back to CHAIN_MAX_PARALLEL_ACTIONS
+    
     is_active = Column(Boolean, default=True)
-    execution_cost = Column(Float, default=0.10)  # Cost per execution
+    execution_cost = Column(Money(), default=Decimal("0.10"))  # Cost per execution
+    next_run_at = Column(DateTime, nullable=True)  # Next due time of schedule chains
     created_at = Column(DateTime, default=datetime.utcnow)
     updated_at = Column(DateTime, default=datetime.utcnow, onupdate=datetime.utcnow)
     
     owner = relationship("User", back_populates="chains")
     executions = relationship("ExecutionLog", back_populates="chain")
+    
+    __table_args__ = (
+        # Serves the scheduler's range query for due chains
+        Index("ix_chains_schedule_due", "trigger_type", "is_active", "next_run_at"),
+        # Keyset pagination of a user's chains
+        Index("ix_chains_user_created", "user_id", "created_at", "id"),
+    )
 
 
 class ExecutionLog(Base):
@@ -73,14 +104,155 @@ class ExecutionLog(Base):
     execution_result = Column(JSON, nullable=True)  # Result of each action
     error_message = Column(Text, nullable=True)
     
-    cost = Column(Float, default=0.0)  # Actual cost charged
+    # Payloads too large to keep inline live in the payload store
+    trigger_data_ref = Column(String, nullable=True)
+    execution_result_ref = Column(String, nullable=True)
+    
+    # Set for webhook deliveries that carry an idempotency key; cleared after
+    # WEBHOOK_IDEMPOTENCY_TTL so the unique constraint covers the retention window
+    idempotency_key = Column(String(80), nullable=True)
+    
+    cost = Column(Money(), default=Decimal("0.00"))  # Actual cost charged
     charged = Column(Boolean, default=False)  # Whether user was charged
+    reserved_amount = Column(Money(), nullable=True)  # Balance held at admission, until charged or released
+    reserved_at = Column(DateTime, nullable=True)
+    # Ledger row covering this charge; with BILLING_MODE=aggregated it is set
+    # by the next flush (no foreign key: transactions already references
+    # execution_logs)
+    transaction_id = Column(Integer, nullable=True)
+    batch_id = Column(Integer, ForeignKey("execution_batches.id"), nullable=True)  # Set for batch triggers
+    # Counted into execution_stats by aggregate_execution_stats once finished
+    stats_recorded = Column(Boolean, nullable=False, default=False, server_default=false())
     
     started_at = Column(DateTime, nullable=True)
     completed_at = Column(DateTime, nullable=True)
     created_at = Column(DateTime, default=datetime.utcnow)
     
     chain = relationship("Chain", back_populates="executions")
+    
+    __table_args__ = (
+        UniqueConstraint("chain_id", "idempotency_key", name="uq_execution_logs_idempotency_key"),
+        # Keyset pagination of a chain's executions
+        Index("ix_execution_logs_chain_created", "chain_id", "created_at", "id"),
+        # Executions covered by a ledger row
+        Index("ix_execution_logs_transaction_id", "transaction_id"),
+        # Charges waiting for the billing flush
+        Index(
+            "ix_execution_logs_unbilled", "id",
+            postgresql_where=text("charged AND transaction_id IS NULL"),
+            sqlite_where=text("charged AND transaction_id IS NULL")
+        ),
+        # Executions waiting for admission, and outstanding reservations
+        Index(
+            "ix_execution_logs_parked", "id",
+            postgresql_where=text("status = 'PARKED'"),
+            sqlite_where=text("status = 'PARKED'")
+        ),
+        Index(
+            "ix_execution_logs_reserved", "reserved_at",
+            postgresql_where=text("reserved_amount IS NOT NULL"),
+            sqlite_where=text("reserved_amount IS NOT NULL")
+        ),
+        # Progress of a batch trigger
+        Index(
+            "ix_execution_logs_batch_status", "batch_id", "status",
+            postgresql_where=text("batch_id IS NOT NULL"),
+            sqlite_where=text("batch_id IS NOT NULL")
+        ),
+        # Finished executions not yet counted into execution_stats
+        Index(
+            "ix_execution_logs_unrecorded", "id",
+            postgresql_where=text("status IN ('SUCCESS', 'FAILED') AND NOT stats_recorded"),
+            sqlite_where=text("status IN ('SUCCESS', 'FAILED') AND NOT stats_recorded")
+        ),
+        # Rows whose idempotency key has yet to expire
+        Index(
+            "ix_execution_logs_idempotency_expiry", "created_at",
+            postgresql_where=text("idempotency_key IS NOT NULL"),
+            sqlite_where=text("idempotency_key IS NOT NULL")
+        ),
+    )
+    
+    @property
+    def payloads_offloaded(self) -> bool:
+        return bool(self.trigger_data_ref or self.execution_result_ref)
+
+
+class ExecutionIdempotencyKey(Base):
+    """Idempotency keys of recent webhook deliveries.
+
+    Kept outside execution_logs so ``(chain_id, idempotency_key)`` stays
+    unique when execution_logs is partitioned (where every unique
+    constraint must include created_at). Written in the same transaction
+    as the execution log; rows expire with WEBHOOK_IDEMPOTENCY_TTL.
+    """
+    __tablename__ = "execution_idempotency_keys"
+    
+    chain_id = Column(Integer, ForeignKey("chains.id", ondelete="CASCADE"), primary_key=True)
+    idempotency_key = Column(String(80), primary_key=True)
+    # No foreign key: execution_logs.id alone is not unique once partitioned
+    execution_log_id = Column(Integer, nullable=False)
+    created_at = Column(DateTime, nullable=False, default=datetime.utcnow, index=True)
+
+
+class ExecutionDailyRollup(Base):
+    """Aggregates of a chain's archived execution logs for one day"""
+    __tablename__ = "execution_daily_rollups"
+    
+    id = Column(Integer, primary_key=True, index=True)
+    chain_id = Column(Integer, ForeignKey("chains.id"), nullable=False)
+    day = Column(Date, nullable=False)
+    
+    status_counts = Column(JSON, nullable=False)  # {"success": n, "failed": n, ...}
+    total_cost = Column(Money(), nullable=False, default=Decimal("0.00"))
+    duration_histogram = Column(JSON, nullable=False)  # app.services.histogram buckets of completed_at - started_at
+    archived_rows = Column(Integer, nullable=False, default=0)
+    
+    updated_at = Column(DateTime, default=datetime.utcnow, onupdate=datetime.utcnow)
+    
+    __table_args__ = (
+        UniqueConstraint("chain_id", "day", name="uq_execution_daily_rollups_chain_day"),
+    )
+
+
+class ExecutionBatch(Base):
+    """Executions of one chain triggered together by one batch request"""
+    __tablename__ = "execution_batches"
+    
+    id = Column(Integer, primary_key=True, index=True)
+    chain_id = Column(Integer, ForeignKey("chains.id"), nullable=False)
+    total = Column(Integer, nullable=False, default=0)
+    created_at = Column(DateTime, default=datetime.utcnow)
+
+
+class ExecutionStats(Base):
+    """Aggregates of a chain's finished executions for one hour or one day, by trigger time"""
+    __tablename__ = "execution_stats"
+    
+    id = Column(Integer, primary_key=True, index=True)
+    chain_id = Column(Integer, ForeignKey("chains.id"), nullable=False)
+    period = Column(String(8), nullable=False)  # "hour" or "day"
+    period_start = Column(DateTime, nullable=False)
+    
+    status_counts = Column(JSON, nullable=False)  # {"success": n, "failed": n}
+    total_cost = Column(Money(), nullable=False, default=Decimal("0.00"))
+    duration_histogram = Column(JSON, nullable=False)  # app.services.histogram buckets of completed_at - started_at
+    
+    updated_at = Column(DateTime, default=datetime.utcnow, onupdate=datetime.utcnow)
+    
+    __table_args__ = (
+        UniqueConstraint("chain_id", "period", "period_start", name="uq_execution_stats_chain_period_start"),
+    )
+
+
+class PayloadBlob(Base):
+    __tablename__ = "payload_blobs"
+    
+    id = Column(Integer, primary_key=True, index=True)
+    codec = Column(String, nullable=False)  # zstd or gzip
+    size = Column(Integer, nullable=False)  # Uncompressed size in bytes
+    data = Column(LargeBinary, nullable=False)
+    created_at = Column(DateTime, default=datetime.utcnow)
 
 
 class Transaction(Base):
@@ -88,7 +260,7 @@ class Transaction(Base):
     
     id = Column(Integer, primary_key=True, index=True)
     user_id = Column(Integer, ForeignKey("users.id"), nullable=False)
-    amount = Column(Float, nullable=False)  # Positive for deposits, negative for charges
+    amount = Column(Money(), nullable=False)  # Positive for deposits, negative for charges
     description = Column(String, nullable=False)
     
     # Stripe info
@@ -98,3 +270,8 @@ class Transaction(Base):
     created_at = Column(DateTime, default=datetime.utcnow)
     
     user = relationship("User", back_populates="transactions")
+    
+    __table_args__ = (
+        # Keyset pagination of a user's transactions
+        Index("ix_transactions_user_created", "user_id", "created_at", "id"),
+    )
@@ -1,8 +1,12 @@
 from pydantic import BaseModel, EmailStr, Field
-from typing import Optional, List, Dict, Any
-from datetime import datetime
+from decimal import Decimal
+from typing import Annotated, Optional, List, Dict, Any, Generic, TypeVar
+from datetime import date, datetime
 from app.models.models import TriggerType, ActionType, ExecutionStatus
 
+# Prices in whole cents
+Price = Annotated[Decimal, Field(ge=0, decimal_places=2)]
+
 
 # User schemas
 class UserCreate(BaseModel):
@@ -19,6 +23,7 @@ class UserResponse(BaseModel):
     id: int
     email: str
     balance: float
+    reserved: float  # Held for executions admitted but not yet charged
     is_active: bool
     created_at: datetime
     
@@ -38,7 +43,8 @@ class ChainCreate(BaseModel):
     trigger_type: TriggerType
     trigger_config: Dict[str, Any]
     actions: List[Dict[str, Any]]
-    execution_cost: float = 0.10
+    max_parallel_actions: Optional[int] = Field(None, ge=1)
+    execution_cost: Price = Decimal("0.10")
 
 
 class ChainUpdate(BaseModel):
@@ -46,8 +52,38 @@ class ChainUpdate(BaseModel):
     description: Optional[str] = None
     trigger_config: Optional[Dict[str, Any]] = None
     actions: Optional[List[Dict[str, Any]]] = None
+    max_parallel_actions: Optional[int] = Field(None, ge=1)
     is_active: Optional[bool] = None
-    execution_cost: Optional[float] = None
+    execution_cost: Optional[Price] = None
+
+
+class ChainBulkCreate(BaseModel):
+    chains: List[ChainCreate]
+
+
+class ChainBulkUpdateItem(ChainUpdate):
+    id: int
+
+
+class ChainBulkUpdate(BaseModel):
+    chains: List[ChainBulkUpdateItem]
+
+
+class ChainIdList(BaseModel):
+    ids: List[int]
+
+
+class BulkItemResult(BaseModel):
+    index: int  # Position of the item in the request
+    id: Optional[int] = None
+    ok: bool
+    error: Optional[str] = None
+
+
+class BulkResponse(BaseModel):
+    succeeded: int
+    failed: int
+    results: List[BulkItemResult]
 
 
 class ChainResponse(BaseModel):
@@ -58,6 +94,7 @@ class ChainResponse(BaseModel):
     trigger_type: TriggerType
     trigger_config: Dict[str, Any]
     actions: List[Dict[str, Any]]
+    max_parallel_actions: Optional[int]
     is_active: bool
     execution_cost: float
     created_at: datetime
@@ -73,12 +110,23 @@ class ExecutionTrigger(BaseModel):
     trigger_data: Optional[Dict[str, Any]] = None
 
 
+class ExecutionBatchResponse(BaseModel):
+    id: int
+    chain_id: int
+    total: int
+    created_at: datetime
+    status_counts: Dict[str, int]
+    finished: int  # Executions that succeeded or failed
+    done: bool
+
+
 class ExecutionLogResponse(BaseModel):
     id: int
     chain_id: int
     status: ExecutionStatus
     trigger_data: Optional[Dict[str, Any]]
     execution_result: Optional[Dict[str, Any]]
+    payloads_offloaded: bool = False  # Full payloads are returned by the execution detail endpoint
     error_message: Optional[str]
     cost: float
     charged: bool
@@ -90,6 +138,38 @@ class ExecutionLogResponse(BaseModel):
         from_attributes = True
 
 
+class ArchiveDayResponse(BaseModel):
+    day: date
+    status_counts: Dict[str, int]
+    total_cost: float
+    archived_rows: int
+    duration_p50_ms: Optional[float]
+    duration_p95_ms: Optional[float]
+    duration_p99_ms: Optional[float]
+
+
+class StatsSummary(BaseModel):
+    executions: int
+    status_counts: Dict[str, int]
+    success_rate: Optional[float]
+    total_cost: float
+    duration_p50_ms: Optional[float]
+    duration_p95_ms: Optional[float]
+    duration_p99_ms: Optional[float]
+
+
+class StatsBucket(StatsSummary):
+    period_start: datetime
+
+
+class ChainStatsResponse(BaseModel):
+    chain_id: int
+    period: str
+    since: datetime
+    totals: StatsSummary
+    buckets: List[StatsBucket]  # Periods with executions, newest first
+
+
 # Transaction schemas
 class TransactionResponse(BaseModel):
     id: int
@@ -105,5 +185,15 @@ class TransactionResponse(BaseModel):
 
 
 class DepositRequest(BaseModel):
-    amount: float = Field(..., gt=0, description="Amount to deposit in USD")
+    amount: Decimal = Field(..., gt=0, decimal_places=2, description="Amount to deposit in USD")
     payment_method_id: str = Field(..., description="Stripe payment method ID")
+
+
+# Pagination schemas
+T = TypeVar("T")
+
+
+class Page(BaseModel, Generic[T]):
+    items: List[T]
+    next_cursor: Optional[str]  # Pass as ?cursor= to fetch the next page
+    has_more: bool
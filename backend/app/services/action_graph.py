@@ -0,0 +1,75 @@
+class ActionGraphError(ValueError):
+    """Raised when chain actions do not form a valid dependency graph"""
+
+
+def action_dependencies(actions: list) -> list:
+    """Resolve each action's ``depends_on`` into the indices it waits for.
+
+    Entries of ``depends_on`` refer to another action's ``id`` or, failing
+    that, to its position in the list. Actions without ``depends_on`` wait
+    for the action before them, which keeps old chains strictly sequential.
+    """
+    ids = {}
+    for index, action in enumerate(actions):
+        action_id = action.get("id")
+        if action_id is None:
+            continue
+        if action_id in ids:
+            raise ActionGraphError(f"Duplicate action id: {action_id}")
+        ids[action_id] = index
+
+    dependencies = []
+    for index, action in enumerate(actions):
+        if "depends_on" not in action:
+            dependencies.append([index - 1] if index else [])
+            continue
+
+        refs = action["depends_on"]
+        if not isinstance(refs, list):
+            raise ActionGraphError(f"depends_on of action {index} must be a list")
+
+        resolved = set()
+        for ref in refs:
+            if isinstance(ref, bool) or not isinstance(ref, (str, int)):
+                raise ActionGraphError(f"Action {index} has an invalid depends_on entry: {ref!r}")
+            if ref in ids:
+                resolved.add(ids[ref])
+            elif isinstance(ref, int) and 0 <= ref < len(actions):
+                resolved.add(ref)
+            else:
+                raise ActionGraphError(f"Action {index} depends on unknown action: {ref}")
+        dependencies.append(sorted(resolved))
+
+    return dependencies
+
+
+def execution_order(dependencies: list) -> list:
+    """Topologically sort actions, raising ActionGraphError on cycles"""
+    dependents = [[] for _ in dependencies]
+    remaining = [len(deps) for deps in dependencies]
+    for index, deps in enumerate(dependencies):
+        for dep in deps:
+            dependents[dep].append(index)
+
+    ready = [index for index, count in enumerate(remaining) if count == 0]
+    order = []
+    while ready:
+        index = ready.pop(0)
+        order.append(index)
+        for dependent in dependents[index]:
+            remaining[dependent] -= 1
+            if remaining[dependent] == 0:
+                ready.append(dependent)
+
+    if len(order) != len(dependencies):
+        cyclic = [index for index, count in enumerate(remaining) if count > 0]
+        raise ActionGraphError(f"Actions contain a dependency cycle: {cyclic}")
+
+    return order
+
+
+def validate_action_graph(actions: list) -> list:
+    """Validate chain actions and return their dependencies"""
+    dependencies = action_dependencies(actions)
+    execution_order(dependencies)
+    return dependencies
@@ -0,0 +1,188 @@
+"""Trigger-time admission control.
+
+With ADMISSION_CONTROL=reject or park, every trigger reserves the chain's
+execution cost before it is queued: users.reserved grows by the cost, as
+long as the balance minus outstanding reservations covers it. The charge
+in execute_chain consumes the reservation, and failed executions release
+it. Executions that cannot be covered are rejected, or parked until a
+deposit or a released reservation makes room.
+
+A cached principal is checked first, so users who are clearly out of
+funds are turned away without a database write. The reservation UPDATE
+is authoritative. Callers invalidate the principal once the reservation
+is committed, so /users/me and later checks see it.
+"""
+from collections import defaultdict
+from datetime import datetime, timedelta
+from decimal import Decimal
+from typing import NamedTuple, Optional
+from sqlalchemy import update
+from sqlalchemy.orm.attributes import set_committed_value
+from app.core.config import settings
+from app.models.models import Chain, ExecutionLog, ExecutionStatus
+from app.services.billing import release, reserve, reserve_statement, to_money
+from app.services.principal_cache import get_cached_principal, get_cached_principal_async, invalidate_principal
+
+
+class Admission(NamedTuple):
+    status: Optional[ExecutionStatus]  # None when the trigger is rejected
+    reserved: Optional[Decimal]  # Amount reserved for the execution
+
+    def log_values(self, now: datetime) -> dict:
+        """ExecutionLog columns for the trigger; rejected ones are logged as failed"""
+        return {
+            "status": self.status or ExecutionStatus.FAILED,
+            "error_message": None if self.status else "Insufficient balance",
+            "reserved_amount": self.reserved,
+            "reserved_at": now if self.reserved is not None else None
+        }
+
+
+ADMITTED = Admission(ExecutionStatus.PENDING, None)
+
+
+def _needs_admission(amount: Decimal) -> bool:
+    return settings.ADMISSION_CONTROL in ("reject", "park") and amount > 0
+
+
+def _not_admitted() -> Admission:
+    if settings.ADMISSION_CONTROL == "park":
+        return Admission(ExecutionStatus.PARKED, None)
+    return Admission(None, None)
+
+
+def _likely_covered(principal, amount: Decimal) -> bool:
+    # The cache may lag behind reservations not yet committed, never behind
+    # deposits or releases, so it can only be too generous
+    return principal is None or principal.balance - principal.reserved >= amount
+
+
+def admit(db, user_id: int, amount) -> Admission:
+    """Decide whether a new execution of a chain costing ``amount`` may be queued.
+
+    The caller commits, then invalidates the user's principal when
+    ``reserved`` is set.
+    """
+    amount = to_money(amount or 0)
+    if not _needs_admission(amount):
+        return ADMITTED
+    if not _likely_covered(get_cached_principal(db, user_id), amount) or not reserve(db, user_id, amount):
+        return _not_admitted()
+    return Admission(ExecutionStatus.PENDING, amount)
+
+
+async def admit_async(db, user_id: int, amount, count: int = 1) -> Admission:
+    """:func:`admit` for an AsyncSession.
+
+    ``count`` executions are admitted or not as a whole, with a single
+    reservation; the returned amount is the reservation of each one.
+    """
+    amount = to_money(amount or 0)
+    if not _needs_admission(amount):
+        return ADMITTED
+    if not _likely_covered(await get_cached_principal_async(db, user_id), amount * count):
+        return _not_admitted()
+    if (await db.execute(reserve_statement(user_id, amount * count))).scalar() is None:
+        return _not_admitted()
+    return Admission(ExecutionStatus.PENDING, amount)
+
+
+def take_reservation(db, execution_log) -> Optional[Decimal]:
+    """Detach the reservation from an execution so that exactly one caller consumes or releases it"""
+    # A reservation is set once at admission, so the loaded amount is the one to take
+    reserved = execution_log.reserved_amount
+    if reserved is not None and db.execute(
+        update(ExecutionLog).where(
+            ExecutionLog.id == execution_log.id,
+            ExecutionLog.reserved_amount != None
+        ).values(reserved_amount=None).returning(ExecutionLog.id)
+    ).scalar() is None:
+        reserved = None
+    set_committed_value(execution_log, "reserved_amount", None)
+    return reserved
+
+
+def admit_parked(db, now: datetime, batch_size: int) -> list:
+    """Queue parked executions the balance now covers, oldest first, and fail expired ones.
+
+    Parked rows are walked in id order, one committed batch at a time, and
+    claimed with SKIP LOCKED so overlapping passes never admit an execution
+    twice. Once one execution of a user does not fit, the user's later
+    ones stay parked too, so they are admitted in trigger order. Returns
+    the ids of the admitted execution logs, for the caller to publish.
+    """
+    expiry = now - timedelta(seconds=settings.ADMISSION_PARK_TTL)
+    admitted = []
+    blocked = set()
+    last_id = 0
+    while True:
+        reserved_users = set()
+        parked = db.query(ExecutionLog, Chain.user_id, Chain.execution_cost).join(
+            Chain, Chain.id == ExecutionLog.chain_id
+        ).filter(
+            ExecutionLog.status == ExecutionStatus.PARKED,
+            ExecutionLog.id > last_id
+        ).order_by(ExecutionLog.id).limit(batch_size).with_for_update(of=ExecutionLog, skip_locked=True).all()
+        
+        for execution_log, user_id, execution_cost in parked:
+            if execution_log.created_at < expiry:
+                execution_log.status = ExecutionStatus.FAILED
+                execution_log.error_message = "Insufficient balance"
+                execution_log.completed_at = now
+                continue
+            if user_id in blocked:
+                continue
+            amount = to_money(execution_cost or 0)
+            if amount > 0 and not reserve(db, user_id, amount):
+                blocked.add(user_id)
+                continue
+            execution_log.status = ExecutionStatus.PENDING
+            if amount > 0:
+                execution_log.reserved_amount = amount
+                execution_log.reserved_at = now
+                reserved_users.add(user_id)
+            admitted.append(execution_log.id)
+        db.commit()
+        for user_id in reserved_users:
+            invalidate_principal(user_id)
+        
+        if len(parked) < batch_size:
+            break
+        last_id = parked[-1][0].id
+    return admitted
+
+
+def release_stale_reservations(db, now: datetime) -> set:
+    """Release reservations of executions that never finished within ADMISSION_RESERVATION_TTL.
+
+    Covers executions whose task was lost before it could charge or
+    release. If one still completes, it is charged without a reservation:
+    the reservation is taken with the same conditional UPDATE as in
+    :func:`take_reservation`, so it is never released twice.
+    Returns the ids of the users whose reservations shrank; the caller
+    commits and invalidates their principals.
+    """
+    stale = db.query(ExecutionLog.id, ExecutionLog.reserved_amount, Chain.user_id).join(
+        Chain, Chain.id == ExecutionLog.chain_id
+    ).filter(
+        ExecutionLog.reserved_amount != None,
+        ExecutionLog.reserved_at < now - timedelta(seconds=settings.ADMISSION_RESERVATION_TTL)
+    ).with_for_update(of=ExecutionLog, skip_locked=True).all()
+    
+    if not stale:
+        return set()
+    reservations = {log_id: (amount, user_id) for log_id, amount, user_id in stale}
+    taken = db.execute(
+        update(ExecutionLog).where(
+            ExecutionLog.id.in_(list(reservations)),
+            ExecutionLog.reserved_amount != None
+        ).values(reserved_amount=None).returning(ExecutionLog.id)
+    ).scalars().all()
+    
+    released = defaultdict(Decimal)
+    for log_id in taken:
+        amount, user_id = reservations[log_id]
+        released[user_id] += amount
+    for user_id, amount in released.items():
+        release(db, user_id, amount)
+    return set(released)
@@ -0,0 +1,134 @@
+from collections import defaultdict
+from datetime import datetime
+from decimal import ROUND_HALF_UP, Decimal
+from typing import Optional
+from sqlalchemy import insert, literal, select, update
+from sqlalchemy.orm import Session
+from app.models.models import Chain, ExecutionLog, Transaction, User
+
+CENT = Decimal("0.01")
+
+
+def to_money(value) -> Decimal:
+    """Round an amount to whole cents; floats go through str() to avoid binary artifacts"""
+    if not isinstance(value, Decimal):
+        value = Decimal(str(value))
+    return value.quantize(CENT, rounding=ROUND_HALF_UP)
+
+
+def _debit(user_id: int, amount: Decimal, reserved: Optional[Decimal]):
+    values = {"balance": User.balance - amount}
+    if reserved:
+        # The charge consumes the execution's reservation
+        values["reserved"] = User.reserved - reserved
+    return update(User).where(
+        User.id == user_id,
+        User.balance >= amount
+    ).values(**values).returning(User.id)
+
+
+def debit(db: Session, user_id: int, amount, reserved: Decimal = None) -> bool:
+    """Take ``amount`` off the balance if it covers it, without a ledger row; the caller commits"""
+    return db.execute(_debit(user_id, to_money(amount), reserved)).scalar() is not None
+
+
+def reserve_statement(user_id: int, amount: Decimal):
+    """UPDATE reserving ``amount`` if the balance minus outstanding reservations covers it; returns the id when it did"""
+    return update(User).where(
+        User.id == user_id,
+        User.balance >= User.reserved + amount  # Binds amount as Money, unlike balance - reserved
+    ).values(reserved=User.reserved + amount).returning(User.id)
+
+
+def reserve(db: Session, user_id: int, amount) -> bool:
+    """Hold ``amount`` of the balance for an execution that has yet to run; the caller commits"""
+    return db.execute(reserve_statement(user_id, to_money(amount))).scalar() is not None
+
+
+def release(db: Session, user_id: int, amount):
+    """Give back a reservation whose execution will not be charged; the caller commits"""
+    db.execute(update(User).where(User.id == user_id).values(reserved=User.reserved - to_money(amount)))
+
+
+def charge(db: Session, user_id: int, amount, description: str, execution_log_id: int = None,
+           reserved: Decimal = None) -> Optional[int]:
+    """Debit ``amount`` from the user's balance and record the transaction.
+
+    The balance check and the debit are one conditional UPDATE, so
+    concurrent charges of one user can neither overdraw nor lose each
+    other's updates, whatever the isolation level. On PostgreSQL the
+    ledger row is inserted by the same statement through a data-modifying
+    CTE. ``reserved`` is the execution's reservation, released by the same
+    UPDATE. Returns the transaction id, or None when the balance is
+    insufficient. The caller commits.
+    """
+    amount = to_money(amount)
+    transaction = {
+        "amount": -amount,
+        "description": description,
+        "execution_log_id": execution_log_id,
+        "created_at": datetime.utcnow()
+    }
+    
+    if db.get_bind().dialect.name == "postgresql":
+        debited = _debit(user_id, amount, reserved).cte("debit")
+        return db.execute(
+            insert(Transaction).from_select(
+                ["user_id", *transaction],
+                select(debited.c.id, *(literal(value, Transaction.__table__.c[name].type) for name, value in transaction.items()))
+            ).returning(Transaction.id)
+        ).scalar()
+    
+    if db.execute(_debit(user_id, amount, reserved)).scalar() is None:
+        return None
+    return db.execute(insert(Transaction).values(user_id=user_id, **transaction).returning(Transaction.id)).scalar()
+
+
+def credit(db: Session, user_id: int, amount) -> Decimal:
+    """Add ``amount`` to the user's balance in place and return the new balance; the caller commits"""
+    return db.execute(
+        update(User).where(User.id == user_id).values(balance=User.balance + to_money(amount)).returning(User.balance)
+    ).scalar()
+
+
+def flush_charges(db: Session, now: datetime, batch_size: int) -> int:
+    """Write ledger rows for executions charged with debit() and not yet billed.
+
+    Each batch becomes one Transaction per user and chain; its executions
+    point back to it through execution_logs.transaction_id. Rows are
+    claimed with SKIP LOCKED, so overlapping flushes never bill an
+    execution twice. Returns the number of executions billed.
+    """
+    billed = 0
+    while True:
+        unbilled = db.query(ExecutionLog.id, ExecutionLog.cost, Chain.id, Chain.user_id, Chain.name).join(
+            Chain, Chain.id == ExecutionLog.chain_id
+        ).filter(
+            ExecutionLog.charged == True,
+            ExecutionLog.transaction_id == None
+        ).order_by(ExecutionLog.id).limit(batch_size).with_for_update(of=ExecutionLog, skip_locked=True).all()
+        if not unbilled:
+            break
+        
+        groups = defaultdict(list)
+        names = {}
+        for log_id, cost, chain_id, user_id, chain_name in unbilled:
+            groups[(user_id, chain_id)].append((log_id, cost))
+            names[chain_id] = chain_name
+        
+        for (user_id, chain_id), charges in groups.items():
+            transaction_id = db.execute(insert(Transaction).values(
+                user_id=user_id,
+                amount=-sum(cost for _, cost in charges),
+                description=f"Execution of chain: {names[chain_id]} (x{len(charges)})",
+                created_at=now
+            ).returning(Transaction.id)).scalar()
+            db.execute(
+                update(ExecutionLog).where(ExecutionLog.id.in_([log_id for log_id, _ in charges])).values(transaction_id=transaction_id)
+            )
+        db.commit()
+        
+        billed += len(unbilled)
+        if len(unbilled) < batch_size:
+            break
+    return billed
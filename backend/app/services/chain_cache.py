@@ -0,0 +1,87 @@
+import os
+import threading
+from sqlalchemy import select
+from app.core.config import settings
+from app.models.models import Chain
+from app.services.invalidation import get_invalidation_bus
+from app.services.local_cache import LocalCache, RowSnapshot
+
+CHAIN_TOPIC = "chain"
+# Beyond this many chains, one flush of every cache beats a message per chain
+BULK_INVALIDATION_THRESHOLD = 100
+
+
+class CachedChain(RowSnapshot):
+    """Read-only copy of the chain columns needed to trigger and run it"""
+
+    FIELDS = ("id", "user_id", "name", "trigger_type", "trigger_config", "actions",
+              "max_parallel_actions", "is_active", "execution_cost", "updated_at")
+
+
+_cache = None
+_cache_lock = threading.Lock()
+
+
+def get_chain_cache() -> LocalCache:
+    """Return this process' chain cache, subscribed to chain invalidations"""
+    global _cache
+    with _cache_lock:
+        if _cache is None:
+            _cache = LocalCache(settings.CHAIN_CACHE_MAX_SIZE, settings.CHAIN_CACHE_TTL)
+            get_invalidation_bus().subscribe(CHAIN_TOPIC, _cache.invalidate)
+        return _cache
+
+
+def get_cached_chain(db, chain_id: int):
+    """Chain config by id, read through the cache; None if it does not exist"""
+    cache = get_chain_cache()
+    chain = cache.get(chain_id)
+    if chain is None:
+        generation = cache.generation
+        row = db.query(Chain).filter(Chain.id == chain_id).first()
+        if row is None:
+            return None
+        chain = CachedChain(row)
+        cache.put(chain_id, chain, generation)
+    return chain
+
+
+async def get_cached_chain_async(db, chain_id: int):
+    """:func:`get_cached_chain` for an AsyncSession"""
+    cache = get_chain_cache()
+    chain = cache.get(chain_id)
+    if chain is None:
+        generation = cache.generation
+        row = (await db.execute(select(Chain).where(Chain.id == chain_id))).scalar_one_or_none()
+        if row is None:
+            return None
+        chain = CachedChain(row)
+        cache.put(chain_id, chain, generation)
+    return chain
+
+
+def invalidate_chain(chain_id: int):
+    """Drop a chain from the cache of every process; call after committing the change"""
+    get_invalidation_bus().publish(CHAIN_TOPIC, chain_id)
+
+
+def invalidate_chains(chain_ids: list):
+    """:func:`invalidate_chain` for many chains at once"""
+    if len(chain_ids) > BULK_INVALIDATION_THRESHOLD:
+        get_invalidation_bus().publish(CHAIN_TOPIC, None)
+        return
+    for chain_id in chain_ids:
+        invalidate_chain(chain_id)
+
+
+def cache_stats() -> dict:
+    return {"chain_cache": _cache.stats()} if _cache is not None else {}
+
+
+def _reset_after_fork():
+    global _cache, _cache_lock
+    _cache = None
+    _cache_lock = threading.Lock()
+
+
+os.register_at_fork(after_in_child=_reset_after_fork)
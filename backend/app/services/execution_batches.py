@@ -0,0 +1,133 @@
+"""Batch triggers: many executions of one chain from one request.
+
+Trigger payloads arrive as a JSON list or as NDJSON streamed line by
+line, and are written in chunks of EXECUTION_BATCH_CHUNK_SIZE rows, one
+multi-row INSERT each. The whole batch commits once and is then
+published in Celery groups. Progress is read back per status from the
+ix_execution_logs_batch_status index.
+"""
+import json
+from datetime import datetime
+from typing import AsyncIterator
+from fastapi import HTTPException, Request, status
+from sqlalchemy import func, insert
+from sqlalchemy.ext.asyncio import AsyncSession
+from sqlalchemy.orm import Session
+from app.models.models import ExecutionBatch, ExecutionLog, ExecutionStatus
+from app.services.admission import admit_async
+from app.services.payload_store import store_payload
+
+NDJSON_TYPES = ("application/x-ndjson", "application/jsonl", "application/json-seq")
+
+
+def _payload(value, where: str):
+    if value is not None and not isinstance(value, dict):
+        raise HTTPException(
+            status_code=status.HTTP_422_UNPROCESSABLE_ENTITY,
+            detail=f"{where}: trigger data must be a JSON object or null"
+        )
+    return value
+
+
+async def read_trigger_data(request: Request) -> AsyncIterator[dict]:
+    """Yield the trigger payloads of a batch request.
+
+    NDJSON bodies are parsed as they stream in, one object per line, so
+    a large backfill is never held in memory as a whole; other bodies
+    are read as ``{"trigger_data": [...]}``.
+    """
+    if request.headers.get("content-type", "").split(";")[0].strip() in NDJSON_TYPES:
+        pending = b""
+        line_number = 0
+        async for chunk in request.stream():
+            *lines, pending = (pending + chunk).split(b"\n")
+            for line in lines:
+                line_number += 1
+                if line.strip():
+                    yield _parse_line(line, line_number)
+        if pending.strip():
+            yield _parse_line(pending, line_number + 1)
+        return
+
+    try:
+        items = json.loads(await request.body())["trigger_data"]
+    except (ValueError, KeyError, TypeError):
+        raise HTTPException(
+            status_code=status.HTTP_422_UNPROCESSABLE_ENTITY,
+            detail='Expected {"trigger_data": [...]} or an NDJSON body'
+        )
+    if not isinstance(items, list):
+        raise HTTPException(
+            status_code=status.HTTP_422_UNPROCESSABLE_ENTITY,
+            detail="trigger_data must be a list"
+        )
+    for index, value in enumerate(items):
+        yield _payload(value, f"Item {index}")
+
+
+def _parse_line(line: bytes, line_number: int):
+    try:
+        value = json.loads(line)
+    except ValueError:
+        raise HTTPException(
+            status_code=status.HTTP_422_UNPROCESSABLE_ENTITY,
+            detail=f"Line {line_number}: invalid JSON"
+        )
+    return _payload(value, f"Line {line_number}")
+
+
+async def insert_chunk(db: AsyncSession, chain, batch_id: int, payloads: list, reserved_users: set = None) -> list:
+    """Insert one chunk of a batch with a single multi-row INSERT; returns the ids of the executions to queue.
+
+    Under admission control the chunk is reserved as a whole: rejected
+    chunks fail the request with 402, parked ones wait for
+    admit_parked_executions. The owner of a reserved chunk is added to
+    ``reserved_users``, whose principals the caller invalidates once it
+    commits.
+    """
+    admission = await admit_async(db, chain.user_id, chain.execution_cost, count=len(payloads))
+    if admission.status is None:
+        raise HTTPException(
+            status_code=status.HTTP_402_PAYMENT_REQUIRED,
+            detail="Insufficient balance for the batch"
+        )
+
+    if admission.reserved is not None and reserved_users is not None:
+        reserved_users.add(chain.user_id)
+    stored = await db.run_sync(lambda session: [store_payload(session, payload) for payload in payloads])
+    now = datetime.utcnow()
+    rows = [
+        {
+            "chain_id": chain.id,
+            "batch_id": batch_id,
+            "trigger_data": trigger_data,
+            "trigger_data_ref": trigger_data_ref,
+            **admission.log_values(now)
+        }
+        for trigger_data, trigger_data_ref in stored
+    ]
+    execution_log_ids = (await db.execute(
+        insert(ExecutionLog).returning(ExecutionLog.id, sort_by_parameter_order=True),
+        rows
+    )).scalars().all()
+    return list(execution_log_ids) if admission.status == ExecutionStatus.PENDING else []
+
+
+def batch_progress(db: Session, batch: ExecutionBatch) -> dict:
+    """Aggregate status of a batch's executions"""
+    status_counts = {
+        execution_status.value: count
+        for execution_status, count in db.query(ExecutionLog.status, func.count()).filter(
+            ExecutionLog.batch_id == batch.id
+        ).group_by(ExecutionLog.status)
+    }
+    finished = status_counts.get(ExecutionStatus.SUCCESS.value, 0) + status_counts.get(ExecutionStatus.FAILED.value, 0)
+    return {
+        "id": batch.id,
+        "chain_id": batch.chain_id,
+        "total": batch.total,
+        "created_at": batch.created_at,
+        "status_counts": status_counts,
+        "finished": finished,
+        "done": finished >= batch.total
+    }
@@ -0,0 +1,135 @@
+"""Per-chain execution statistics by hour and by day.
+
+aggregate_execution_stats folds finished execution logs into
+execution_stats rows in batches: one merge per (chain, period) touched
+by the batch instead of a locked row update per execution, so a busy
+chain never serializes its executions on its stats row. Reads cost one
+index range scan over at most a window of rows, whatever the history
+size. Stats trail the executions by up to EXECUTION_STATS_INTERVAL.
+"""
+from collections import defaultdict
+from datetime import datetime, timedelta
+from decimal import Decimal
+from sqlalchemy import update
+from sqlalchemy.dialects import postgresql, sqlite
+from sqlalchemy.orm import Session
+from app.models.models import ExecutionLog, ExecutionStats, ExecutionStatus
+from app.services import histogram
+
+PERIODS = {"hour": timedelta(hours=1), "day": timedelta(days=1)}
+FINISHED = (ExecutionStatus.SUCCESS, ExecutionStatus.FAILED)
+
+
+def period_start(moment: datetime, period: str) -> datetime:
+    start = moment.replace(minute=0, second=0, microsecond=0)
+    return start.replace(hour=0) if period == "day" else start
+
+
+def _insert_missing(db: Session, keys: list):
+    """Create empty stats rows for the keys that have none, without racing a concurrent pass"""
+    dialect = db.get_bind().dialect.name
+    insert = postgresql.insert if dialect == "postgresql" else sqlite.insert
+    db.execute(insert(ExecutionStats).values([
+        {
+            "chain_id": chain_id, "period": period, "period_start": start,
+            "status_counts": {}, "total_cost": Decimal("0.00"), "duration_histogram": {}
+        }
+        for chain_id, period, start in keys
+    ]).on_conflict_do_nothing(index_elements=["chain_id", "period", "period_start"]))
+
+
+def record_batch(db: Session, batch_size: int) -> int:
+    """Count up to ``batch_size`` finished, unrecorded execution logs into execution_stats.
+
+    Logs are claimed with SKIP LOCKED and marked in the same transaction
+    as the stats update, so each execution is counted exactly once even
+    with overlapping passes. Returns the number of logs recorded.
+    """
+    logs = db.query(
+        ExecutionLog.id, ExecutionLog.chain_id, ExecutionLog.status, ExecutionLog.cost, ExecutionLog.charged,
+        ExecutionLog.started_at, ExecutionLog.completed_at, ExecutionLog.created_at
+    ).filter(
+        ExecutionLog.status.in_(FINISHED),
+        ExecutionLog.stats_recorded == False
+    ).order_by(ExecutionLog.id).limit(batch_size).with_for_update(skip_locked=True).all()
+    if not logs:
+        return 0
+
+    deltas = defaultdict(lambda: {"status_counts": defaultdict(int), "total_cost": Decimal("0.00"), "duration_histogram": {}})
+    for log in logs:
+        for period in PERIODS:
+            delta = deltas[(log.chain_id, period, period_start(log.created_at, period))]
+            delta["status_counts"][log.status.value] += 1
+            if log.charged and log.cost:
+                delta["total_cost"] += log.cost
+            if log.started_at and log.completed_at:
+                histogram.add(delta["duration_histogram"], (log.completed_at - log.started_at).total_seconds() * 1000)
+
+    keys = sorted(deltas)  # A fixed lock order keeps overlapping passes from deadlocking
+    _insert_missing(db, keys)
+    for chain_id, period, start in keys:
+        delta = deltas[(chain_id, period, start)]
+        stats = db.query(ExecutionStats).filter(
+            ExecutionStats.chain_id == chain_id,
+            ExecutionStats.period == period,
+            ExecutionStats.period_start == start
+        ).with_for_update().one()
+        # JSON columns are only written back when reassigned
+        stats.status_counts = histogram.merge(dict(stats.status_counts), delta["status_counts"])
+        stats.duration_histogram = histogram.merge(dict(stats.duration_histogram), delta["duration_histogram"])
+        stats.total_cost = stats.total_cost + delta["total_cost"]
+
+    db.execute(
+        update(ExecutionLog).where(ExecutionLog.id.in_([log.id for log in logs])).values(stats_recorded=True)
+    )
+    db.commit()
+    return len(logs)
+
+
+def aggregate(db: Session, batch_size: int) -> int:
+    """Record every finished execution not yet in execution_stats; returns the number recorded"""
+    recorded = 0
+    while True:
+        count = record_batch(db, batch_size)
+        recorded += count
+        if count < batch_size:
+            return recorded
+
+
+def stats_summary(status_counts: dict, total_cost, duration_histogram: dict) -> dict:
+    executions = sum(status_counts.values())
+    return {
+        "executions": executions,
+        "status_counts": status_counts,
+        "success_rate": round(status_counts.get(ExecutionStatus.SUCCESS.value, 0) / executions, 4) if executions else None,
+        "total_cost": total_cost,
+        "duration_p50_ms": histogram.percentile(duration_histogram, 0.50),
+        "duration_p95_ms": histogram.percentile(duration_histogram, 0.95),
+        "duration_p99_ms": histogram.percentile(duration_histogram, 0.99)
+    }
+
+
+def chain_stats(db: Session, chain_id: int, period: str, buckets: int, now: datetime) -> dict:
+    """Stats of the last ``buckets`` periods up to ``now``, per period and in total"""
+    since = period_start(now, period) - PERIODS[period] * (buckets - 1)
+    rows = db.query(ExecutionStats).filter(
+        ExecutionStats.chain_id == chain_id,
+        ExecutionStats.period == period,
+        ExecutionStats.period_start >= since
+    ).order_by(ExecutionStats.period_start.desc()).all()
+
+    status_counts, total_cost, durations = defaultdict(int), Decimal("0.00"), {}
+    for row in rows:
+        histogram.merge(status_counts, row.status_counts)
+        histogram.merge(durations, row.duration_histogram)
+        total_cost += row.total_cost
+    return {
+        "chain_id": chain_id,
+        "period": period,
+        "since": since,
+        "totals": stats_summary(dict(status_counts), total_cost, durations),
+        "buckets": [
+            {"period_start": row.period_start, **stats_summary(row.status_counts, row.total_cost, row.duration_histogram)}
+            for row in rows
+        ]
+    }
@@ -0,0 +1,38 @@
+import math
+
+# Log-spaced duration buckets: bucket i holds durations up to GROWTH ** i ms,
+# so a percentile read from the histogram is within 25% of the exact value
+GROWTH = 1.25
+MAX_BUCKET = 100  # ~4.9e9 ms; longer durations share the last bucket
+
+
+def bucket(duration_ms: float) -> int:
+    if duration_ms <= 1:
+        return 0
+    return min(MAX_BUCKET, math.ceil(math.log(duration_ms, GROWTH)))
+
+
+def add(histogram: dict, duration_ms: float, count: int = 1) -> dict:
+    """Count a duration into a JSON-compatible histogram ({bucket: count}, string keys)"""
+    key = str(bucket(duration_ms))
+    histogram[key] = histogram.get(key, 0) + count
+    return histogram
+
+
+def merge(histogram: dict, other: dict) -> dict:
+    for key, count in other.items():
+        histogram[key] = histogram.get(key, 0) + count
+    return histogram
+
+
+def percentile(histogram: dict, q: float):
+    """Upper bound in ms of the bucket holding the q-quantile; None for an empty histogram"""
+    total = sum(histogram.values())
+    if not total:
+        return None
+    rank = max(1, math.ceil(q * total))
+    seen = 0
+    for key in sorted(histogram, key=int):
+        seen += histogram[key]
+        if seen >= rank:
+            return round(GROWTH ** int(key), 1)
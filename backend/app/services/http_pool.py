@@ -0,0 +1,269 @@
+import os
+import threading
+import time
+from urllib.parse import urlsplit
+import httpx
+import requests
+from requests.adapters import HTTPAdapter
+from app.core.config import settings
+
+DEFAULT_PORTS = {"http": 80, "https": 443}
+
+
+def pool_key(url: str) -> tuple:
+    """Return the (scheme, host, port) key a URL is pooled under"""
+    parts = urlsplit(url)
+    scheme = parts.scheme.lower()
+    return scheme, (parts.hostname or "").lower(), parts.port or DEFAULT_PORTS.get(scheme)
+
+
+class _HostEntry:
+    def __init__(self, client):
+        self.client = client
+        self.requests = 0
+        self.in_flight = 0
+        self.last_used = time.monotonic()
+
+
+class HttpClientPool:
+    """Keep-alive ``requests`` sessions shared by every action in a worker process.
+
+    Each (scheme, host, port) gets its own session whose adapter holds at
+    most ``max_connections_per_host`` connections; callers beyond that block
+    until one is free. Hosts unused for ``idle_timeout`` seconds are closed.
+    """
+
+    def __init__(self, max_connections_per_host: int, idle_timeout: float):
+        self.max_connections_per_host = max_connections_per_host
+        self.idle_timeout = idle_timeout
+        self._hosts = {}
+        self._lock = threading.Lock()
+        self._evicted = 0
+
+    def _new_session(self) -> requests.Session:
+        session = requests.Session()
+        adapter = HTTPAdapter(
+            pool_connections=1,
+            pool_maxsize=self.max_connections_per_host,
+            pool_block=True
+        )
+        session.mount("http://", adapter)
+        session.mount("https://", adapter)
+        return session
+
+    def _evict_idle(self, now: float):
+        for key, entry in list(self._hosts.items()):
+            if entry.in_flight == 0 and now - entry.last_used > self.idle_timeout:
+                entry.client.close()
+                del self._hosts[key]
+                self._evicted += 1
+
+    def request(self, method: str, url: str, **kwargs) -> requests.Response:
+        """Send a request over the pooled session for the URL's host.
+
+        With ``stream=True`` the host counts as in flight, and so is not
+        evicted, until the body has been read or the response closed.
+        """
+        key = pool_key(url)
+        with self._lock:
+            now = time.monotonic()
+            self._evict_idle(now)
+            entry = self._hosts.get(key)
+            if entry is None:
+                entry = self._hosts[key] = _HostEntry(self._new_session())
+            entry.requests += 1
+            entry.in_flight += 1
+            entry.last_used = now
+
+        released = False
+
+        def release():
+            nonlocal released
+            with self._lock:
+                if not released:
+                    released = True
+                    entry.in_flight -= 1
+                    entry.last_used = time.monotonic()
+
+        try:
+            response = entry.client.request(method, url, **kwargs)
+        except BaseException:
+            release()
+            raise
+        if not kwargs.get("stream"):
+            release()
+            return response
+
+        # urllib3 releases the connection once the body is exhausted, and
+        # Response.close() releases it otherwise
+        release_conn = response.raw.release_conn
+
+        def release_on_close():
+            try:
+                release_conn()
+            finally:
+                release()
+
+        response.raw.release_conn = release_on_close
+        return response
+
+    def stats(self) -> dict:
+        """Snapshot of per-host pool usage"""
+        with self._lock:
+            hosts = {}
+            for (scheme, host, port), entry in self._hosts.items():
+                adapter = entry.client.get_adapter(f"{scheme}://")
+                pools = adapter.poolmanager.pools
+                hosts[f"{scheme}://{host}:{port}"] = {
+                    "requests": entry.requests,
+                    "in_flight": entry.in_flight,
+                    "connections_opened": sum(pools[k].num_connections for k in pools.keys()),
+                    "idle_seconds": round(time.monotonic() - entry.last_used, 1),
+                }
+            return {"hosts": hosts, "evicted": self._evicted}
+
+    def close(self):
+        with self._lock:
+            for entry in self._hosts.values():
+                entry.client.close()
+            self._hosts.clear()
+
+
+class _ReleasingStream(httpx.AsyncByteStream):
+    """Response body stream that hands its host back to the pool once closed"""
+
+    def __init__(self, stream: httpx.AsyncByteStream, release):
+        self._stream = stream
+        self._release = release
+
+    async def __aiter__(self):
+        async for chunk in self._stream:
+            yield chunk
+
+    async def aclose(self):
+        try:
+            await self._stream.aclose()
+        finally:
+            self._release()
+
+
+class AsyncHttpClientPool:
+    """Keep-alive ``httpx.AsyncClient`` per host for the asyncio engine.
+
+    Must only be used from the engine's event loop.
+    """
+
+    def __init__(self, max_connections_per_host: int, idle_timeout: float):
+        self.max_connections_per_host = max_connections_per_host
+        self.idle_timeout = idle_timeout
+        self._hosts = {}
+        self._evicted = 0
+
+    def _new_client(self) -> httpx.AsyncClient:
+        limits = httpx.Limits(
+            max_connections=self.max_connections_per_host,
+            max_keepalive_connections=self.max_connections_per_host,
+            keepalive_expiry=self.idle_timeout
+        )
+        return httpx.AsyncClient(limits=limits)
+
+    async def _evict_idle(self, now: float):
+        for key, entry in list(self._hosts.items()):
+            if entry.in_flight == 0 and now - entry.last_used > self.idle_timeout:
+                del self._hosts[key]
+                self._evicted += 1
+                await entry.client.aclose()
+
+    async def request(self, method: str, url: str, stream: bool = False, **kwargs) -> httpx.Response:
+        """Send a request over the pooled client for the URL's host.
+
+        With ``stream`` the body is left unread and the caller must close
+        the response; the host counts as in flight, and so is not evicted,
+        until it is.
+        """
+        key = pool_key(url)
+        now = time.monotonic()
+        await self._evict_idle(now)
+        entry = self._hosts.get(key)
+        if entry is None:
+            entry = self._hosts[key] = _HostEntry(self._new_client())
+        entry.requests += 1
+        entry.in_flight += 1
+        entry.last_used = now
+
+        def release():
+            entry.in_flight -= 1
+            entry.last_used = time.monotonic()
+
+        try:
+            request = entry.client.build_request(method, url, **kwargs)
+            response = await entry.client.send(request, stream=stream)
+        except BaseException:
+            release()
+            raise
+        if not stream:
+            release()
+            return response
+        response.stream = _ReleasingStream(response.stream, release)
+        return response
+
+    def stats(self) -> dict:
+        """Snapshot of per-host pool usage"""
+        hosts = {}
+        for (scheme, host, port), entry in list(self._hosts.items()):
+            hosts[f"{scheme}://{host}:{port}"] = {
+                "requests": entry.requests,
+                "in_flight": entry.in_flight,
+                "idle_seconds": round(time.monotonic() - entry.last_used, 1),
+            }
+        return {"hosts": hosts, "evicted": self._evicted}
+
+
+_http_pool = None
+_async_http_pool = None
+_pool_lock = threading.Lock()
+
+
+def get_http_pool() -> HttpClientPool:
+    """Return the worker process' blocking HTTP pool"""
+    global _http_pool
+    with _pool_lock:
+        if _http_pool is None:
+            _http_pool = HttpClientPool(
+                settings.HTTP_POOL_MAX_CONNECTIONS_PER_HOST,
+                settings.HTTP_POOL_IDLE_TIMEOUT
+            )
+        return _http_pool
+
+
+def get_async_http_pool() -> AsyncHttpClientPool:
+    """Return the worker process' asyncio HTTP pool"""
+    global _async_http_pool
+    with _pool_lock:
+        if _async_http_pool is None:
+            _async_http_pool = AsyncHttpClientPool(
+                settings.HTTP_POOL_MAX_CONNECTIONS_PER_HOST,
+                settings.HTTP_POOL_IDLE_TIMEOUT
+            )
+        return _async_http_pool
+
+
+def pool_stats() -> dict:
+    """Statistics of the HTTP pools created in this process"""
+    stats = {}
+    if _http_pool is not None:
+        stats["http"] = _http_pool.stats()
+    if _async_http_pool is not None:
+        stats["http_async"] = _async_http_pool.stats()
+    return stats
+
+
+def _reset_after_fork():
+    # Sockets inherited from the parent must not be shared with it
+    global _http_pool, _async_http_pool, _pool_lock
+    _http_pool = None
+    _async_http_pool = None
+    _pool_lock = threading.Lock()
+
+
+os.register_at_fork(after_in_child=_reset_after_fork)
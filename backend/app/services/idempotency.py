@@ -0,0 +1,105 @@
+import hashlib
+import threading
+import time
+from typing import Optional
+import redis
+import redis.asyncio
+from app.core.config import settings
+
+PENDING = "pending"
+
+
+def idempotency_key(trigger_config: dict, headers, body: bytes) -> Optional[str]:
+    """Key identifying retries of the same webhook delivery, or None.
+
+    The sender's idempotency header (per chain ``idempotency_header``, else
+    WEBHOOK_IDEMPOTENCY_HEADER) wins; without it the body hash is used when
+    the chain (``idempotency_body_hash``) or WEBHOOK_IDEMPOTENCY_BODY_HASH
+    asks for it. Keys are hashed to a fixed length.
+    """
+    header = trigger_config.get("idempotency_header") or settings.WEBHOOK_IDEMPOTENCY_HEADER
+    value = headers.get(header) if header else None
+    if value:
+        return "h:" + hashlib.sha256(value.encode()).hexdigest()
+    if trigger_config.get("idempotency_body_hash", settings.WEBHOOK_IDEMPOTENCY_BODY_HASH):
+        return "b:" + hashlib.sha256(body).hexdigest()
+    return None
+
+
+class InMemoryIdempotencyFront:
+    """Per-process stand-in for :class:`RedisIdempotencyFront` (tests, single process)"""
+
+    def __init__(self):
+        self._keys = {}
+        self._lock = threading.Lock()
+
+    async def claim(self, chain_id: int, key: str, ttl: int) -> Optional[str]:
+        now = time.monotonic()
+        with self._lock:
+            value, expires = self._keys.get((chain_id, key), (None, 0))
+            if value is not None and expires > now:
+                return value
+            self._keys[(chain_id, key)] = (PENDING, now + ttl)
+            return None
+
+    async def remember(self, chain_id: int, key: str, value: str, ttl: int):
+        with self._lock:
+            self._keys[(chain_id, key)] = (value, time.monotonic() + ttl)
+
+    async def forget(self, chain_id: int, key: str):
+        with self._lock:
+            self._keys.pop((chain_id, key), None)
+
+
+class RedisIdempotencyFront:
+    """Recently seen idempotency keys in Redis, checked before the database.
+
+    ``claim`` is a single SET NX: the first delivery of a key claims it and
+    gets None, retries get what the first one stored (``pending`` until it
+    commits). Redis errors are treated as a miss; the unique constraint on
+    execution_logs still rejects the duplicate.
+    """
+
+    def __init__(self, url: str, prefix: str = "autoforge:idempotency"):
+        self.prefix = prefix
+        self._redis = redis.asyncio.Redis.from_url(url)
+
+    def _name(self, chain_id: int, key: str) -> str:
+        return f"{self.prefix}:{chain_id}:{key}"
+
+    async def claim(self, chain_id: int, key: str, ttl: int) -> Optional[str]:
+        name = self._name(chain_id, key)
+        try:
+            if await self._redis.set(name, PENDING, nx=True, ex=ttl):
+                return None
+            value = await self._redis.get(name)
+        except redis.RedisError:
+            return None
+        return value.decode() if value is not None else None
+
+    async def remember(self, chain_id: int, key: str, value: str, ttl: int):
+        try:
+            await self._redis.set(self._name(chain_id, key), value, ex=ttl)
+        except redis.RedisError:
+            pass
+
+    async def forget(self, chain_id: int, key: str):
+        """Drop a claim whose delivery was not accepted, so the sender's retry is"""
+        try:
+            await self._redis.delete(self._name(chain_id, key))
+        except redis.RedisError:
+            pass
+
+
+_front = None
+
+
+def get_idempotency_front():
+    """This process' idempotency front (WEBHOOK_IDEMPOTENCY_FRONT), or None when disabled"""
+    global _front
+    if _front is None and settings.WEBHOOK_IDEMPOTENCY_FRONT != "none":
+        if settings.WEBHOOK_IDEMPOTENCY_FRONT == "redis":
+            _front = RedisIdempotencyFront(settings.REDIS_URL)
+        else:
+            _front = InMemoryIdempotencyFront()
+    return _front
@@ -0,0 +1,119 @@
+import json
+import os
+import threading
+import time
+import uuid
+from collections import defaultdict
+import redis
+from app.core.config import settings
+
+
+class InMemoryInvalidationBus:
+    """Deliver invalidations to subscribers in this process only.
+
+    Used in tests and single-process deployments. Subscribers are called
+    with the invalidated key, or with ``None`` when everything under the
+    topic must be dropped.
+    """
+
+    def __init__(self):
+        self._subscribers = defaultdict(list)
+        self._counters = {"published": 0, "received": 0, "publish_errors": 0, "listener_errors": 0}
+
+    def subscribe(self, topic: str, callback):
+        self._subscribers[topic].append(callback)
+
+    def publish(self, topic: str, key):
+        self._counters["published"] += 1
+        self._deliver(topic, key)
+
+    def _deliver(self, topic: str, key):
+        for callback in self._subscribers.get(topic, ()):
+            callback(key)
+
+    def _deliver_all(self):
+        for topic in list(self._subscribers):
+            self._deliver(topic, None)
+
+    def stats(self) -> dict:
+        return dict(self._counters)
+
+
+class RedisInvalidationBus(InMemoryInvalidationBus):
+    """Broadcast invalidations to every API and worker process over Redis pub/sub.
+
+    Local subscribers are notified immediately; other processes pick the
+    message up from their listener thread. Pub/sub does not replay messages
+    missed while disconnected, so a listener error drops every cached entry
+    and caches keep a TTL as the last line of defence.
+    """
+
+    def __init__(self, url: str, channel: str):
+        super().__init__()
+        self.channel = channel
+        self._origin = uuid.uuid4().hex
+        self._redis = redis.Redis.from_url(url)
+        self._listener = None
+        self._lock = threading.Lock()
+
+    def subscribe(self, topic: str, callback):
+        super().subscribe(topic, callback)
+        with self._lock:
+            if self._listener is None:
+                pubsub = self._redis.pubsub(ignore_subscribe_messages=True)
+                pubsub.subscribe(**{self.channel: self._on_message})
+                self._listener = pubsub.run_in_thread(
+                    sleep_time=1, daemon=True, exception_handler=self._on_listener_error
+                )
+
+    def publish(self, topic: str, key):
+        super().publish(topic, key)
+        message = json.dumps({"origin": self._origin, "topic": topic, "key": key})
+        try:
+            self._redis.publish(self.channel, message)
+        except redis.RedisError:
+            # Other processes fall back to their TTL for this key
+            self._counters["publish_errors"] += 1
+
+    def _on_message(self, message):
+        data = json.loads(message["data"])
+        if data["origin"] == self._origin:
+            return
+        self._counters["received"] += 1
+        self._deliver(data["topic"], data["key"])
+
+    def _on_listener_error(self, error, pubsub, thread):
+        # Messages may have been lost; the pub/sub connection resubscribes on the next read
+        self._counters["listener_errors"] += 1
+        self._deliver_all()
+        time.sleep(1)
+
+
+_bus = None
+_bus_lock = threading.Lock()
+
+
+def get_invalidation_bus() -> InMemoryInvalidationBus:
+    """Return this process' invalidation bus (CACHE_INVALIDATION_BACKEND)"""
+    global _bus
+    with _bus_lock:
+        if _bus is None:
+            if settings.CACHE_INVALIDATION_BACKEND == "redis":
+                _bus = RedisInvalidationBus(settings.REDIS_URL, settings.CACHE_INVALIDATION_CHANNEL)
+            else:
+                _bus = InMemoryInvalidationBus()
+        return _bus
+
+
+def bus_stats() -> dict:
+    return {"invalidation_bus": _bus.stats()} if _bus is not None else {}
+
+
+def _reset_after_fork():
+    # The listener thread does not survive a fork
+    global _bus, _bus_lock
+    _bus = None
+    _bus_lock = threading.Lock()
+
+
+os.register_at_fork(after_in_child=_reset_after_fork)
@@ -0,0 +1,73 @@
+import copy
+import threading
+import time
+from collections import OrderedDict
+
+
+class RowSnapshot:
+    """Read-only copy of selected columns of a database row"""
+
+    FIELDS = ()
+
+    def __init__(self, row):
+        for field in self.FIELDS:
+            setattr(self, field, copy.deepcopy(getattr(row, field)))
+
+
+class LocalCache:
+    """Per-process LRU cache with a TTL.
+
+    Entries are dropped by :meth:`invalidate` when the underlying row
+    changes; the TTL bounds staleness when an invalidation is lost. A load
+    that raced with an invalidation is not stored, so a row read before an
+    update commits cannot outlive it.
+    """
+
+    def __init__(self, max_size: int, ttl: float):
+        self.max_size = max_size
+        self.ttl = ttl
+        self._entries = OrderedDict()
+        self._generation = 0
+        self._lock = threading.Lock()
+        self._counters = {"hits": 0, "misses": 0, "evictions": 0, "invalidations": 0}
+
+    @property
+    def generation(self) -> int:
+        """Pass to :meth:`put` to discard loads overtaken by an invalidation"""
+        return self._generation
+
+    def get(self, key):
+        with self._lock:
+            entry = self._entries.get(key)
+            if entry is None or entry[1] < time.monotonic():
+                self._counters["misses"] += 1
+                return None
+            self._entries.move_to_end(key)
+            self._counters["hits"] += 1
+            return entry[0]
+
+    def put(self, key, value, generation: int):
+        if self.ttl <= 0:
+            return
+        with self._lock:
+            if generation != self._generation:
+                return
+            self._entries[key] = (value, time.monotonic() + self.ttl)
+            self._entries.move_to_end(key)
+            while len(self._entries) > self.max_size:
+                self._entries.popitem(last=False)
+                self._counters["evictions"] += 1
+
+    def invalidate(self, key=None):
+        """Drop one entry, or every entry when ``key`` is None"""
+        with self._lock:
+            self._generation += 1
+            self._counters["invalidations"] += 1
+            if key is None:
+                self._entries.clear()
+            else:
+                self._entries.pop(key, None)
+
+    def stats(self) -> dict:
+        with self._lock:
+            return {**self._counters, "size": len(self._entries)}
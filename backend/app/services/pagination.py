@@ -0,0 +1,44 @@
+import base64
+import binascii
+from datetime import datetime
+from typing import NamedTuple, Optional
+from sqlalchemy import tuple_
+
+
+class PageParams(NamedTuple):
+    after: Optional[tuple]  # (created_at, id) of the last row of the previous page
+    limit: int
+
+
+def encode_cursor(created_at: datetime, row_id: int) -> str:
+    """Opaque cursor pointing just past the given row"""
+    return base64.urlsafe_b64encode(f"{created_at.isoformat()}|{row_id}".encode()).decode().rstrip("=")
+
+
+def decode_cursor(cursor: str) -> tuple:
+    """(created_at, id) of a cursor from encode_cursor; ValueError if it is malformed"""
+    try:
+        raw = base64.urlsafe_b64decode(cursor + "=" * (-len(cursor) % 4)).decode()
+        created_at, row_id = raw.split("|")
+        return datetime.fromisoformat(created_at), int(row_id)
+    except (binascii.Error, UnicodeDecodeError, ValueError):
+        raise ValueError("Invalid cursor")
+
+
+def paginate(query, model, params: PageParams) -> dict:
+    """One page of ``query``, newest first, by keyset on (created_at, id).
+
+    Each page is a range scan starting at the cursor, so its cost does not
+    depend on how deep it is, given an index ending in (created_at, id)
+    after the query's equality filters.
+    """
+    if params.after is not None:
+        query = query.filter(tuple_(model.created_at, model.id) < params.after)
+    rows = query.order_by(model.created_at.desc(), model.id.desc()).limit(params.limit + 1).all()
+    has_more = len(rows) > params.limit
+    rows = rows[:params.limit]
+    return {
+        "items": rows,
+        "next_cursor": encode_cursor(rows[-1].created_at, rows[-1].id) if has_more else None,
+        "has_more": has_more
+    }
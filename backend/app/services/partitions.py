@@ -0,0 +1,73 @@
+from datetime import datetime
+from sqlalchemy import text
+
+PARENT = "execution_logs"
+
+
+def month_start(dt: datetime) -> datetime:
+    return datetime(dt.year, dt.month, 1)
+
+
+def add_months(month: datetime, months: int) -> datetime:
+    index = month.year * 12 + month.month - 1 + months
+    return datetime(index // 12, index % 12 + 1, 1)
+
+
+def partition_name(month: datetime) -> str:
+    return f"{PARENT}_p{month:%Y_%m}"
+
+
+def is_partitioned(db) -> bool:
+    """Whether execution_logs is a partitioned table (always False off PostgreSQL)"""
+    if db.get_bind().dialect.name != "postgresql":
+        return False
+    return db.execute(text(
+        "SELECT 1 FROM pg_partitioned_table p JOIN pg_class c ON c.oid = p.partrelid "
+        "WHERE c.relname = :parent AND pg_table_is_visible(c.oid)"
+    ), {"parent": PARENT}).first() is not None
+
+
+def monthly_partitions(db) -> dict:
+    """Attached monthly partitions of execution_logs, by month"""
+    names = db.execute(text(
+        "SELECT c.relname FROM pg_inherits i "
+        "JOIN pg_class c ON c.oid = i.inhrelid JOIN pg_class p ON p.oid = i.inhparent "
+        "WHERE p.relname = :parent AND pg_table_is_visible(p.oid)"
+    ), {"parent": PARENT}).scalars().all()
+    prefix = f"{PARENT}_p"
+    return {
+        datetime.strptime(name[len(prefix):], "%Y_%m"): name
+        for name in names if name.startswith(prefix)
+    }
+
+
+def ensure_partitions(db, now: datetime, months_ahead: int) -> list:
+    """Create the partitions of the current and next ``months_ahead`` months; returns the new ones"""
+    existing = monthly_partitions(db)
+    created = []
+    current = month_start(now)
+    for offset in range(months_ahead + 1):
+        month = add_months(current, offset)
+        if month in existing:
+            continue
+        db.execute(text(
+            f"CREATE TABLE {partition_name(month)} PARTITION OF {PARENT} "
+            f"FOR VALUES FROM ('{month:%Y-%m-%d}') TO ('{add_months(month, 1):%Y-%m-%d}')"
+        ))
+        created.append(partition_name(month))
+    return created
+
+
+def detach_partitions(db, before: datetime) -> list:
+    """Detach the partitions of months that end on or before ``before``; returns their names.
+
+    Detached partitions stay as ordinary tables, to be archived or dropped
+    separately; detaching is a catalog change and does not rewrite or
+    delete rows.
+    """
+    detached = []
+    for month, name in sorted(monthly_partitions(db).items()):
+        if add_months(month, 1) <= before:
+            db.execute(text(f"ALTER TABLE {PARENT} DETACH PARTITION {name}"))
+            detached.append(name)
+    return detached
@@ -0,0 +1,119 @@
+import asyncio
+import multiprocessing
+import os
+import threading
+from concurrent.futures import ProcessPoolExecutor
+from passlib.context import CryptContext
+from app.core.config import settings
+
+_contexts = {}
+
+
+def _context(rounds: int) -> CryptContext:
+    if rounds not in _contexts:
+        _contexts[rounds] = CryptContext(schemes=["bcrypt"], deprecated="auto", bcrypt__rounds=rounds)
+    return _contexts[rounds]
+
+
+def _hash(password: str, rounds: int) -> str:
+    return _context(rounds).hash(password)
+
+
+def _verify_and_update(password: str, hashed_password: str, rounds: int) -> tuple:
+    return _context(rounds).verify_and_update(password, hashed_password)
+
+
+class HasherBusy(Exception):
+    """Raised when no hashing slot frees up within the queue timeout"""
+
+
+class PasswordHasher:
+    """bcrypt on a dedicated process pool, off the request threadpool.
+
+    At most ``max_pending`` operations run or wait for a worker per API
+    process; callers beyond that wait up to ``queue_timeout`` seconds for a
+    slot and then get :class:`HasherBusy`, so a login storm is shed instead
+    of queueing without bound.
+    """
+
+    def __init__(self, workers: int, max_pending: int, queue_timeout: float, rounds: int):
+        self.workers = workers
+        self.max_pending = max_pending
+        self.queue_timeout = queue_timeout
+        self.rounds = rounds
+        self._executor = None
+        self._slots = None
+        self._slots_loop = None
+        self._lock = threading.Lock()
+        self._counters = {"hashed": 0, "verified": 0, "rehashed": 0, "rejected_busy": 0}
+
+    def _get_executor(self) -> ProcessPoolExecutor:
+        with self._lock:
+            if self._executor is None:
+                # Spawned workers do not inherit the API process' threads and sockets
+                self._executor = ProcessPoolExecutor(
+                    max_workers=self.workers, mp_context=multiprocessing.get_context("spawn")
+                )
+            return self._executor
+
+    async def _run(self, fn, *args):
+        loop = asyncio.get_running_loop()
+        if self._slots_loop is not loop:
+            # The semaphore binds to one event loop
+            self._slots = asyncio.Semaphore(self.max_pending)
+            self._slots_loop = loop
+        try:
+            await asyncio.wait_for(self._slots.acquire(), self.queue_timeout)
+        except asyncio.TimeoutError:
+            self._counters["rejected_busy"] += 1
+            raise HasherBusy()
+        try:
+            return await asyncio.wrap_future(self._get_executor().submit(fn, *args))
+        finally:
+            self._slots.release()
+
+    async def hash(self, password: str) -> str:
+        self._counters["hashed"] += 1
+        return await self._run(_hash, password, self.rounds)
+
+    async def verify_and_update(self, password: str, hashed_password: str) -> tuple:
+        """(password matches, new hash when the stored one uses outdated parameters, else None)"""
+        self._counters["verified"] += 1
+        valid, new_hash = await self._run(_verify_and_update, password, hashed_password, self.rounds)
+        if new_hash:
+            self._counters["rehashed"] += 1
+        return valid, new_hash
+
+    def stats(self) -> dict:
+        return dict(self._counters)
+
+    def shutdown(self):
+        with self._lock:
+            if self._executor is not None:
+                self._executor.shutdown(wait=False, cancel_futures=True)
+                self._executor = None
+
+
+_hasher = None
+
+
+def get_password_hasher() -> PasswordHasher:
+    """Return this process' password hasher"""
+    global _hasher
+    if _hasher is None:
+        _hasher = PasswordHasher(
+            workers=settings.PASSWORD_HASH_WORKERS,
+            max_pending=settings.PASSWORD_HASH_MAX_PENDING,
+            queue_timeout=settings.PASSWORD_HASH_QUEUE_TIMEOUT,
+            rounds=settings.PASSWORD_BCRYPT_ROUNDS
+        )
+    return _hasher
+
+
+def _reset_after_fork():
+    # Pool workers belong to the parent
+    global _hasher
+    _hasher = None
+
+
+os.register_at_fork(after_in_child=_reset_after_fork)
@@ -0,0 +1,111 @@
+import gzip
+import json
+import os
+import uuid
+from sqlalchemy.orm import Session
+from app.core.config import settings
+from app.models.models import PayloadBlob
+
+try:
+    import zstandard
+except ImportError:  # zstd is optional, gzip is always available
+    zstandard = None
+
+EXTENSIONS = {"zstd": "zst", "gzip": "gz"}
+
+
+def _codec() -> str:
+    if settings.PAYLOAD_COMPRESSION == "zstd" and zstandard is not None:
+        return "zstd"
+    return "gzip"
+
+
+def compress(data: bytes, codec: str) -> bytes:
+    if codec == "zstd":
+        return zstandard.ZstdCompressor().compress(data)
+    return gzip.compress(data)
+
+
+def decompress(data: bytes, codec: str) -> bytes:
+    if codec == "zstd":
+        if zstandard is None:
+            raise RuntimeError("zstandard is required to read zstd payloads")
+        return zstandard.ZstdDecompressor().decompress(data)
+    return gzip.decompress(data)
+
+
+def store_payload(db: Session, value) -> tuple:
+    """Split a JSON payload into (inline value, store reference).
+
+    Payloads up to PAYLOAD_INLINE_MAX_BYTES stay inline; larger ones are
+    compressed into the configured store and only the reference is kept.
+    """
+    if value is None:
+        return None, None
+
+    raw = json.dumps(value, separators=(",", ":")).encode()
+    if len(raw) <= settings.PAYLOAD_INLINE_MAX_BYTES:
+        return value, None
+
+    codec = _codec()
+    data = compress(raw, codec)
+
+    if settings.PAYLOAD_STORE_BACKEND == "filesystem":
+        name = uuid.uuid4().hex
+        relative = os.path.join(name[:2], f"{name}.json.{EXTENSIONS[codec]}")
+        path = os.path.join(settings.PAYLOAD_STORE_PATH, relative)
+        os.makedirs(os.path.dirname(path), exist_ok=True)
+        with open(path + ".tmp", "wb") as f:
+            f.write(data)
+        os.replace(path + ".tmp", path)
+        return None, f"fs:{relative}"
+
+    blob = PayloadBlob(codec=codec, size=len(raw), data=data)
+    db.add(blob)
+    db.flush()
+    return None, f"db:{blob.id}"
+
+
+def load_payload(db: Session, inline, ref: str):
+    """Return a payload stored by :func:`store_payload`"""
+    if not ref:
+        return inline
+
+    backend, _, key = ref.partition(":")
+    if backend == "fs":
+        codec = "zstd" if key.endswith(".zst") else "gzip"
+        with open(os.path.join(settings.PAYLOAD_STORE_PATH, key), "rb") as f:
+            data = f.read()
+    else:
+        blob = db.query(PayloadBlob).filter(PayloadBlob.id == int(key)).first()
+        if not blob:
+            return None
+        codec, data = blob.codec, blob.data
+
+    return json.loads(decompress(data, codec))
+
+
+def delete_payloads(db: Session, refs: list):
+    """Remove stored payloads, e.g. when their execution logs are deleted"""
+    blob_ids = []
+    for ref in refs:
+        if not ref:
+            continue
+        backend, _, key = ref.partition(":")
+        if backend == "fs":
+            try:
+                os.remove(os.path.join(settings.PAYLOAD_STORE_PATH, key))
+            except FileNotFoundError:
+                pass
+        else:
+            blob_ids.append(int(key))
+    if blob_ids:
+        db.query(PayloadBlob).filter(PayloadBlob.id.in_(blob_ids)).delete(synchronize_session=False)
+
+
+def set_trigger_data(db: Session, execution_log, value):
+    execution_log.trigger_data, execution_log.trigger_data_ref = store_payload(db, value)
+
+
+def set_execution_result(db: Session, execution_log, value):
+    execution_log.execution_result, execution_log.execution_result_ref = store_payload(db, value)
@@ -0,0 +1,76 @@
+import os
+import threading
+from sqlalchemy import select
+from app.core.config import settings
+from app.models.models import User
+from app.services.invalidation import get_invalidation_bus
+from app.services.local_cache import LocalCache, RowSnapshot
+
+PRINCIPAL_TOPIC = "principal"
+
+
+class CachedPrincipal(RowSnapshot):
+    """Read-only copy of the authenticated user's row"""
+
+    FIELDS = ("id", "email", "balance", "reserved", "is_active", "created_at")
+
+
+_cache = None
+_cache_lock = threading.Lock()
+
+
+def get_principal_cache() -> LocalCache:
+    """Return this process' principal cache, subscribed to principal invalidations"""
+    global _cache
+    with _cache_lock:
+        if _cache is None:
+            _cache = LocalCache(settings.PRINCIPAL_CACHE_MAX_SIZE, settings.PRINCIPAL_CACHE_TTL)
+            get_invalidation_bus().subscribe(PRINCIPAL_TOPIC, _cache.invalidate)
+        return _cache
+
+
+def get_cached_principal(db, user_id: int):
+    """User by id, read through the principal cache; None if it does not exist"""
+    cache = get_principal_cache()
+    principal = cache.get(user_id)
+    if principal is None:
+        generation = cache.generation
+        user = db.query(User).filter(User.id == user_id).first()
+        if user is None:
+            return None
+        principal = CachedPrincipal(user)
+        cache.put(user_id, principal, generation)
+    return principal
+
+
+async def get_cached_principal_async(db, user_id: int):
+    """:func:`get_cached_principal` for an AsyncSession"""
+    cache = get_principal_cache()
+    principal = cache.get(user_id)
+    if principal is None:
+        generation = cache.generation
+        user = (await db.execute(select(User).where(User.id == user_id))).scalar_one_or_none()
+        if user is None:
+            return None
+        principal = CachedPrincipal(user)
+        cache.put(user_id, principal, generation)
+    return principal
+
+
+def invalidate_principal(user_id: int):
+    """Drop a user from the principal cache of every process; call after committing
+    a change to its balance, released reservations or is_active"""
+    get_invalidation_bus().publish(PRINCIPAL_TOPIC, user_id)
+
+
+def cache_stats() -> dict:
+    return {"principal_cache": _cache.stats()} if _cache is not None else {}
+
+
+def _reset_after_fork():
+    global _cache, _cache_lock
+    _cache = None
+    _cache_lock = threading.Lock()
+
+
+os.register_at_fork(after_in_child=_reset_after_fork)
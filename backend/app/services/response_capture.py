@@ -0,0 +1,108 @@
+import json
+import re
+from app.core.config import settings
+
+_PATH_TOKEN = re.compile(r"\.([A-Za-z_][\w-]*)|\[(\d+|\*)\]|\[['\"]([^'\"]+)['\"]\]")
+_MISSING = object()
+
+# Bytes pulled from the socket per read while capturing a response
+CHUNK_SIZE = 16384
+
+
+def parse_json_path(path: str) -> list:
+    """Split a JSON path such as ``$.data.items[0].id`` into keys and indices"""
+    if not path.startswith("$"):
+        path = "$." + path
+    tokens = []
+    position = 1
+    while position < len(path):
+        match = _PATH_TOKEN.match(path, position)
+        if not match:
+            raise ValueError(f"Invalid JSON path: {path}")
+        name, index, quoted = match.groups()
+        if index is not None:
+            tokens.append("*" if index == "*" else int(index))
+        else:
+            tokens.append(name if name is not None else quoted)
+        position = match.end()
+    return tokens
+
+
+def _resolve(value, tokens: list):
+    if not tokens:
+        return value
+    token, rest = tokens[0], tokens[1:]
+    if token == "*" and isinstance(value, list):
+        matches = [_resolve(item, rest) for item in value]
+        return [item for item in matches if item is not _MISSING]
+    if isinstance(token, int) and isinstance(value, list):
+        return _resolve(value[token], rest) if token < len(value) else _MISSING
+    if isinstance(token, str) and isinstance(value, dict) and token in value:
+        return _resolve(value[token], rest)
+    return _MISSING
+
+
+def extract_fields(document, paths: dict) -> dict:
+    """Pick the configured fields out of a parsed JSON document.
+
+    ``paths`` maps output names to JSON paths; fields that are not present
+    in the document come back as None. A list of paths uses each path as
+    its own name.
+    """
+    if isinstance(paths, list):
+        paths = {path: path for path in paths}
+    extracted = {}
+    for name, path in paths.items():
+        value = _resolve(document, parse_json_path(path))
+        extracted[name] = None if value is _MISSING else value
+    return extracted
+
+
+def capture_limit(config: dict) -> int:
+    """Number of response bytes an HTTP action may read"""
+    if "max_response_bytes" in config:
+        return int(config["max_response_bytes"])
+    if config.get("extract"):
+        return settings.HTTP_EXTRACT_MAX_BYTES
+    return settings.HTTP_RESPONSE_CAPTURE_BYTES
+
+
+def read_capped(chunks, limit: int) -> tuple:
+    """Read chunks until ``limit`` bytes; returns (body, truncated)"""
+    buffer = bytearray()
+    for chunk in chunks:
+        buffer += chunk
+        if len(buffer) > limit:
+            return bytes(buffer[:limit]), True
+    return bytes(buffer), False
+
+
+async def read_capped_async(chunks, limit: int) -> tuple:
+    """Async counterpart of :func:`read_capped`"""
+    buffer = bytearray()
+    async for chunk in chunks:
+        buffer += chunk
+        if len(buffer) > limit:
+            return bytes(buffer[:limit]), True
+    return bytes(buffer), False
+
+
+def http_action_result(status_code: int, body: bytes, truncated: bool, encoding: str, config: dict) -> dict:
+    """Build the result of an HTTP action from its captured body"""
+    result = {"status_code": status_code}
+
+    paths = config.get("extract")
+    if paths:
+        if truncated:
+            result["extract_error"] = f"Response exceeded {len(body)} bytes"
+        else:
+            try:
+                result["extracted"] = extract_fields(json.loads(body.decode(encoding or "utf-8")), paths)
+            except ValueError as e:
+                result["extract_error"] = f"Could not extract fields: {e}"
+    else:
+        result["response"] = body.decode(encoding or "utf-8", errors="replace")
+
+    result["truncated"] = truncated
+    result["success"] = status_code < 400
+    return result
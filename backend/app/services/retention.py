@@ -0,0 +1,178 @@
+import gzip
+import json
+import os
+from collections import defaultdict
+from datetime import date, datetime, timedelta
+from sqlalchemy import or_
+from sqlalchemy.orm import Session
+from app.core.config import settings
+from app.models.models import Chain, ExecutionDailyRollup, ExecutionLog, ExecutionStatus, Transaction, User
+from app.services import histogram
+from app.services.payload_store import delete_payloads, load_payload
+
+
+def retention_policies() -> dict:
+    """{plan: days} parsed from EXECUTION_LOG_RETENTION_DAYS"""
+    policies = {}
+    for item in settings.EXECUTION_LOG_RETENTION_DAYS.split(","):
+        plan, _, days = item.strip().partition(":")
+        if plan:
+            policies[plan] = int(days)
+    return policies
+
+
+def archive_path(chain_id: int, day: date) -> str:
+    return os.path.join(settings.EXECUTION_LOG_ARCHIVE_PATH, f"chain_{chain_id}", f"{day.isoformat()}.jsonl.gz")
+
+
+def _isoformat(value):
+    return value.isoformat() if value else None
+
+
+def archive_record(db: Session, log: ExecutionLog) -> dict:
+    """An execution log as one archive line, with offloaded payloads inlined"""
+    return {
+        "id": log.id,
+        "chain_id": log.chain_id,
+        "status": log.status.value if log.status else None,
+        "trigger_data": load_payload(db, log.trigger_data, log.trigger_data_ref),
+        "execution_result": load_payload(db, log.execution_result, log.execution_result_ref),
+        "error_message": log.error_message,
+        "cost": float(log.cost) if log.cost is not None else None,
+        "charged": log.charged,
+        "started_at": _isoformat(log.started_at),
+        "completed_at": _isoformat(log.completed_at),
+        "created_at": _isoformat(log.created_at)
+    }
+
+
+def write_archive(path: str, records: list):
+    """Append records to a gzipped JSONL archive as one new gzip member"""
+    os.makedirs(os.path.dirname(path), exist_ok=True)
+    lines = "".join(json.dumps(record, separators=(",", ":")) + "\n" for record in records)
+    with open(path, "ab") as f:
+        f.write(gzip.compress(lines.encode()))
+        f.flush()
+        os.fsync(f.fileno())
+
+
+def add_to_rollup(db: Session, chain_id: int, day: date, logs: list):
+    rollup = db.query(ExecutionDailyRollup).filter(
+        ExecutionDailyRollup.chain_id == chain_id,
+        ExecutionDailyRollup.day == day
+    ).with_for_update().first()
+    if rollup is None:
+        rollup = ExecutionDailyRollup(
+            chain_id=chain_id, day=day, status_counts={}, total_cost=0, duration_histogram={}, archived_rows=0
+        )
+        db.add(rollup)
+    
+    status_counts = dict(rollup.status_counts)
+    durations = dict(rollup.duration_histogram)
+    for log in logs:
+        status = log.status.value if log.status else "unknown"
+        status_counts[status] = status_counts.get(status, 0) + 1
+        if log.started_at and log.completed_at:
+            histogram.add(durations, (log.completed_at - log.started_at).total_seconds() * 1000)
+    
+    # JSON columns are only written back when reassigned
+    rollup.status_counts = status_counts
+    rollup.duration_histogram = durations
+    rollup.total_cost = (rollup.total_cost or 0) + sum(log.cost or 0 for log in logs if log.charged)
+    rollup.archived_rows += len(logs)
+
+
+def archive_batch(db: Session, plan_filter, cutoff: datetime, batch_size: int) -> int:
+    """Roll up, archive and delete up to ``batch_size`` logs created before ``cutoff``.
+
+    The archive files are fsynced before the rollup and the deletes commit,
+    so a crash in between can leave the batch archived twice but never
+    lost; read_archive skips repeated ids.
+    """
+    logs = db.query(ExecutionLog).join(Chain).join(User).filter(
+        plan_filter,
+        ExecutionLog.created_at < cutoff,
+        # Pending, parked and running executions, and any still holding a
+        # reservation, stay: deleting them would leak users.reserved
+        ExecutionLog.status.in_([ExecutionStatus.SUCCESS, ExecutionStatus.FAILED]),
+        ExecutionLog.reserved_amount.is_(None),
+        # Charges still waiting for the billing flush stay until billed
+        or_(ExecutionLog.charged.isnot(True), ExecutionLog.transaction_id.isnot(None)),
+        # Finished executions stay until counted into execution_stats
+        ExecutionLog.stats_recorded == True
+    ).order_by(ExecutionLog.id).limit(batch_size).all()
+    if not logs:
+        return 0
+    
+    by_day = defaultdict(list)
+    for log in logs:
+        by_day[(log.chain_id, log.created_at.date())].append(log)
+    for (chain_id, day), day_logs in by_day.items():
+        write_archive(archive_path(chain_id, day), [archive_record(db, log) for log in day_logs])
+        add_to_rollup(db, chain_id, day, day_logs)
+    
+    ids = [log.id for log in logs]
+    # Ledger rows outlive the logs they were charged for
+    db.query(Transaction).filter(Transaction.execution_log_id.in_(ids)).update(
+        {Transaction.execution_log_id: None}, synchronize_session=False
+    )
+    delete_payloads(db, [ref for log in logs for ref in (log.trigger_data_ref, log.execution_result_ref)])
+    db.query(ExecutionLog).filter(ExecutionLog.id.in_(ids)).delete(synchronize_session=False)
+    db.commit()
+    return len(logs)
+
+
+def expire_execution_logs(db: Session, now: datetime, batch_size: int) -> dict:
+    """Archive the logs past the retention of their owner's plan; returns the count per plan"""
+    policies = retention_policies()
+    targets = [(plan, User.plan == plan, days) for plan, days in policies.items()]
+    targets.append(("default", User.plan.notin_(list(policies)), settings.EXECUTION_LOG_RETENTION_DEFAULT_DAYS))
+    
+    archived = {}
+    for plan, plan_filter, days in targets:
+        if days <= 0:  # Kept forever
+            continue
+        cutoff = now - timedelta(days=days)
+        archived[plan] = 0
+        while True:
+            count = archive_batch(db, plan_filter, cutoff, batch_size)
+            archived[plan] += count
+            if count < batch_size:
+                break
+    return archived
+
+
+def read_archive(chain_id: int, day: date, status: str = None, offset: int = 0, limit: int = 100):
+    """Archived execution records of a chain and day; None when there is no archive"""
+    path = archive_path(chain_id, day)
+    if not os.path.exists(path):
+        return None
+    
+    records = []
+    seen = set()
+    skipped = 0
+    with gzip.open(path, "rt") as f:
+        for line in f:
+            record = json.loads(line)
+            if record["id"] in seen or (status and record["status"] != status):
+                continue
+            seen.add(record["id"])
+            if skipped < offset:
+                skipped += 1
+                continue
+            records.append(record)
+            if len(records) >= limit:
+                break
+    return records
+
+
+def rollup_summary(rollup: ExecutionDailyRollup) -> dict:
+    return {
+        "day": rollup.day,
+        "status_counts": rollup.status_counts,
+        "total_cost": rollup.total_cost,
+        "archived_rows": rollup.archived_rows,
+        "duration_p50_ms": histogram.percentile(rollup.duration_histogram, 0.50),
+        "duration_p95_ms": histogram.percentile(rollup.duration_histogram, 0.95),
+        "duration_p99_ms": histogram.percentile(rollup.duration_histogram, 0.99)
+    }
@@ -0,0 +1,119 @@
+from datetime import datetime, timedelta
+
+MACROS = {
+    "@yearly": "0 0 1 1 *",
+    "@annually": "0 0 1 1 *",
+    "@monthly": "0 0 1 * *",
+    "@weekly": "0 0 * * 0",
+    "@daily": "0 0 * * *",
+    "@midnight": "0 0 * * *",
+    "@hourly": "0 * * * *",
+}
+MONTH_NAMES = {name: i for i, name in enumerate(
+    ["jan", "feb", "mar", "apr", "may", "jun", "jul", "aug", "sep", "oct", "nov", "dec"], start=1)}
+DAY_NAMES = {name: i for i, name in enumerate(["sun", "mon", "tue", "wed", "thu", "fri", "sat"])}
+
+# (low, high, names) for minute, hour, day of month, month, day of week
+FIELDS = [(0, 59, {}), (0, 23, {}), (1, 31, {}), (1, 12, MONTH_NAMES), (0, 7, DAY_NAMES)]
+
+# Give up on expressions that never match, such as "0 0 30 2 *"
+MAX_SEARCH_YEARS = 5
+
+
+def _parse_value(value: str, names: dict) -> int:
+    value = value.lower()
+    if value in names:
+        return names[value]
+    if not value.isdigit():
+        raise ValueError(f"Invalid cron value: {value}")
+    return int(value)
+
+
+def _parse_field(field: str, low: int, high: int, names: dict) -> set:
+    values = set()
+    for part in field.split(","):
+        expr, _, step = part.partition("/")
+        step = int(step) if step else 1
+        if step < 1:
+            raise ValueError(f"Invalid cron step: {part}")
+        if expr == "*":
+            start, end = low, high
+        elif "-" in expr:
+            start, end = (_parse_value(v, names) for v in expr.split("-", 1))
+        else:
+            start = _parse_value(expr, names)
+            end = high if step > 1 else start
+        if not low <= start <= end <= high:
+            raise ValueError(f"Cron field out of range: {part}")
+        values.update(range(start, end + 1, step))
+    return values
+
+
+class CronSchedule:
+    """Standard five-field cron expression evaluated in UTC"""
+
+    def __init__(self, expression: str):
+        expression = MACROS.get(expression.strip().lower(), expression)
+        fields = expression.split()
+        if len(fields) != 5:
+            raise ValueError(f"Cron expression must have 5 fields: {expression}")
+
+        parsed = [_parse_field(f, low, high, names) for f, (low, high, names) in zip(fields, FIELDS)]
+        self.minutes, self.hours, self.days, self.months, weekdays = parsed
+        self.weekdays = {day % 7 for day in weekdays}  # 7 is Sunday as well
+        self.days_restricted = fields[2] != "*"
+        self.weekdays_restricted = fields[4] != "*"
+
+    def _day_matches(self, dt: datetime) -> bool:
+        day_ok = dt.day in self.days
+        weekday_ok = (dt.weekday() + 1) % 7 in self.weekdays
+        # Like cron, a restricted day of month and day of week match either
+        if self.days_restricted and self.weekdays_restricted:
+            return day_ok or weekday_ok
+        return day_ok and weekday_ok
+
+    def next_after(self, after: datetime) -> datetime:
+        """First matching minute strictly after ``after``"""
+        dt = after.replace(second=0, microsecond=0) + timedelta(minutes=1)
+        limit = dt + timedelta(days=366 * MAX_SEARCH_YEARS)
+
+        while dt < limit:
+            if dt.month not in self.months:
+                year, month = (dt.year + 1, 1) if dt.month == 12 else (dt.year, dt.month + 1)
+                dt = dt.replace(year=year, month=month, day=1, hour=0, minute=0)
+                continue
+            if not self._day_matches(dt):
+                dt = (dt + timedelta(days=1)).replace(hour=0, minute=0)
+                continue
+            if dt.hour not in self.hours:
+                dt = (dt + timedelta(hours=1)).replace(minute=0)
+                continue
+            if dt.minute not in self.minutes:
+                dt += timedelta(minutes=1)
+                continue
+            return dt
+
+        raise ValueError("Cron expression never matches")
+
+
+def next_run_at(trigger_config: dict, after: datetime) -> datetime:
+    """Next time a schedule chain is due after ``after``.
+
+    ``trigger_config`` holds either a ``cron`` expression or an
+    ``interval_minutes`` period (60 when neither is given).
+    """
+    if trigger_config.get("cron"):
+        return CronSchedule(trigger_config["cron"]).next_after(after)
+
+    interval = trigger_config.get("interval_minutes", 60)
+    if not isinstance(interval, (int, float)) or isinstance(interval, bool) or interval <= 0:
+        raise ValueError("interval_minutes must be a positive number")
+    return after + timedelta(minutes=interval)
+
+
+def first_run_at(trigger_config: dict, now: datetime) -> datetime:
+    """When a newly scheduled chain first runs: interval chains start right away"""
+    if trigger_config.get("cron"):
+        return next_run_at(trigger_config, now)
+    next_run_at(trigger_config, now)  # Validate the interval
+    return now
@@ -0,0 +1,434 @@
+import asyncio
+import os
+import smtplib
+import threading
+import time
+from collections import deque
+import aiosmtplib
+from app.core.config import settings
+
+# Errors after which a session is considered dead and is replaced
+DISCONNECT_ERRORS = (smtplib.SMTPServerDisconnected, aiosmtplib.SMTPServerDisconnected, ConnectionError, TimeoutError)
+
+
+class _Session:
+    def __init__(self, client):
+        self.client = client
+        self.messages = 0
+        self.closed = False
+        self.last_used = time.monotonic()
+
+
+class _Queued:
+    def __init__(self, message, done):
+        self.message = message
+        self.done = done
+        self.error = None
+
+
+class _SMTPPoolBase:
+    """Settings and bookkeeping shared by the blocking and asyncio pools"""
+
+    def __init__(
+        self,
+        host: str,
+        port: int,
+        username: str = "",
+        password: str = "",
+        max_size: int = 4,
+        max_messages: int = 100,
+        idle_timeout: float = 60,
+        noop_after: float = 10,
+        pipeline: bool = False,
+        pipeline_max_batch: int = 20,
+        timeout: float = 30
+    ):
+        self.host = host
+        self.port = port
+        self.username = username
+        self.password = password
+        self.max_size = max_size
+        self.max_messages = max_messages
+        self.idle_timeout = idle_timeout
+        self.noop_after = noop_after
+        self.pipeline = pipeline
+        self.pipeline_max_batch = pipeline_max_batch
+        self.timeout = timeout
+        self._idle = []
+        self._queue = deque()
+        self._draining = 0
+        self._counters = {
+            "connections_opened": 0,
+            "connections_closed": 0,
+            "messages_sent": 0,
+            "noop_checks": 0,
+            "reconnects": 0,
+        }
+
+    @property
+    def use_login(self) -> bool:
+        return bool(self.username and self.password)
+
+    def _expired(self, session: _Session, now: float) -> bool:
+        return session.messages >= self.max_messages or now - session.last_used > self.idle_timeout
+
+    def _take_batch(self) -> list:
+        batch = []
+        while self._queue and len(batch) < self.pipeline_max_batch:
+            batch.append(self._queue.popleft())
+        return batch
+
+    def stats(self) -> dict:
+        """Snapshot of pool usage"""
+        return {
+            **self._counters,
+            "idle_sessions": len(self._idle),
+            "queued_messages": len(self._queue),
+        }
+
+
+class SMTPPool(_SMTPPoolBase):
+    """Authenticated ``smtplib`` sessions reused across send_email actions.
+
+    Sessions idle for longer than ``noop_after`` seconds are checked with
+    NOOP before reuse, retired after ``max_messages`` messages or
+    ``idle_timeout`` seconds idle, and replaced once if the relay drops the
+    connection mid-send. With ``pipeline`` enabled, concurrent senders queue
+    their messages and whoever holds a session sends the queue back to back.
+    """
+
+    def __init__(self, *args, **kwargs):
+        super().__init__(*args, **kwargs)
+        self._lock = threading.Lock()
+        self._slots = threading.BoundedSemaphore(self.max_size)
+
+    def _connect(self) -> _Session:
+        client = smtplib.SMTP(self.host, self.port, timeout=self.timeout)
+        try:
+            client.starttls()
+            if self.use_login:
+                client.login(self.username, self.password)
+        except Exception:
+            client.close()
+            raise
+        self._counters["connections_opened"] += 1
+        return _Session(client)
+
+    def _close(self, session: _Session):
+        if session.closed:
+            return
+        session.closed = True
+        self._counters["connections_closed"] += 1
+        try:
+            session.client.quit()
+        except Exception:
+            session.client.close()
+
+    def _usable(self, session: _Session) -> bool:
+        now = time.monotonic()
+        if self._expired(session, now):
+            return False
+        if now - session.last_used <= self.noop_after:
+            return True
+        self._counters["noop_checks"] += 1
+        try:
+            return session.client.noop()[0] == 250
+        except Exception:
+            return False
+
+    def _checkout(self) -> _Session:
+        self._slots.acquire()
+        try:
+            while True:
+                with self._lock:
+                    session = self._idle.pop() if self._idle else None
+                if session is None:
+                    return self._connect()
+                if self._usable(session):
+                    return session
+                self._close(session)
+        except Exception:
+            self._slots.release()
+            raise
+
+    def _checkin(self, session: _Session):
+        now = time.monotonic()
+        stale = []
+        with self._lock:
+            if not session.closed and session.messages < self.max_messages:
+                session.last_used = now
+                self._idle.append(session)
+            else:
+                stale.append(session)
+            for idle in list(self._idle):
+                if self._expired(idle, now):
+                    self._idle.remove(idle)
+                    stale.append(idle)
+        for idle in stale:
+            self._close(idle)
+        self._slots.release()
+
+    def _send_one(self, session: _Session, message) -> _Session:
+        if session.closed or session.messages >= self.max_messages:
+            self._close(session)
+            session = self._connect()
+        try:
+            session.client.send_message(message)
+        except DISCONNECT_ERRORS:
+            self._close(session)
+            self._counters["reconnects"] += 1
+            session = self._connect()
+            session.client.send_message(message)
+        session.messages += 1
+        self._counters["messages_sent"] += 1
+        return session
+
+    def send_many(self, messages: list) -> list:
+        """Send messages over one session; returns an error or None per message"""
+        errors = []
+        session = self._checkout()
+        try:
+            for message in messages:
+                try:
+                    session = self._send_one(session, message)
+                    errors.append(None)
+                except Exception as e:
+                    errors.append(e)
+        finally:
+            self._checkin(session)
+        return errors
+
+    def send(self, message):
+        """Send a single message, raising on failure"""
+        if not self.pipeline:
+            error = self.send_many([message])[0]
+        else:
+            error = self._send_pipelined(message)
+        if error is not None:
+            raise error
+
+    def _send_pipelined(self, message):
+        item = _Queued(message, threading.Event())
+        with self._lock:
+            self._queue.append(item)
+            drain = self._draining < self.max_size
+            if drain:
+                self._draining += 1
+
+        if drain:
+            while True:
+                with self._lock:
+                    batch = self._take_batch()
+                    if not batch:
+                        self._draining -= 1
+                        break
+                try:
+                    errors = self.send_many([queued.message for queued in batch])
+                except Exception as e:
+                    errors = [e] * len(batch)
+                for queued, error in zip(batch, errors):
+                    queued.error = error
+                    queued.done.set()
+
+        item.done.wait()
+        return item.error
+
+    def close(self):
+        with self._lock:
+            sessions, self._idle = self._idle, []
+        for session in sessions:
+            self._close(session)
+
+
+class AsyncSMTPPool(_SMTPPoolBase):
+    """``aiosmtplib`` counterpart of :class:`SMTPPool` for the asyncio engine.
+
+    Must only be used from the engine's event loop.
+    """
+
+    def __init__(self, *args, **kwargs):
+        super().__init__(*args, **kwargs)
+        self._slots = None
+
+    async def _connect(self) -> _Session:
+        client = aiosmtplib.SMTP(hostname=self.host, port=self.port, start_tls=True, timeout=self.timeout)
+        await client.connect()
+        try:
+            if self.use_login:
+                await client.login(self.username, self.password)
+        except Exception:
+            client.close()
+            raise
+        self._counters["connections_opened"] += 1
+        return _Session(client)
+
+    async def _close(self, session: _Session):
+        if session.closed:
+            return
+        session.closed = True
+        self._counters["connections_closed"] += 1
+        try:
+            await session.client.quit()
+        except Exception:
+            session.client.close()
+
+    async def _usable(self, session: _Session) -> bool:
+        now = time.monotonic()
+        if self._expired(session, now) or not session.client.is_connected:
+            return False
+        if now - session.last_used <= self.noop_after:
+            return True
+        self._counters["noop_checks"] += 1
+        try:
+            return (await session.client.noop()).code == 250
+        except Exception:
+            return False
+
+    async def _checkout(self) -> _Session:
+        if self._slots is None:
+            self._slots = asyncio.Semaphore(self.max_size)
+        await self._slots.acquire()
+        try:
+            while self._idle:
+                session = self._idle.pop()
+                if await self._usable(session):
+                    return session
+                await self._close(session)
+            return await self._connect()
+        except Exception:
+            self._slots.release()
+            raise
+
+    async def _checkin(self, session: _Session):
+        now = time.monotonic()
+        if not session.closed and session.messages < self.max_messages:
+            session.last_used = now
+            self._idle.append(session)
+        else:
+            await self._close(session)
+        for idle in list(self._idle):
+            if self._expired(idle, now):
+                self._idle.remove(idle)
+                await self._close(idle)
+        self._slots.release()
+
+    async def _send_one(self, session: _Session, message) -> _Session:
+        if session.closed or session.messages >= self.max_messages:
+            await self._close(session)
+            session = await self._connect()
+        try:
+            await session.client.send_message(message)
+        except DISCONNECT_ERRORS:
+            await self._close(session)
+            self._counters["reconnects"] += 1
+            session = await self._connect()
+            await session.client.send_message(message)
+        session.messages += 1
+        self._counters["messages_sent"] += 1
+        return session
+
+    async def send_many(self, messages: list) -> list:
+        """Send messages over one session; returns an error or None per message"""
+        errors = []
+        session = await self._checkout()
+        try:
+            for message in messages:
+                try:
+                    session = await self._send_one(session, message)
+                    errors.append(None)
+                except Exception as e:
+                    errors.append(e)
+        finally:
+            await self._checkin(session)
+        return errors
+
+    async def send(self, message):
+        """Send a single message, raising on failure"""
+        if not self.pipeline:
+            error = (await self.send_many([message]))[0]
+        else:
+            error = await self._send_pipelined(message)
+        if error is not None:
+            raise error
+
+    async def _send_pipelined(self, message):
+        item = _Queued(message, asyncio.Event())
+        self._queue.append(item)
+        if self._draining < self.max_size:
+            self._draining += 1
+            try:
+                while True:
+                    batch = self._take_batch()
+                    if not batch:
+                        break
+                    try:
+                        errors = await self.send_many([queued.message for queued in batch])
+                    except Exception as e:
+                        errors = [e] * len(batch)
+                    for queued, error in zip(batch, errors):
+                        queued.error = error
+                        queued.done.set()
+            finally:
+                self._draining -= 1
+
+        await item.done.wait()
+        return item.error
+
+
+def _pool_kwargs() -> dict:
+    return {
+        "host": settings.SMTP_HOST,
+        "port": settings.SMTP_PORT,
+        "username": settings.SMTP_USER,
+        "password": settings.SMTP_PASSWORD,
+        "max_size": settings.SMTP_POOL_SIZE,
+        "max_messages": settings.SMTP_POOL_MAX_MESSAGES,
+        "idle_timeout": settings.SMTP_POOL_IDLE_TIMEOUT,
+        "noop_after": settings.SMTP_POOL_NOOP_AFTER,
+        "pipeline": settings.SMTP_PIPELINE,
+        "pipeline_max_batch": settings.SMTP_PIPELINE_MAX_BATCH,
+    }
+
+
+_smtp_pool = None
+_async_smtp_pool = None
+_pool_lock = threading.Lock()
+
+
+def get_smtp_pool() -> SMTPPool:
+    """Return the worker process' blocking SMTP pool"""
+    global _smtp_pool
+    with _pool_lock:
+        if _smtp_pool is None:
+            _smtp_pool = SMTPPool(**_pool_kwargs())
+        return _smtp_pool
+
+
+def get_async_smtp_pool() -> AsyncSMTPPool:
+    """Return the worker process' asyncio SMTP pool"""
+    global _async_smtp_pool
+    with _pool_lock:
+        if _async_smtp_pool is None:
+            _async_smtp_pool = AsyncSMTPPool(**_pool_kwargs())
+        return _async_smtp_pool
+
+
+def pool_stats() -> dict:
+    """Statistics of the SMTP pools created in this process"""
+    stats = {}
+    if _smtp_pool is not None:
+        stats["smtp"] = _smtp_pool.stats()
+    if _async_smtp_pool is not None:
+        stats["smtp_async"] = _async_smtp_pool.stats()
+    return stats
+
+
+def _reset_after_fork():
+    # Sessions inherited from the parent must not be shared with it
+    global _smtp_pool, _async_smtp_pool, _pool_lock
+    _smtp_pool = None
+    _async_smtp_pool = None
+    _pool_lock = threading.Lock()
+
+
+os.register_at_fork(after_in_child=_reset_after_fork)
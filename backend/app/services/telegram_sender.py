@@ -0,0 +1,269 @@
+import os
+import threading
+import time
+from collections import deque
+from concurrent.futures import Future, InvalidStateError, ThreadPoolExecutor
+from app.core.config import settings
+from app.services.http_pool import get_http_pool
+
+# Longest text the Bot API accepts in one message
+MAX_MESSAGE_LENGTH = 4096
+COALESCE_SEPARATOR = "\n\n"
+
+
+class TokenBucket:
+    """Token bucket refilled at ``rate`` tokens per second"""
+
+    def __init__(self, rate: float, capacity: float):
+        self.rate = rate
+        self.capacity = capacity
+        self.tokens = capacity
+        self.updated = time.monotonic()
+
+    def _refill(self, now: float):
+        self.tokens = min(self.capacity, self.tokens + (now - self.updated) * self.rate)
+        self.updated = now
+
+    def delay(self, now: float) -> float:
+        """Seconds until a token is available"""
+        self._refill(now)
+        return 0.0 if self.tokens >= 1 else (1 - self.tokens) / self.rate
+
+    def take(self):
+        self.tokens -= 1
+
+    def full(self, now: float) -> bool:
+        self._refill(now)
+        return self.tokens >= self.capacity
+
+
+class _Pending:
+    def __init__(self, text: str, future: Future):
+        self.text = text
+        self.future = future
+        self.enqueued = time.monotonic()
+        self.attempts = 0
+
+
+class TelegramSender:
+    """Worker-side queue in front of the Bot API's sendMessage.
+
+    Messages wait until both the bot's and the chat's token buckets allow
+    them, a chat with a pending message is never sent to concurrently, and
+    a 429 pauses the chat for the ``retry_after`` the API asks for before
+    the message is retried. Messages queued for the same chat while it is
+    throttled are sent as one message when ``coalesce`` is enabled.
+    Callers get a future resolving to the action result.
+    """
+
+    def __init__(
+        self,
+        api_url: str,
+        bot_rate: float = 30,
+        chat_rate: float = 1,
+        group_rate: float = 20 / 60,
+        max_retries: int = 3,
+        coalesce: bool = True,
+        workers: int = 4,
+        timeout: float = 30
+    ):
+        self.api_url = api_url.rstrip("/")
+        self.bot_rate = bot_rate
+        self.chat_rate = chat_rate
+        self.group_rate = group_rate
+        self.max_retries = max_retries
+        self.coalesce = coalesce
+        self.timeout = timeout
+        self._cond = threading.Condition()
+        self._queues = {}
+        self._busy = set()
+        self._paused = {}
+        self._bot_buckets = {}
+        self._chat_buckets = {}
+        self._executor = ThreadPoolExecutor(max_workers=workers, thread_name_prefix="telegram-send")
+        self._thread = None
+        self._counters = {
+            "sent": 0,
+            "messages_coalesced": 0,
+            "rate_limited": 0,
+            "failed": 0,
+            "throttle_seconds_total": 0.0,
+            "throttle_seconds_max": 0.0,
+        }
+
+    def send(self, token: str, chat_id, text: str) -> Future:
+        """Queue a message and return a future for its result"""
+        future = Future()
+        with self._cond:
+            self._queues.setdefault((token, str(chat_id)), deque()).append(_Pending(text, future))
+            if self._thread is None:
+                self._thread = threading.Thread(target=self._run, name="telegram-dispatch", daemon=True)
+                self._thread.start()
+            self._cond.notify()
+        return future
+
+    def _chat_bucket(self, key: tuple) -> TokenBucket:
+        bucket = self._chat_buckets.get(key)
+        if bucket is None:
+            # Groups and channels have negative ids and a per-minute limit
+            rate = self.group_rate if key[1].startswith("-") else self.chat_rate
+            bucket = self._chat_buckets[key] = TokenBucket(rate, 1)
+        return bucket
+
+    def _bot_bucket(self, token: str) -> TokenBucket:
+        bucket = self._bot_buckets.get(token)
+        if bucket is None:
+            bucket = self._bot_buckets[token] = TokenBucket(self.bot_rate, self.bot_rate)
+        return bucket
+
+    def _take_batch(self, queue: deque) -> list:
+        batch = []
+        length = 0
+        while queue:
+            pending = queue[0]
+            if pending.future.cancelled():
+                queue.popleft()
+                continue
+            added = len(pending.text) + (len(COALESCE_SEPARATOR) if batch else 0)
+            if batch and (not self.coalesce or length + added > MAX_MESSAGE_LENGTH):
+                break
+            queue.popleft()
+            batch.append(pending)
+            length += added
+        return batch
+
+    def _dispatch_ready(self):
+        """Start every send the limits allow; returns seconds until the next may start"""
+        now = time.monotonic()
+        wake = None
+        for key, queue in list(self._queues.items()):
+            if not queue:
+                if key not in self._busy and self._paused.get(key, now) <= now:
+                    del self._queues[key]
+                    self._paused.pop(key, None)
+                    if self._chat_bucket(key).full(now):
+                        del self._chat_buckets[key]
+                continue
+            if key in self._busy:
+                continue
+
+            chat_bucket = self._chat_bucket(key)
+            bot_bucket = self._bot_bucket(key[0])
+            wait = max(
+                self._paused.get(key, now) - now,
+                chat_bucket.delay(now),
+                bot_bucket.delay(now)
+            )
+            if wait > 0:
+                wake = wait if wake is None else min(wake, wait)
+                continue
+
+            batch = self._take_batch(queue)
+            if not batch:
+                continue
+            chat_bucket.take()
+            bot_bucket.take()
+            self._paused.pop(key, None)
+            self._busy.add(key)
+            for pending in batch:
+                waited = now - pending.enqueued
+                self._counters["throttle_seconds_total"] += waited
+                self._counters["throttle_seconds_max"] = max(self._counters["throttle_seconds_max"], waited)
+            self._executor.submit(self._deliver, key, batch)
+        return wake
+
+    def _run(self):
+        with self._cond:
+            while True:
+                self._cond.wait(timeout=self._dispatch_ready())
+
+    def _deliver(self, key: tuple, batch: list):
+        token, chat_id = key
+        retry = False
+        try:
+            response = get_http_pool().request(
+                "POST",
+                f"{self.api_url}/bot{token}/sendMessage",
+                json={"chat_id": chat_id, "text": COALESCE_SEPARATOR.join(p.text for p in batch)},
+                timeout=self.timeout
+            )
+            if response.status_code == 429:
+                retry_after = response.json().get("parameters", {}).get("retry_after", 1)
+                with self._cond:
+                    self._counters["rate_limited"] += 1
+                    self._paused[key] = time.monotonic() + retry_after
+                retry = True
+                result = {"error": f"Telegram API rate limit exceeded, retry after {retry_after}s"}
+            elif response.status_code == 200:
+                result = {"success": True, "message_id": response.json().get("result", {}).get("message_id")}
+                if len(batch) > 1:
+                    result["coalesced"] = len(batch)
+            else:
+                result = {"error": f"Telegram API error: {response.text}"}
+        except Exception as e:
+            result = {"error": str(e)}
+
+        with self._cond:
+            requeue = []
+            for pending in batch:
+                pending.attempts += 1
+                if retry and pending.attempts <= self.max_retries:
+                    requeue.append(pending)
+                else:
+                    self._counters["sent" if "error" not in result else "failed"] += 1
+                    try:
+                        pending.future.set_result(result)
+                    except InvalidStateError:
+                        pass  # Caller gave up waiting and cancelled it
+            if "error" not in result and len(batch) > 1:
+                self._counters["messages_coalesced"] += len(batch)
+            self._queues.setdefault(key, deque()).extendleft(reversed(requeue))
+            self._busy.discard(key)
+            self._cond.notify()
+
+    def stats(self) -> dict:
+        """Queue depth and throttling counters"""
+        with self._cond:
+            depths = [len(queue) for queue in self._queues.values()]
+            return {
+                **self._counters,
+                "queue_depth": sum(depths),
+                "max_chat_queue_depth": max(depths, default=0),
+                "paused_chats": sum(1 for until in self._paused.values() if until > time.monotonic()),
+            }
+
+
+_sender = None
+_sender_lock = threading.Lock()
+
+
+def get_telegram_sender() -> TelegramSender:
+    """Return the worker process' Telegram sender"""
+    global _sender
+    with _sender_lock:
+        if _sender is None:
+            _sender = TelegramSender(
+                settings.TELEGRAM_API_URL,
+                bot_rate=settings.TELEGRAM_BOT_RATE,
+                chat_rate=settings.TELEGRAM_CHAT_RATE,
+                group_rate=settings.TELEGRAM_GROUP_RATE_PER_MINUTE / 60,
+                max_retries=settings.TELEGRAM_MAX_RETRIES,
+                coalesce=settings.TELEGRAM_COALESCE,
+                workers=settings.TELEGRAM_SENDER_THREADS
+            )
+        return _sender
+
+
+def sender_stats() -> dict:
+    """Statistics of the Telegram sender created in this process"""
+    return {"telegram": _sender.stats()} if _sender is not None else {}
+
+
+def _reset_after_fork():
+    # The dispatch thread does not survive a fork
+    global _sender, _sender_lock
+    _sender = None
+    _sender_lock = threading.Lock()
+
+
+os.register_at_fork(after_in_child=_reset_after_fork)
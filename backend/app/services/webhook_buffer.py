@@ -0,0 +1,218 @@
+import asyncio
+import fcntl
+import json
+import os
+import socket
+import time
+import uuid
+import redis
+import redis.asyncio
+from app.core.config import settings
+
+
+class RedisStreamBuffer:
+    """Webhook events in a Redis stream, drained through a consumer group.
+
+    Events stay in the group's pending list until acknowledged, so a
+    consumer that dies mid-batch leaves them to be re-read by its
+    successor (same name) or claimed by another consumer once they have
+    been idle for ``claim_idle`` seconds.
+    """
+
+    def __init__(self, url: str, stream: str, group: str = "ingest", claim_idle: float = 60):
+        self.url = url
+        self.stream = stream
+        self.group = group
+        self.claim_idle = claim_idle
+        self.consumer = f"{socket.gethostname()}-{os.getpid()}"
+        self._redis = redis.Redis.from_url(url)
+        self._async_redis = None
+        self._group_ready = False
+
+    def append(self, event: dict) -> str:
+        return self._redis.xadd(self.stream, {"event": json.dumps(event)}).decode()
+
+    async def append_async(self, event: dict) -> str:
+        if self._async_redis is None:
+            self._async_redis = redis.asyncio.Redis.from_url(self.url)
+        return (await self._async_redis.xadd(self.stream, {"event": json.dumps(event)})).decode()
+
+    def _ensure_group(self):
+        if self._group_ready:
+            return
+        try:
+            self._redis.xgroup_create(self.stream, self.group, id="0", mkstream=True)
+        except redis.ResponseError as e:
+            if "BUSYGROUP" not in str(e):
+                raise
+        self._group_ready = True
+
+    def read(self, count: int, timeout: float) -> list:
+        """Up to ``count`` (id, event) pairs, waiting at most ``timeout`` seconds for the first"""
+        self._ensure_group()
+
+        # Our own unacknowledged events first, then ones abandoned by dead consumers
+        entries = self._redis.xreadgroup(self.group, self.consumer, {self.stream: "0"}, count=count)
+        messages = entries[0][1] if entries else []
+        if not messages:
+            _, messages, *_ = self._redis.xautoclaim(
+                self.stream, self.group, self.consumer, int(self.claim_idle * 1000), count=count
+            )
+        if not messages:
+            entries = self._redis.xreadgroup(
+                self.group, self.consumer, {self.stream: ">"}, count=count, block=int(timeout * 1000)
+            )
+            messages = entries[0][1] if entries else []
+
+        # Entries deleted after being delivered come back without fields
+        self.ack([message_id for message_id, fields in messages if not fields])
+        return [(message_id.decode(), json.loads(fields[b"event"])) for message_id, fields in messages if fields]
+
+    def ack(self, event_ids: list):
+        if event_ids:
+            pipeline = self._redis.pipeline()
+            pipeline.xack(self.stream, self.group, *event_ids)
+            pipeline.xdel(self.stream, *event_ids)
+            pipeline.execute()
+
+
+class FileBuffer:
+    """Webhook events appended as JSON lines to a local file.
+
+    Writers append to ``active.log`` under an exclusive lock, fsyncing each
+    event when ``fsync`` is set. The consumer renames the active file to a
+    segment and drains it in order, recording how many lines are done in a
+    ``.offset`` file after each batch, so only the batch in progress can be
+    read twice after a crash. Only one process drains at a time.
+    """
+
+    def __init__(self, path: str, fsync: bool = True):
+        self.path = path
+        self.fsync = fsync
+        os.makedirs(path, exist_ok=True)
+        self._active = os.path.join(path, "active.log")
+        self._lock_path = os.path.join(path, "append.lock")
+        self._drain_lock = None
+        self._segment = None
+        self._lines = []
+        self._offset = 0
+        self._pending_end = 0
+
+    def append(self, event: dict) -> str:
+        event_id = uuid.uuid4().hex
+        line = json.dumps({"id": event_id, "event": event}, separators=(",", ":")) + "\n"
+        with open(self._lock_path, "a") as lock:
+            fcntl.flock(lock, fcntl.LOCK_EX)
+            with open(self._active, "a") as f:
+                f.write(line)
+                f.flush()
+                if self.fsync:
+                    os.fsync(f.fileno())
+        return event_id
+
+    async def append_async(self, event: dict) -> str:
+        return await asyncio.to_thread(self.append, event)
+
+    def _acquire_drain_lock(self) -> bool:
+        if self._drain_lock is None:
+            lock = open(os.path.join(self.path, "drain.lock"), "a")
+            try:
+                fcntl.flock(lock, fcntl.LOCK_EX | fcntl.LOCK_NB)
+            except BlockingIOError:
+                lock.close()
+                return False
+            self._drain_lock = lock
+        return True
+
+    def _next_segment(self):
+        segments = sorted(name for name in os.listdir(self.path) if name.startswith("segment-") and name.endswith(".log"))
+        if not segments and os.path.exists(self._active) and os.path.getsize(self._active):
+            name = f"segment-{time.time_ns()}.log"
+            with open(self._lock_path, "a") as lock:
+                fcntl.flock(lock, fcntl.LOCK_EX)
+                os.rename(self._active, os.path.join(self.path, name))
+            segments = [name]
+        if not segments:
+            return None
+        segment = os.path.join(self.path, segments[0])
+        with open(segment) as f:
+            self._lines = f.readlines()
+        try:
+            with open(segment + ".offset") as f:
+                self._offset = int(f.read() or 0)
+        except FileNotFoundError:
+            self._offset = 0
+        return segment
+
+    def read(self, count: int, timeout: float) -> list:
+        """Up to ``count`` (id, event) pairs, waiting at most ``timeout`` seconds for the first"""
+        deadline = time.monotonic() + timeout
+        while True:
+            if self._acquire_drain_lock():
+                if self._segment is None:
+                    self._segment = self._next_segment()
+                if self._segment is not None:
+                    batch = self._lines[self._offset:self._offset + count]
+                    # A torn final line from a crash mid-append is skipped
+                    events = []
+                    for number, line in enumerate(batch, start=self._offset):
+                        try:
+                            record = json.loads(line)
+                        except ValueError:
+                            continue
+                        events.append((f"{number}:{record['id']}", record["event"]))
+                    self._pending_end = self._offset + len(batch)
+                    if not events:
+                        self._commit_offset(self._pending_end)
+                        continue
+                    return events
+            if time.monotonic() >= deadline:
+                return []
+            time.sleep(min(0.05, max(0.0, deadline - time.monotonic())))
+
+    def _commit_offset(self, offset: int):
+        if offset >= len(self._lines):
+            os.remove(self._segment)
+            try:
+                os.remove(self._segment + ".offset")
+            except FileNotFoundError:
+                pass
+            self._segment = None
+            self._lines = []
+            self._offset = 0
+            return
+        with open(self._segment + ".offset.tmp", "w") as f:
+            f.write(str(offset))
+            f.flush()
+            os.fsync(f.fileno())
+        os.replace(self._segment + ".offset.tmp", self._segment + ".offset")
+        self._offset = offset
+
+    def ack(self, event_ids: list):
+        # Segments are drained in order, so acknowledging a batch moves the offset past it
+        if self._segment is not None:
+            self._commit_offset(self._pending_end)
+
+
+_buffer = None
+
+
+def get_webhook_buffer():
+    """Return this process' webhook buffer (WEBHOOK_BUFFER_BACKEND)"""
+    global _buffer
+    if _buffer is None:
+        if settings.WEBHOOK_BUFFER_BACKEND == "file":
+            _buffer = FileBuffer(settings.WEBHOOK_BUFFER_PATH, fsync=settings.WEBHOOK_BUFFER_FSYNC)
+        else:
+            _buffer = RedisStreamBuffer(
+                settings.REDIS_URL, settings.WEBHOOK_BUFFER_STREAM, claim_idle=settings.WEBHOOK_BUFFER_CLAIM_IDLE
+            )
+    return _buffer
+
+
+def _reset_after_fork():
+    global _buffer
+    _buffer = None
+
+
+os.register_at_fork(after_in_child=_reset_after_fork)
@@ -0,0 +1,168 @@
+from concurrent.futures import FIRST_COMPLETED, ThreadPoolExecutor, wait
+from concurrent.futures import TimeoutError as FutureTimeoutError
+from email.mime.text import MIMEText
+from email.mime.multipart import MIMEMultipart
+from app.core.config import settings
+from app.services.action_graph import execution_order, validate_action_graph
+from app.services.http_pool import get_http_pool
+from app.services.response_capture import CHUNK_SIZE, capture_limit, http_action_result, read_capped
+from app.services.smtp_pool import get_smtp_pool
+from app.services.telegram_sender import get_telegram_sender
+
+# Timeout in seconds for outbound action calls
+ACTION_TIMEOUT = 30
+
+
+def action_result(action_type: str, result: dict) -> dict:
+    """Build the execution_result entry for a single action"""
+    return {
+        "action_type": action_type,
+        "result": result,
+        "success": "error" not in result
+    }
+
+
+def run_action(action: dict) -> dict:
+    """Execute a single action with the blocking executors"""
+    action_type = action.get("type")
+    action_config = action.get("config", {})
+
+    try:
+        if action_type == "http_request":
+            result = execute_http_request(action_config)
+        elif action_type == "send_email":
+            result = execute_send_email(action_config)
+        elif action_type == "telegram_message":
+            result = execute_telegram_message(action_config)
+        else:
+            result = {"error": f"Unknown action type: {action_type}"}
+    except Exception as e:
+        result = {"error": str(e)}
+
+    return action_result(action_type, result)
+
+
+def run_actions(actions: list, max_parallel: int = 1) -> list:
+    """Execute chain actions following their dependency graph.
+
+    Actions whose dependencies have finished run concurrently on up to
+    ``max_parallel`` threads. A failed action does not stop its dependents,
+    matching the sequential behaviour. Results keep the declaration order.
+    """
+    dependencies = validate_action_graph(actions)
+    if max_parallel <= 1:
+        order = execution_order(dependencies)
+        results = [None] * len(actions)
+        for index in order:
+            results[index] = run_action(actions[index])
+        return results
+
+    dependents = [[] for _ in actions]
+    remaining = [len(deps) for deps in dependencies]
+    for index, deps in enumerate(dependencies):
+        for dep in deps:
+            dependents[dep].append(index)
+
+    results = [None] * len(actions)
+    with ThreadPoolExecutor(max_workers=max_parallel) as executor:
+        running = {
+            executor.submit(run_action, actions[index]): index
+            for index, count in enumerate(remaining) if count == 0
+        }
+        while running:
+            done, _ = wait(running, return_when=FIRST_COMPLETED)
+            for future in done:
+                index = running.pop(future)
+                results[index] = future.result()
+                for dependent in dependents[index]:
+                    remaining[dependent] -= 1
+                    if remaining[dependent] == 0:
+                        running[executor.submit(run_action, actions[dependent])] = dependent
+
+    return results
+
+
+def build_email_message(to_email: str, subject: str, body: str) -> MIMEMultipart:
+    """Build the MIME message sent by send_email actions"""
+    message = MIMEMultipart()
+    message["From"] = settings.SMTP_FROM
+    message["To"] = to_email
+    message["Subject"] = subject
+    message.attach(MIMEText(body, "plain"))
+    return message
+
+
+def execute_http_request(config: dict):
+    """Execute HTTP request action"""
+    try:
+        method = config.get("method", "GET").upper()
+        url = config.get("url")
+        headers = config.get("headers", {})
+        body = config.get("body", {})
+
+        if not url:
+            return {"error": "URL is required for HTTP request"}
+
+        if method not in ("GET", "POST", "PUT", "DELETE"):
+            return {"error": f"Unsupported HTTP method: {method}"}
+
+        kwargs = {"headers": headers, "timeout": ACTION_TIMEOUT, "stream": True}
+        if method in ("POST", "PUT"):
+            kwargs["json"] = body
+
+        # Stream the body and hang up once the capture limit is reached
+        response = get_http_pool().request(method, url, **kwargs)
+        try:
+            captured, truncated = read_capped(response.iter_content(CHUNK_SIZE), capture_limit(config))
+        finally:
+            response.close()
+
+        return http_action_result(response.status_code, captured, truncated, response.encoding, config)
+
+    except Exception as e:
+        return {"error": str(e)}
+
+
+def execute_send_email(config: dict):
+    """Execute send email action"""
+    try:
+        to_email = config.get("to")
+        subject = config.get("subject")
+        body = config.get("body")
+
+        if not to_email or not subject or not body:
+            return {"error": "to, subject, and body are required for email"}
+
+        message = build_email_message(to_email, subject, body)
+
+        # Send over a pooled, already authenticated session
+        get_smtp_pool().send(message)
+
+        return {"success": True, "to": to_email}
+
+    except Exception as e:
+        return {"error": str(e)}
+
+
+def execute_telegram_message(config: dict):
+    """Execute Telegram message action"""
+    try:
+        chat_id = config.get("chat_id")
+        message = config.get("message")
+
+        if not chat_id or not message:
+            return {"error": "chat_id and message are required for Telegram"}
+
+        if not settings.TELEGRAM_BOT_TOKEN:
+            return {"error": "Telegram bot token not configured"}
+
+        # Rate limiting, retries and coalescing happen in the shared sender
+        future = get_telegram_sender().send(settings.TELEGRAM_BOT_TOKEN, chat_id, message)
+        try:
+            return future.result(timeout=settings.TELEGRAM_QUEUE_TIMEOUT)
+        except FutureTimeoutError:
+            future.cancel()
+            return {"error": "Timed out waiting for Telegram rate limits"}
+
+    except Exception as e:
+        return {"error": str(e)}
@@ -0,0 +1,125 @@
+import asyncio
+from app.core.config import settings
+from app.services.action_graph import execution_order, validate_action_graph
+from app.services.http_pool import get_async_http_pool
+from app.services.response_capture import capture_limit, http_action_result, read_capped_async
+from app.services.smtp_pool import get_async_smtp_pool
+from app.services.telegram_sender import get_telegram_sender
+from app.workers.actions import ACTION_TIMEOUT, action_result, build_email_message
+
+
+async def run_action_async(action: dict) -> dict:
+    """Execute a single action with the asyncio executors"""
+    action_type = action.get("type")
+    action_config = action.get("config", {})
+
+    try:
+        if action_type == "http_request":
+            result = await execute_http_request_async(action_config)
+        elif action_type == "send_email":
+            result = await execute_send_email_async(action_config)
+        elif action_type == "telegram_message":
+            result = await execute_telegram_message_async(action_config)
+        else:
+            result = {"error": f"Unknown action type: {action_type}"}
+    except Exception as e:
+        result = {"error": str(e)}
+
+    return action_result(action_type, result)
+
+
+async def run_actions_async(actions: list, max_parallel: int = 1) -> list:
+    """Execute chain actions following their dependency graph on the event loop.
+
+    Same semantics as :func:`app.workers.actions.run_actions`.
+    """
+    dependencies = validate_action_graph(actions)
+    order = execution_order(dependencies)
+    limit = asyncio.Semaphore(max(max_parallel, 1))
+    tasks = [None] * len(actions)
+
+    async def run(index: int):
+        if dependencies[index]:
+            await asyncio.wait([tasks[dep] for dep in dependencies[index]])
+        async with limit:
+            return await run_action_async(actions[index])
+
+    for index in order:
+        tasks[index] = asyncio.ensure_future(run(index))
+
+    return list(await asyncio.gather(*tasks))
+
+
+async def execute_http_request_async(config: dict):
+    """Execute HTTP request action"""
+    try:
+        method = config.get("method", "GET").upper()
+        url = config.get("url")
+        headers = config.get("headers", {})
+        body = config.get("body", {})
+
+        if not url:
+            return {"error": "URL is required for HTTP request"}
+
+        if method not in ("GET", "POST", "PUT", "DELETE"):
+            return {"error": f"Unsupported HTTP method: {method}"}
+
+        kwargs = {"headers": headers, "timeout": ACTION_TIMEOUT}
+        if method in ("POST", "PUT"):
+            kwargs["json"] = body
+
+        # Stream the body and hang up once the capture limit is reached
+        response = await get_async_http_pool().request(method, url, stream=True, **kwargs)
+        try:
+            captured, truncated = await read_capped_async(response.aiter_bytes(), capture_limit(config))
+        finally:
+            await response.aclose()
+
+        return http_action_result(response.status_code, captured, truncated, response.encoding, config)
+
+    except Exception as e:
+        return {"error": str(e)}
+
+
+async def execute_send_email_async(config: dict):
+    """Execute send email action"""
+    try:
+        to_email = config.get("to")
+        subject = config.get("subject")
+        body = config.get("body")
+
+        if not to_email or not subject or not body:
+            return {"error": "to, subject, and body are required for email"}
+
+        message = build_email_message(to_email, subject, body)
+
+        # Send over a pooled, already authenticated session
+        await get_async_smtp_pool().send(message)
+
+        return {"success": True, "to": to_email}
+
+    except Exception as e:
+        return {"error": str(e)}
+
+
+async def execute_telegram_message_async(config: dict):
+    """Execute Telegram message action"""
+    try:
+        chat_id = config.get("chat_id")
+        message = config.get("message")
+
+        if not chat_id or not message:
+            return {"error": "chat_id and message are required for Telegram"}
+
+        if not settings.TELEGRAM_BOT_TOKEN:
+            return {"error": "Telegram bot token not configured"}
+
+        # Rate limiting, retries and coalescing happen in the shared sender
+        future = get_telegram_sender().send(settings.TELEGRAM_BOT_TOKEN, chat_id, message)
+        try:
+            return await asyncio.wait_for(asyncio.wrap_future(future), settings.TELEGRAM_QUEUE_TIMEOUT)
+        except asyncio.TimeoutError:
+            return {"error": "Timed out waiting for Telegram rate limits"}
+
+    except Exception as e:
+        return {"error": str(e)}
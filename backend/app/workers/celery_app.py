@@ -6,7 +6,7 @@ celery_app = Celery(
     "autoforge",
     broker=settings.REDIS_URL,
     backend=settings.REDIS_URL,
-    include=["app.workers.tasks"]
+    include=["app.workers.tasks", "app.workers.stats"]
 )
 
 celery_app.conf.update(
@@ -20,10 +20,42 @@ celery_app.conf.update(
     worker_prefetch_multiplier=1,
 )
 
+# In asyncio mode task threads only wait on the shared event loop, so run
+# many of them per process instead of one blocking process per execution
+if settings.EXECUTION_ENGINE == "asyncio":
+    celery_app.conf.update(
+        worker_pool="threads",
+        worker_concurrency=settings.ASYNC_WORKER_CONCURRENCY,
+    )
+
 # Scheduled tasks configuration
 celery_app.conf.beat_schedule = {
     'check-scheduled-chains': {
         'task': 'app.workers.tasks.check_scheduled_chains',
         'schedule': 60.0,  # Run every minute
     },
+    'expire-idempotency-keys': {
+        'task': 'app.workers.tasks.expire_idempotency_keys',
+        'schedule': 3600.0,  # Run every hour
+    },
+    'maintain-execution-log-partitions': {
+        'task': 'app.workers.tasks.maintain_execution_log_partitions',
+        'schedule': crontab(minute=15, hour=0),  # Daily, only acts when partitioned
+    },
+    'flush-billing': {
+        'task': 'app.workers.tasks.flush_billing',
+        'schedule': float(settings.BILLING_FLUSH_INTERVAL),  # No-op in immediate mode
+    },
+    'archive-execution-logs': {
+        'task': 'app.workers.tasks.archive_execution_logs',
+        'schedule': crontab(minute=30, hour=1),  # Daily
+    },
+    'aggregate-execution-stats': {
+        'task': 'app.workers.tasks.aggregate_execution_stats',
+        'schedule': float(settings.EXECUTION_STATS_INTERVAL),
+    },
+    'admit-parked-executions': {
+        'task': 'app.workers.tasks.admit_parked_executions',
+        'schedule': float(settings.ADMISSION_INTERVAL),  # Also releases stale reservations
+    },
 }
@@ -0,0 +1,76 @@
+import asyncio
+import os
+import threading
+from app.core.config import settings
+from app.workers.actions import run_actions
+from app.workers.async_actions import run_actions_async
+
+
+class AsyncEngine:
+    """Per-process event loop that runs action I/O for many chain executions.
+
+    Task threads hand their actions to the loop and wait for the result, so
+    with a threaded Celery pool a single worker process keeps up to
+    ``max_in_flight`` chain executions waiting on the network at once.
+    """
+
+    def __init__(self, max_in_flight: int):
+        self.max_in_flight = max_in_flight
+        self._loop = None
+        self._thread = None
+        self._semaphore = None
+        self._pid = None
+        self._lock = threading.Lock()
+
+    def _ensure_started(self):
+        # The loop thread does not survive a fork, so start one per process
+        with self._lock:
+            if self._pid == os.getpid() and self._thread.is_alive():
+                return
+
+            loop = asyncio.new_event_loop()
+            ready = threading.Event()
+
+            def run_loop():
+                asyncio.set_event_loop(loop)
+                self._semaphore = asyncio.Semaphore(self.max_in_flight)
+                ready.set()
+                loop.run_forever()
+
+            thread = threading.Thread(target=run_loop, name="autoforge-async-engine", daemon=True)
+            thread.start()
+            ready.wait()
+
+            self._loop = loop
+            self._thread = thread
+            self._pid = os.getpid()
+
+    async def _run_limited(self, coro):
+        async with self._semaphore:
+            return await coro
+
+    def run(self, coro, timeout: float = None):
+        """Run a coroutine on the engine loop and block until it completes"""
+        self._ensure_started()
+        future = asyncio.run_coroutine_threadsafe(self._run_limited(coro), self._loop)
+        return future.result(timeout)
+
+
+_engine = None
+_engine_lock = threading.Lock()
+
+
+def get_engine() -> AsyncEngine:
+    """Return the process-wide asyncio engine"""
+    global _engine
+    with _engine_lock:
+        if _engine is None:
+            _engine = AsyncEngine(settings.ASYNC_MAX_IN_FLIGHT)
+        return _engine
+
+
+def execute_actions(actions: list, max_parallel: int = 1) -> list:
+    """Execute chain actions with the configured execution engine"""
+    if settings.EXECUTION_ENGINE == "asyncio":
+        return get_engine().run(run_actions_async(actions, max_parallel))
+    return run_actions(actions, max_parallel)
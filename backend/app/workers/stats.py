@@ -0,0 +1,23 @@
+from celery.worker.control import inspect_command
+from app.services import chain_cache, http_pool, invalidation, principal_cache, smtp_pool, telegram_sender
+
+
+def collect_pool_stats() -> dict:
+    """Gather pool, sender and cache statistics of the current worker process"""
+    stats = {}
+    stats.update(http_pool.pool_stats())
+    stats.update(smtp_pool.pool_stats())
+    stats.update(telegram_sender.sender_stats())
+    stats.update(chain_cache.cache_stats())
+    stats.update(principal_cache.cache_stats())
+    stats.update(invalidation.bus_stats())
+    return stats
+
+
+@inspect_command()
+def pool_stats(state):
+    """Report worker pool statistics.
+
+    Usage: celery -A app.workers.celery_app inspect pool_stats
+    """
+    return collect_pool_stats()
@@ -1,20 +1,40 @@
 from app.workers.celery_app import celery_app
 from app.core.database import SessionLocal
-from app.models.models import Chain, ExecutionLog, ExecutionStatus, User, Transaction, TriggerType
-from datetime import datetime
-import requests
-import json
-import aiosmtplib
-from email.mime.text import MIMEText
-from email.mime.multipart import MIMEMultipart
+from app.models.models import Chain, ExecutionIdempotencyKey, ExecutionLog, ExecutionStatus, TriggerType
+from app.services import partitions
+from app.services.admission import admit, admit_parked, release_stale_reservations, take_reservation
+from app.services.billing import charge, debit, flush_charges, release
+from app.services.chain_cache import get_cached_chain
+from app.services.execution_stats import aggregate
+from app.services.payload_store import set_execution_result
+from app.services.principal_cache import invalidate_principal
+from app.services.retention import expire_execution_logs
+from app.workers.engine import execute_actions
 from app.core.config import settings
-import asyncio
+from app.services.schedule import next_run_at
+from celery import group
+from celery.utils.log import get_task_logger
+from datetime import datetime, timedelta
+from sqlalchemy import bindparam, insert, or_
+import time
+
+logger = get_task_logger(__name__)
+
+
+def release_reservation(db, execution_log, user_id: int) -> bool:
+    """Give back the balance held for an execution that will not be charged"""
+    reserved = take_reservation(db, execution_log)
+    if reserved is None:
+        return False
+    release(db, user_id, reserved)
+    return True
 
 
 @celery_app.task(bind=True)
 def execute_chain(self, execution_log_id: int):
     """Execute a chain workflow"""
     db = SessionLocal()
+    execution_log = chain = None
     
     try:
         # Get execution log and chain
@@ -22,8 +42,16 @@ def execute_chain(self, execution_log_id: int):
         if not execution_log:
             return {"error": "Execution log not found"}
         
-        chain = db.query(Chain).filter(Chain.id == execution_log.chain_id).first()
+        if execution_log.status == ExecutionStatus.PARKED:
+            return {"error": "Execution is parked until the balance covers it"}
+        
+        if execution_log.status != ExecutionStatus.PENDING:
+            # Executions can be published more than once (webhook ingestion replays)
+            return {"error": "Execution already started"}
+        
+        chain = get_cached_chain(db, execution_log.chain_id)
         if not chain:
+            # Chains with executions cannot be deleted, so no reservation is left behind
             execution_log.status = ExecutionStatus.FAILED
             execution_log.error_message = "Chain not found"
             db.commit()
@@ -33,79 +61,64 @@ def execute_chain(self, execution_log_id: int):
         if not chain.is_active:
             execution_log.status = ExecutionStatus.FAILED
             execution_log.error_message = "Chain is not active"
+            released = release_reservation(db, execution_log, chain.user_id)
             db.commit()
+            if released:
+                invalidate_principal(chain.user_id)
             return {"error": "Chain is not active"}
         
-        # Update status to running
-        execution_log.status = ExecutionStatus.RUNNING
-        execution_log.started_at = datetime.utcnow()
+        # Update status to running; only one of several messages for the
+        # same execution gets to claim it
+        claimed = db.query(ExecutionLog).filter(
+            ExecutionLog.id == execution_log.id,
+            ExecutionLog.status == ExecutionStatus.PENDING
+        ).update({ExecutionLog.status: ExecutionStatus.RUNNING, ExecutionLog.started_at: datetime.utcnow()})
         db.commit()
+        if not claimed:
+            return {"error": "Execution already started"}
         
         # Execute each action in the chain
-        results = []
-        all_success = True
-        
-        for action in chain.actions:
-            action_type = action.get("type")
-            action_config = action.get("config", {})
-            
-            try:
-                if action_type == "http_request":
-                    result = execute_http_request(action_config)
-                elif action_type == "send_email":
-                    result = execute_send_email(action_config)
-                elif action_type == "telegram_message":
-                    result = execute_telegram_message(action_config)
-                else:
-                    result = {"error": f"Unknown action type: {action_type}"}
-                    all_success = False
-                
-                results.append({
-                    "action_type": action_type,
-                    "result": result,
-                    "success": "error" not in result
-                })
-                
-                if "error" in result:
-                    all_success = False
-                    
-            except Exception as e:
-                results.append({
-                    "action_type": action_type,
-                    "result": {"error": str(e)},
-                    "success": False
-                })
-                all_success = False
+        max_parallel = chain.max_parallel_actions or settings.CHAIN_MAX_PARALLEL_ACTIONS
+        results = execute_actions(chain.actions, max_parallel)
+        all_success = all(result["success"] for result in results)
         
         # Update execution log
-        execution_log.execution_result = {"actions": results}
+        set_execution_result(db, execution_log, {"actions": results})
         execution_log.completed_at = datetime.utcnow()
         
         if all_success:
             execution_log.status = ExecutionStatus.SUCCESS
             
-            # Charge user for successful execution
-            user = db.query(User).filter(User.id == chain.user_id).first()
-            if user and user.balance >= chain.execution_cost:
-                user.balance -= chain.execution_cost
-                execution_log.cost = chain.execution_cost
-                execution_log.charged = True
-                
-                # Create transaction record
-                transaction = Transaction(
-                    user_id=user.id,
-                    amount=-chain.execution_cost,
+            # Charge user for successful execution, consuming its reservation
+            reserved = take_reservation(db, execution_log)
+            if settings.BILLING_MODE == "aggregated":
+                # The ledger row is written by the next flush_billing
+                charged = debit(db, chain.user_id, chain.execution_cost, reserved=reserved)
+            else:
+                execution_log.transaction_id = charge(
+                    db, chain.user_id, chain.execution_cost,
                     description=f"Execution of chain: {chain.name}",
-                    execution_log_id=execution_log.id
+                    execution_log_id=execution_log.id,
+                    reserved=reserved
                 )
-                db.add(transaction)
+                charged = execution_log.transaction_id is not None
+            if charged:
+                execution_log.cost = chain.execution_cost
+                execution_log.charged = True
             else:
                 execution_log.error_message = "Insufficient balance to charge for execution"
+                if reserved is not None:
+                    release(db, chain.user_id, reserved)
         else:
             execution_log.status = ExecutionStatus.FAILED
             execution_log.error_message = "One or more actions failed"
+            reserved = take_reservation(db, execution_log)
+            if reserved is not None:
+                release(db, chain.user_id, reserved)
         
         db.commit()
+        if execution_log.charged or reserved is not None:
+            invalidate_principal(chain.user_id)
         
         return {
             "execution_log_id": execution_log_id,
@@ -114,157 +127,275 @@ def execute_chain(self, execution_log_id: int):
         }
         
     except Exception as e:
+        db.rollback()
         execution_log.status = ExecutionStatus.FAILED
         execution_log.error_message = str(e)
         execution_log.completed_at = datetime.utcnow()
+        released = chain is not None and release_reservation(db, execution_log, chain.user_id)
         db.commit()
+        if released:
+            invalidate_principal(chain.user_id)
         return {"error": str(e)}
     
     finally:
         db.close()
 
 
-def execute_http_request(config: dict):
-    """Execute HTTP request action"""
+def _admit_scheduled(db, user_id: int, execution_cost):
+    # A database error would abort the whole claim transaction, so the
+    # reservation gets its own savepoint; admission off needs no database
+    if settings.ADMISSION_CONTROL == "off":
+        return admit(db, user_id, execution_cost)
+    with db.begin_nested():
+        return admit(db, user_id, execution_cost)
+
+
+def claim_due_chains(db, now: datetime, limit: int, not_admitted: list = None, reserved_users: set = None) -> list:
+    """Create execution logs for schedule chains due at ``now`` and advance them.
+
+    A single range query over ix_chains_schedule_due finds the due chains;
+    rows are locked with SKIP LOCKED so overlapping ticks never claim the
+    same chain, and next_run_at moves forward in the same transaction.
+    Execution logs are written with one multi-row INSERT ... RETURNING.
+    Each execution goes through admission control; rejected runs are
+    logged as failed and parked ones wait for admit_parked_executions.
+    Returns the ids of the new execution logs that may be queued; the ids
+    of rejected and parked ones are appended to ``not_admitted``, and the
+    users holding new reservations are added to ``reserved_users`` for
+    the caller to invalidate once it commits.
+    """
+    due_chains = db.query(Chain.id, Chain.trigger_config, Chain.user_id, Chain.execution_cost).filter(
+        Chain.trigger_type == TriggerType.SCHEDULE,
+        Chain.is_active == True,
+        or_(Chain.next_run_at == None, Chain.next_run_at <= now)
+    ).order_by(Chain.next_run_at).limit(limit).with_for_update(skip_locked=True).all()
+    
+    if not due_chains:
+        return []
+    
+    advances = []
+    execution_logs = []
+    trigger_data = {"scheduled": True, "timestamp": now.isoformat()}
+    for chain_id, trigger_config, user_id, execution_cost in due_chains:
+        try:
+            next_run = next_run_at(trigger_config, now)
+        except Exception:
+            # Schedules are validated on save; back off rather than fire every tick
+            logger.exception("Unreadable schedule for chain %s", chain_id)
+            next_run = now + timedelta(hours=1)
+        advances.append({"chain_pk": chain_id, "next_run": next_run})
+        try:
+            admission = _admit_scheduled(db, user_id, execution_cost)
+        except Exception:
+            # Skip this run only; the schedule still advances so the chain is retried next time
+            logger.exception("Admission failed for scheduled chain %s", chain_id)
+            continue
+        if admission.reserved is not None and reserved_users is not None:
+            reserved_users.add(user_id)
+        execution_logs.append({
+            "chain_id": chain_id,
+            "trigger_data": trigger_data,
+            **admission.log_values(now)
+        })
+    
+    # Advancing the schedule is not a user edit, so keep updated_at as is
+    chains = Chain.__table__
+    db.execute(
+        chains.update()
+        .where(chains.c.id == bindparam("chain_pk"))
+        .values(next_run_at=bindparam("next_run"), updated_at=chains.c.updated_at),
+        advances
+    )
+    execution_log_ids = db.execute(
+        insert(ExecutionLog).returning(ExecutionLog.id, sort_by_parameter_order=True),
+        execution_logs
+    ).scalars().all() if execution_logs else []
+    
+    admitted = []
+    for execution_log_id, execution_log in zip(execution_log_ids, execution_logs):
+        if execution_log["status"] == ExecutionStatus.PENDING:
+            admitted.append(execution_log_id)
+        elif not_admitted is not None:
+            not_admitted.append(execution_log_id)
+    return admitted
+
+
+def publish_executions(execution_log_ids: list, batch_size: int) -> None:
+    """Queue execute_chain for each execution log, one group per batch.
+
+    A group publishes all of its messages over a single producer
+    connection instead of a broker round trip per ``delay`` call.
+    """
+    for start in range(0, len(execution_log_ids), batch_size):
+        batch = execution_log_ids[start:start + batch_size]
+        group(execute_chain.si(execution_log_id) for execution_log_id in batch).apply_async()
+
+
+@celery_app.task
+def check_scheduled_chains():
+    """Check for scheduled chains that need to be executed"""
+    db = SessionLocal()
+    
     try:
-        method = config.get("method", "GET").upper()
-        url = config.get("url")
-        headers = config.get("headers", {})
-        body = config.get("body", {})
+        now = datetime.utcnow()
+        started = time.monotonic()
+        claim_seconds = publish_seconds = 0.0
+        triggered = 0
         
-        if not url:
-            return {"error": "URL is required for HTTP request"}
-        
-        if method == "GET":
-            response = requests.get(url, headers=headers, timeout=30)
-        elif method == "POST":
-            response = requests.post(url, headers=headers, json=body, timeout=30)
-        elif method == "PUT":
-            response = requests.put(url, headers=headers, json=body, timeout=30)
-        elif method == "DELETE":
-            response = requests.delete(url, headers=headers, timeout=30)
-        else:
-            return {"error": f"Unsupported HTTP method: {method}"}
+        while True:
+            claim_started = time.monotonic()
+            not_admitted = []
+            reserved_users = set()
+            execution_log_ids = claim_due_chains(db, now, settings.SCHEDULER_BATCH_SIZE, not_admitted, reserved_users)
+            db.commit()
+            for user_id in reserved_users:
+                invalidate_principal(user_id)
+            claim_seconds += time.monotonic() - claim_started
+            
+            # Trigger execution
+            publish_started = time.monotonic()
+            publish_executions(execution_log_ids, settings.SCHEDULER_PUBLISH_BATCH_SIZE)
+            publish_seconds += time.monotonic() - publish_started
+            
+            triggered += len(execution_log_ids)
+            if len(execution_log_ids) + len(not_admitted) < settings.SCHEDULER_BATCH_SIZE:
+                break
         
+        tick_seconds = time.monotonic() - started
+        logger.info(
+            "Scheduler tick triggered %d chains in %.3fs (claim %.3fs, publish %.3fs)",
+            triggered, tick_seconds, claim_seconds, publish_seconds
+        )
         return {
-            "status_code": response.status_code,
-            "response": response.text[:1000],  # Limit response size
-            "success": response.status_code < 400
+            "triggered_chains": triggered,
+            "tick_seconds": round(tick_seconds, 3),
+            "claim_seconds": round(claim_seconds, 3),
+            "publish_seconds": round(publish_seconds, 3)
         }
         
     except Exception as e:
+        db.rollback()
         return {"error": str(e)}
+    finally:
+        db.close()
 
 
-def execute_send_email(config: dict):
-    """Execute send email action"""
+@celery_app.task
+def expire_idempotency_keys():
+    """Release webhook idempotency keys older than the retention window"""
+    db = SessionLocal()
+    
     try:
-        to_email = config.get("to")
-        subject = config.get("subject")
-        body = config.get("body")
-        
-        if not to_email or not subject or not body:
-            return {"error": "to, subject, and body are required for email"}
-        
-        # Create message
-        message = MIMEMultipart()
-        message["From"] = settings.SMTP_FROM
-        message["To"] = to_email
-        message["Subject"] = subject
-        message.attach(MIMEText(body, "plain"))
-        
-        # Send email (synchronous version for Celery)
-        import smtplib
-        with smtplib.SMTP(settings.SMTP_HOST, settings.SMTP_PORT) as server:
-            server.starttls()
-            if settings.SMTP_USER and settings.SMTP_PASSWORD:
-                server.login(settings.SMTP_USER, settings.SMTP_PASSWORD)
-            server.send_message(message)
-        
-        return {"success": True, "to": to_email}
-        
+        cutoff = datetime.utcnow() - timedelta(seconds=settings.WEBHOOK_IDEMPOTENCY_TTL)
+        expired = db.query(ExecutionLog).filter(
+            ExecutionLog.idempotency_key != None,
+            ExecutionLog.created_at < cutoff
+        ).update({ExecutionLog.idempotency_key: None}, synchronize_session=False)
+        db.query(ExecutionIdempotencyKey).filter(
+            ExecutionIdempotencyKey.created_at < cutoff
+        ).delete(synchronize_session=False)
+        db.commit()
+        return {"expired_keys": expired}
+    except Exception as e:
+        db.rollback()
+        return {"error": str(e)}
+    finally:
+        db.close()
+
+
+@celery_app.task
+def maintain_execution_log_partitions():
+    """Create upcoming monthly execution_logs partitions and detach expired ones"""
+    if not settings.EXECUTION_LOGS_PARTITIONED:
+        return {"skipped": "EXECUTION_LOGS_PARTITIONED is off"}
+    
+    db = SessionLocal()
+    
+    try:
+        if not partitions.is_partitioned(db):
+            return {"skipped": "execution_logs is not partitioned"}
+        now = datetime.utcnow()
+        created = partitions.ensure_partitions(db, now, settings.EXECUTION_LOGS_PARTITION_MONTHS_AHEAD)
+        detached = []
+        if settings.EXECUTION_LOGS_DETACH_AFTER_MONTHS > 0:
+            cutoff = partitions.add_months(partitions.month_start(now), -settings.EXECUTION_LOGS_DETACH_AFTER_MONTHS)
+            detached = partitions.detach_partitions(db, cutoff)
+        db.commit()
+        if created or detached:
+            logger.info("execution_logs partitions created %s, detached %s", created, detached)
+        return {"created": created, "detached": detached}
     except Exception as e:
+        db.rollback()
         return {"error": str(e)}
+    finally:
+        db.close()
 
 
-def execute_telegram_message(config: dict):
-    """Execute Telegram message action"""
+@celery_app.task
+def archive_execution_logs():
+    """Roll up, archive and delete execution logs past their plan's retention"""
+    db = SessionLocal()
+    
     try:
-        chat_id = config.get("chat_id")
-        message = config.get("message")
-        
-        if not chat_id or not message:
-            return {"error": "chat_id and message are required for Telegram"}
-        
-        if not settings.TELEGRAM_BOT_TOKEN:
-            return {"error": "Telegram bot token not configured"}
-        
-        url = f"https://api.telegram.org/bot{settings.TELEGRAM_BOT_TOKEN}/sendMessage"
-        response = requests.post(url, json={
-            "chat_id": chat_id,
-            "text": message
-        }, timeout=30)
-        
-        if response.status_code == 200:
-            return {"success": True, "message_id": response.json().get("result", {}).get("message_id")}
-        else:
-            return {"error": f"Telegram API error: {response.text}"}
-        
+        # Finished logs are kept until counted into execution_stats
+        aggregate(db, settings.EXECUTION_STATS_BATCH_SIZE)
+        archived = expire_execution_logs(db, datetime.utcnow(), settings.EXECUTION_LOG_ARCHIVE_BATCH_SIZE)
+        logger.info("Archived execution logs per plan: %s", archived)
+        return {"archived": archived}
     except Exception as e:
+        db.rollback()
         return {"error": str(e)}
+    finally:
+        db.close()
 
 
 @celery_app.task
-def check_scheduled_chains():
-    """Check for scheduled chains that need to be executed"""
+def flush_billing():
+    """Write aggregated ledger rows for charges made in BILLING_MODE=aggregated"""
     db = SessionLocal()
     
     try:
-        # Find all active chains with schedule trigger
-        scheduled_chains = db.query(Chain).filter(
-            Chain.is_active == True,
-            Chain.trigger_type == TriggerType.SCHEDULE
-        ).all()
-        
-        for chain in scheduled_chains:
-            # Check if it's time to execute based on schedule config
-            schedule_config = chain.trigger_config
-            # For MVP, we'll execute all scheduled chains that haven't been executed in the last hour
-            # In production, implement proper schedule parsing (cron, interval, etc.)
-            
-            # Get last execution
-            last_execution = db.query(ExecutionLog).filter(
-                ExecutionLog.chain_id == chain.id
-            ).order_by(ExecutionLog.created_at.desc()).first()
-            
-            # Simple logic: execute if no execution in last hour
-            should_execute = False
-            if not last_execution:
-                should_execute = True
-            else:
-                from datetime import timedelta
-                time_since_last = datetime.utcnow() - last_execution.created_at
-                interval = schedule_config.get("interval_minutes", 60)
-                if time_since_last.total_seconds() >= interval * 60:
-                    should_execute = True
-            
-            if should_execute:
-                # Create execution log
-                execution_log = ExecutionLog(
-                    chain_id=chain.id,
-                    trigger_data={"scheduled": True, "timestamp": datetime.utcnow().isoformat()},
-                    status=ExecutionStatus.PENDING
-                )
-                db.add(execution_log)
-                db.commit()
-                db.refresh(execution_log)
-                
-                # Trigger execution
-                execute_chain.delay(execution_log.id)
-        
-        return {"checked_chains": len(scheduled_chains)}
+        billed = flush_charges(db, datetime.utcnow(), settings.BILLING_FLUSH_BATCH_SIZE)
+        return {"billed_executions": billed}
+    except Exception as e:
+        db.rollback()
+        return {"error": str(e)}
+    finally:
+        db.close()
+
+
+@celery_app.task
+def aggregate_execution_stats():
+    """Fold finished executions into the per-chain hourly and daily stats"""
+    db = SessionLocal()
+    
+    try:
+        recorded = aggregate(db, settings.EXECUTION_STATS_BATCH_SIZE)
+        return {"recorded_executions": recorded}
+    except Exception as e:
+        db.rollback()
+        return {"error": str(e)}
+    finally:
+        db.close()
+
+
+@celery_app.task
+def admit_parked_executions():
+    """Queue parked executions the balance now covers and release stale reservations"""
+    db = SessionLocal()
+    
+    try:
+        now = datetime.utcnow()
+        released_users = release_stale_reservations(db, now)
+        db.commit()
+        for user_id in released_users:
+            invalidate_principal(user_id)
         
+        execution_log_ids = admit_parked(db, now, settings.ADMISSION_BATCH_SIZE)
+        publish_executions(execution_log_ids, settings.SCHEDULER_PUBLISH_BATCH_SIZE)
+        return {"admitted": len(execution_log_ids), "released_users": len(released_users)}
     except Exception as e:
+        db.rollback()
         return {"error": str(e)}
     finally:
         db.close()
@@ -0,0 +1,151 @@
+"""Drain buffered webhook events into execution logs.
+
+In WEBHOOK_INGEST_MODE=buffered the webhook endpoint only appends events
+to the webhook buffer. The consumer here turns them into ExecutionLog rows
+in batches and queues their executions. It runs as a thread in each API
+process, or standalone with ``python -m app.workers.webhook_ingest``.
+"""
+import hashlib
+import logging
+import threading
+import time
+from datetime import datetime
+from sqlalchemy import insert
+from app.core.config import settings
+from app.core.database import SessionLocal
+from app.models.models import Chain, ExecutionIdempotencyKey, ExecutionLog, ExecutionStatus
+from app.services.admission import admit
+from app.services.payload_store import store_payload
+from app.services.principal_cache import invalidate_principal
+from app.services.webhook_buffer import get_webhook_buffer
+from app.workers.tasks import publish_executions
+
+logger = logging.getLogger(__name__)
+
+
+def drain_batch(db, buffer, batch_size: int, timeout: float) -> int:
+    """Insert one batch of buffered events and queue their executions.
+
+    The batch is acknowledged only after the rows are committed and the
+    executions published, so a crash or broker error in between replays
+    it. Every row carries an idempotency key (the sender's, else one
+    derived from the buffer event id), and keys already recorded in
+    execution_idempotency_keys are not inserted again, so a replayed batch does not create executions
+    twice; those still pending are published again instead, as the first
+    pass may not have got that far (execute_chain runs each one once).
+    Each execution goes through admission control; only admitted ones are
+    queued.
+    Returns the number of events taken from the buffer.
+    """
+    events = buffer.read(batch_size, timeout)
+    if not events:
+        return 0
+
+    keyed = [
+        (event, event.get("idempotency_key") or "e:" + hashlib.sha256(event_id.encode()).hexdigest())
+        for event_id, event in events
+    ]
+
+    # Chains deleted since the event was accepted are dropped
+    chain_ids = {event["chain_id"] for event, _ in keyed}
+    existing = {
+        chain_id: (user_id, execution_cost)
+        for chain_id, user_id, execution_cost in db.query(Chain.id, Chain.user_id, Chain.execution_cost).filter(Chain.id.in_(chain_ids))
+    }
+    batch_keys = {(event["chain_id"], key) for event, key in keyed}
+    seen = set()
+    replayed = []
+    for execution_log_id, chain_id, key, execution_status in db.query(
+        ExecutionIdempotencyKey.execution_log_id, ExecutionIdempotencyKey.chain_id,
+        ExecutionIdempotencyKey.idempotency_key, ExecutionLog.status
+    ).outerjoin(ExecutionLog, ExecutionLog.id == ExecutionIdempotencyKey.execution_log_id).filter(
+        ExecutionIdempotencyKey.chain_id.in_(chain_ids),
+        ExecutionIdempotencyKey.idempotency_key.in_({key for _, key in keyed})
+    ).order_by(ExecutionIdempotencyKey.execution_log_id):
+        if (chain_id, key) in batch_keys:
+            seen.add((chain_id, key))
+            if execution_status == ExecutionStatus.PENDING:
+                replayed.append(execution_log_id)
+
+    now = datetime.utcnow()
+    rows = []
+    reserved_users = set()
+    for event, key in keyed:
+        if event["chain_id"] not in existing or (event["chain_id"], key) in seen:
+            continue
+        seen.add((event["chain_id"], key))
+        trigger_data, trigger_data_ref = store_payload(db, event["trigger_data"])
+        user_id, execution_cost = existing[event["chain_id"]]
+        admission = admit(db, user_id, execution_cost)
+        if admission.reserved is not None:
+            reserved_users.add(user_id)
+        rows.append({
+            "chain_id": event["chain_id"],
+            **admission.log_values(now),
+            "trigger_data": trigger_data,
+            "trigger_data_ref": trigger_data_ref,
+            "idempotency_key": key,
+            "created_at": datetime.fromisoformat(event["received_at"])
+        })
+
+    execution_log_ids = []
+    if rows:
+        execution_log_ids = db.execute(
+            insert(ExecutionLog).returning(ExecutionLog.id, sort_by_parameter_order=True),
+            rows
+        ).scalars().all()
+        db.execute(insert(ExecutionIdempotencyKey), [
+            {
+                "chain_id": row["chain_id"],
+                "idempotency_key": row["idempotency_key"],
+                "execution_log_id": execution_log_id,
+                "created_at": now
+            }
+            for execution_log_id, row in zip(execution_log_ids, rows)
+        ])
+    db.commit()
+    for user_id in reserved_users:
+        invalidate_principal(user_id)
+
+    admitted = replayed + [
+        execution_log_id for execution_log_id, row in zip(execution_log_ids, rows)
+        if row["status"] == ExecutionStatus.PENDING
+    ]
+    publish_executions(admitted, settings.SCHEDULER_PUBLISH_BATCH_SIZE)
+    buffer.ack([event_id for event_id, _ in events])
+    return len(events)
+
+
+class WebhookIngestConsumer:
+    """Background thread draining the webhook buffer until stopped"""
+
+    def __init__(self, buffer=None):
+        self.buffer = buffer or get_webhook_buffer()
+        self._stopping = threading.Event()
+        self._thread = None
+
+    def start(self):
+        self._thread = threading.Thread(target=self.run, name="webhook-ingest", daemon=True)
+        self._thread.start()
+
+    def stop(self, timeout: float = None):
+        self._stopping.set()
+        if self._thread is not None:
+            self._thread.join(timeout)
+
+    def run(self):
+        while not self._stopping.is_set():
+            db = SessionLocal()
+            try:
+                drain_batch(db, self.buffer, settings.WEBHOOK_BUFFER_BATCH_SIZE, settings.WEBHOOK_BUFFER_FLUSH_INTERVAL)
+            except Exception:
+                # Unacknowledged events are read again on the next pass
+                logger.exception("Webhook ingestion batch failed")
+                db.rollback()
+                time.sleep(1)
+            finally:
+                db.close()
+
+
+if __name__ == "__main__":
+    WebhookIngestConsumer().run()
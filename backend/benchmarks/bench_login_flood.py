@@ -0,0 +1,123 @@
+"""Webhook latency while the API is flooded with logins: threadpool bcrypt vs the hasher pool.
+
+Usage: python -m benchmarks.bench_login_flood [--flood 32] [--seconds 10] [--rounds 12]
+
+--flood clients log in back to back while a probe sends one small signed
+webhook every 50 ms. The legacy endpoint verifies the password in a sync
+handler, i.e. on Starlette's 40-thread pool; the pooled endpoint uses
+PasswordHasher with the PASSWORD_HASH_* settings and sheds excess logins
+with 503. Only request handling is measured: no database or broker.
+"""
+import os
+
+os.environ.setdefault("CACHE_INVALIDATION_BACKEND", "memory")
+
+import argparse
+import asyncio
+import hashlib
+import hmac
+import statistics
+import time
+import httpx
+from fastapi import FastAPI, HTTPException, Request
+from passlib.context import CryptContext
+from app.core.config import settings
+from app.services.password_hasher import HasherBusy, PasswordHasher
+
+SECRET = b"bench-secret"
+PASSWORD = "correct horse battery staple"
+
+app = FastAPI()
+
+
+@app.post("/legacy-login")
+def legacy_login():
+    if not app.state.context.verify(PASSWORD, app.state.hashed):
+        raise HTTPException(status_code=401)
+    return {"ok": True}
+
+
+@app.post("/pooled-login")
+async def pooled_login():
+    try:
+        valid, _ = await app.state.hasher.verify_and_update(PASSWORD, app.state.hashed)
+    except HasherBusy:
+        raise HTTPException(status_code=503)
+    if not valid:
+        raise HTTPException(status_code=401)
+    return {"ok": True}
+
+
+@app.post("/webhook")
+async def webhook(request: Request):
+    body = await request.body()
+    expected = hmac.new(SECRET, body, hashlib.sha256).hexdigest()
+    assert hmac.compare_digest(request.headers["x-webhook-signature"], expected)
+    return {"ok": True}
+
+
+async def flood(client, path: str, deadline: float, outcomes: dict):
+    while time.perf_counter() < deadline:
+        response = await client.post(path)
+        outcomes[response.status_code] = outcomes.get(response.status_code, 0) + 1
+
+
+async def probe(client, deadline: float) -> list:
+    body = b'{"event": "order.created", "id": 1}'
+    headers = {"x-webhook-signature": hmac.new(SECRET, body, hashlib.sha256).hexdigest()}
+    latencies = []
+    while time.perf_counter() < deadline:
+        started = time.perf_counter()
+        response = await client.post("/webhook", content=body, headers=headers)
+        assert response.status_code == 200
+        latencies.append(time.perf_counter() - started)
+        await asyncio.sleep(0.05)
+    return latencies
+
+
+async def run(path: str, clients: int, seconds: float) -> tuple:
+    transport = httpx.ASGITransport(app=app)
+    async with httpx.AsyncClient(transport=transport, base_url="http://bench", timeout=None) as client:
+        # Start the pool workers outside the measured window
+        await client.post(path)
+        deadline = time.perf_counter() + seconds
+        outcomes = {}
+        floods = [asyncio.create_task(flood(client, path, deadline, outcomes)) for _ in range(clients)]
+        latencies = await probe(client, deadline)
+        await asyncio.gather(*floods)
+    return latencies, outcomes
+
+
+def main():
+    parser = argparse.ArgumentParser()
+    parser.add_argument("--flood", type=int, default=32)
+    parser.add_argument("--seconds", type=float, default=10)
+    parser.add_argument("--rounds", type=int, default=settings.PASSWORD_BCRYPT_ROUNDS)
+    args = parser.parse_args()
+
+    app.state.context = CryptContext(schemes=["bcrypt"], deprecated="auto", bcrypt__rounds=args.rounds)
+    app.state.hashed = app.state.context.hash(PASSWORD)
+    app.state.hasher = PasswordHasher(
+        workers=settings.PASSWORD_HASH_WORKERS,
+        max_pending=settings.PASSWORD_HASH_MAX_PENDING,
+        queue_timeout=settings.PASSWORD_HASH_QUEUE_TIMEOUT,
+        rounds=args.rounds
+    )
+
+    print(f"{args.flood} login clients for {args.seconds:.0f}s, bcrypt rounds {args.rounds}, {os.cpu_count()} CPU")
+    try:
+        for name, path in (("legacy", "/legacy-login"), ("pooled", "/pooled-login")):
+            latencies, outcomes = asyncio.run(run(path, args.flood, args.seconds))
+            latencies.sort()
+            p99 = latencies[min(len(latencies) - 1, int(len(latencies) * 0.99))]
+            print(
+                f"{name:7} webhook p50 {statistics.median(latencies) * 1000:7.1f} ms  "
+                f"p99 {p99 * 1000:7.1f} ms  ({len(latencies)} probes)  "
+                f"logins {outcomes.get(200, 0):5d} ok {outcomes.get(503, 0):6d} shed"
+            )
+    finally:
+        app.state.hasher.shutdown()
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,155 @@
+"""Webhook requests/sec: sync session on the event loop, async session, buffered ingestion.
+
+Usage: python -m benchmarks.bench_webhooks [--requests 2000] [--concurrency 10] [--latency-ms 5]
+
+Runs against a throwaway SQLite database unless BENCH_DATABASE_URL points
+at a (disposable) PostgreSQL database. SQLite answers in microseconds, so
+--latency-ms adds a per-statement delay standing in for the network round
+trip to Postgres: in the calling thread for the sync driver, and in the
+aiosqlite worker thread (off the event loop) for the async driver.
+The buffered run appends to a fsynced file buffer and does not drain it.
+
+Keep --concurrency within the sync pool (5 + 10 overflow): past that the
+original handler blocks the event loop waiting on a pooled connection held
+by a request that can no longer resume, until the pool timeout fires.
+"""
+import os
+import tempfile
+
+os.environ["DATABASE_URL"] = os.environ.get("BENCH_DATABASE_URL", "sqlite:///./bench_webhooks.db")
+os.environ.pop("ASYNC_DATABASE_URL", None)
+os.environ.setdefault("CACHE_INVALIDATION_BACKEND", "memory")
+
+import argparse
+import asyncio
+import functools
+import time
+import aiosqlite
+import httpx
+from fastapi import APIRouter, Depends, FastAPI, Request
+from sqlalchemy import event
+from sqlalchemy.orm import Session
+from app.api import webhooks
+from app.core.config import settings
+from app.core.database import Base, async_engine, engine, get_db
+from app.models.models import Chain, ExecutionLog, ExecutionStatus, TriggerType, User
+from app.services.payload_store import set_trigger_data
+from app.services.webhook_buffer import FileBuffer
+
+legacy_router = APIRouter(prefix="/webhooks")
+
+
+@legacy_router.post("/{chain_id}")
+async def legacy_webhook_trigger(chain_id: int, request: Request, db: Session = Depends(get_db)):
+    """The original handler: sync queries and commit on the event loop"""
+    chain = db.query(Chain).filter(Chain.id == chain_id).first()
+    if not chain or not chain.is_active or chain.trigger_type != TriggerType.WEBHOOK:
+        return {"error": "Chain not found"}, 404
+    try:
+        body = await request.json()
+    except Exception:
+        body = {}
+    execution_log = ExecutionLog(chain_id=chain_id, status=ExecutionStatus.PENDING)
+    set_trigger_data(db, execution_log, {"webhook_data": body, "headers": dict(request.headers)})
+    db.add(execution_log)
+    db.commit()
+    db.refresh(execution_log)
+    webhooks.execute_chain.delay(execution_log.id)
+    return {"execution_log_id": execution_log.id}
+
+
+def add_latency(seconds: float):
+    def delay_sync(*args):
+        time.sleep(seconds)
+
+    event.listen(engine, "before_cursor_execute", delay_sync)
+
+    original_execute = aiosqlite.Connection._execute
+
+    async def delayed_execute(self, fn, *args, **kwargs):
+        if getattr(fn, "__name__", "") in ("execute", "executemany"):
+            @functools.wraps(fn)
+            def delayed(*fn_args, **fn_kwargs):
+                time.sleep(seconds)
+                return fn(*fn_args, **fn_kwargs)
+            return await original_execute(self, delayed, *args, **kwargs)
+        return await original_execute(self, fn, *args, **kwargs)
+
+    aiosqlite.Connection._execute = delayed_execute
+
+
+def seed() -> int:
+    with Session(engine) as db:
+        user = User(email="bench@example.com", hashed_password="x")
+        db.add(user)
+        db.flush()
+        chain = Chain(name="hook", user_id=user.id, trigger_type=TriggerType.WEBHOOK,
+                      trigger_config={}, actions=[])
+        db.add(chain)
+        db.commit()
+        return chain.id
+
+
+async def load(app: FastAPI, chain_id: int, requests: int, concurrency: int) -> float:
+    transport = httpx.ASGITransport(app=app)  # Does not run startup events
+    async with async_engine.connect():
+        pass
+    remaining = iter(range(requests))
+
+    async with httpx.AsyncClient(transport=transport, base_url="http://bench") as client:
+        async def worker():
+            for i in remaining:
+                response = await client.post(f"/webhooks/{chain_id}", json={"event": i})
+                response.raise_for_status()
+
+        started = time.perf_counter()
+        await asyncio.gather(*(worker() for _ in range(concurrency)))
+        return requests / (time.perf_counter() - started)
+
+
+def main():
+    parser = argparse.ArgumentParser()
+    parser.add_argument("--requests", type=int, default=2000)
+    parser.add_argument("--concurrency", type=int, default=10)
+    parser.add_argument("--latency-ms", type=float, default=5.0)
+    args = parser.parse_args()
+
+    url = os.environ["DATABASE_URL"]
+    webhooks.execute_chain.delay = lambda execution_log_id: None  # No broker needed
+    if url.startswith("sqlite") and args.latency_ms:
+        add_latency(args.latency_ms / 1000)
+
+    Base.metadata.drop_all(bind=engine)
+    Base.metadata.create_all(bind=engine)
+    chain_id = seed()
+
+    legacy_app = FastAPI()
+    legacy_app.include_router(legacy_router)
+    current_app = FastAPI()
+    current_app.include_router(webhooks.router)
+
+    buffer_dir = tempfile.TemporaryDirectory()
+    buffered = (("WEBHOOK_INGEST_MODE", "buffered"),)
+    webhooks.get_webhook_buffer = lambda: FileBuffer(buffer_dir.name, fsync=True)
+
+    print(f"{args.requests} webhooks, concurrency {args.concurrency}, latency {args.latency_ms}ms/statement")
+    for name, app, overrides in (
+        ("sync session on the event loop", legacy_app, ()),
+        ("async session", current_app, ()),
+        ("buffered (file, fsync)", current_app, buffered),
+    ):
+        for key, value in overrides:
+            setattr(settings, key, value)
+        rate = asyncio.run(load(app, chain_id, args.requests, args.concurrency))
+        print(f"{name:32} {rate:8.1f} req/s")
+        asyncio.run(async_engine.dispose())
+    buffer_dir.cleanup()
+
+    Base.metadata.drop_all(bind=engine)
+    engine.dispose()
+    if url.startswith("sqlite:///./"):
+        os.remove(url[len("sqlite:///"):])
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,86 @@
+"""Initial schema, as created by create_all before migrations existed
+
+Revision ID: 0001
+Revises:
+Create Date: 2026-10-18
+
+Databases created by the old startup create_all are at this revision:
+run ``alembic stamp 0001`` once, then ``alembic upgrade head``.
+"""
+from alembic import op
+import sqlalchemy as sa
+
+revision = "0001"
+down_revision = None
+branch_labels = None
+depends_on = None
+
+trigger_type = sa.Enum("WEBHOOK", "SCHEDULE", "MANUAL", name="triggertype")
+execution_status = sa.Enum("PENDING", "RUNNING", "SUCCESS", "FAILED", name="executionstatus")
+
+
+def upgrade():
+    op.create_table(
+        "users",
+        sa.Column("id", sa.Integer(), primary_key=True),
+        sa.Column("email", sa.String(), nullable=False),
+        sa.Column("hashed_password", sa.String(), nullable=False),
+        sa.Column("balance", sa.Float(), nullable=True),
+        sa.Column("is_active", sa.Boolean(), nullable=True),
+        sa.Column("created_at", sa.DateTime(), nullable=True),
+    )
+    op.create_index("ix_users_id", "users", ["id"])
+    op.create_index("ix_users_email", "users", ["email"], unique=True)
+    
+    op.create_table(
+        "chains",
+        sa.Column("id", sa.Integer(), primary_key=True),
+        sa.Column("name", sa.String(), nullable=False),
+        sa.Column("description", sa.Text(), nullable=True),
+        sa.Column("user_id", sa.Integer(), sa.ForeignKey("users.id"), nullable=False),
+        sa.Column("trigger_type", trigger_type, nullable=False),
+        sa.Column("trigger_config", sa.JSON(), nullable=False),
+        sa.Column("actions", sa.JSON(), nullable=False),
+        sa.Column("is_active", sa.Boolean(), nullable=True),
+        sa.Column("execution_cost", sa.Float(), nullable=True),
+        sa.Column("created_at", sa.DateTime(), nullable=True),
+        sa.Column("updated_at", sa.DateTime(), nullable=True),
+    )
+    op.create_index("ix_chains_id", "chains", ["id"])
+    
+    op.create_table(
+        "execution_logs",
+        sa.Column("id", sa.Integer(), primary_key=True),
+        sa.Column("chain_id", sa.Integer(), sa.ForeignKey("chains.id"), nullable=False),
+        sa.Column("status", execution_status, nullable=True),
+        sa.Column("trigger_data", sa.JSON(), nullable=True),
+        sa.Column("execution_result", sa.JSON(), nullable=True),
+        sa.Column("error_message", sa.Text(), nullable=True),
+        sa.Column("cost", sa.Float(), nullable=True),
+        sa.Column("charged", sa.Boolean(), nullable=True),
+        sa.Column("started_at", sa.DateTime(), nullable=True),
+        sa.Column("completed_at", sa.DateTime(), nullable=True),
+        sa.Column("created_at", sa.DateTime(), nullable=True),
+    )
+    op.create_index("ix_execution_logs_id", "execution_logs", ["id"])
+    
+    op.create_table(
+        "transactions",
+        sa.Column("id", sa.Integer(), primary_key=True),
+        sa.Column("user_id", sa.Integer(), sa.ForeignKey("users.id"), nullable=False),
+        sa.Column("amount", sa.Float(), nullable=False),
+        sa.Column("description", sa.String(), nullable=False),
+        sa.Column("stripe_payment_intent_id", sa.String(), nullable=True),
+        sa.Column("execution_log_id", sa.Integer(), sa.ForeignKey("execution_logs.id"), nullable=True),
+        sa.Column("created_at", sa.DateTime(), nullable=True),
+    )
+    op.create_index("ix_transactions_id", "transactions", ["id"])
+
+
+def downgrade():
+    op.drop_table("transactions")
+    op.drop_table("execution_logs")
+    op.drop_table("chains")
+    op.drop_table("users")
+    execution_status.drop(op.get_bind(), checkfirst=True)
+    trigger_type.drop(op.get_bind(), checkfirst=True)
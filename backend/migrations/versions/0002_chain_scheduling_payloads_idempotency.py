@@ -0,0 +1,53 @@
+"""Columns and tables added since the initial schema
+
+Revision ID: 0002
+Revises: 0001
+Create Date: 2026-10-18
+
+- chains.max_parallel_actions and chains.next_run_at
+- payload_blobs and the execution_logs payload references
+- execution_logs.idempotency_key with its per-chain unique constraint
+"""
+from alembic import op
+import sqlalchemy as sa
+
+revision = "0002"
+down_revision = "0001"
+branch_labels = None
+depends_on = None
+
+
+def upgrade():
+    with op.batch_alter_table("chains") as batch:
+        batch.add_column(sa.Column("max_parallel_actions", sa.Integer(), nullable=True))
+        batch.add_column(sa.Column("next_run_at", sa.DateTime(), nullable=True))
+    
+    op.create_table(
+        "payload_blobs",
+        sa.Column("id", sa.Integer(), primary_key=True),
+        sa.Column("codec", sa.String(), nullable=False),
+        sa.Column("size", sa.Integer(), nullable=False),
+        sa.Column("data", sa.LargeBinary(), nullable=False),
+        sa.Column("created_at", sa.DateTime(), nullable=True),
+    )
+    op.create_index("ix_payload_blobs_id", "payload_blobs", ["id"])
+    
+    with op.batch_alter_table("execution_logs") as batch:
+        batch.add_column(sa.Column("trigger_data_ref", sa.String(), nullable=True))
+        batch.add_column(sa.Column("execution_result_ref", sa.String(), nullable=True))
+        batch.add_column(sa.Column("idempotency_key", sa.String(80), nullable=True))
+        batch.create_unique_constraint("uq_execution_logs_idempotency_key", ["chain_id", "idempotency_key"])
+
+
+def downgrade():
+    with op.batch_alter_table("execution_logs") as batch:
+        batch.drop_constraint("uq_execution_logs_idempotency_key", type_="unique")
+        batch.drop_column("idempotency_key")
+        batch.drop_column("execution_result_ref")
+        batch.drop_column("trigger_data_ref")
+    
+    op.drop_table("payload_blobs")
+    
+    with op.batch_alter_table("chains") as batch:
+        batch.drop_column("next_run_at")
+        batch.drop_column("max_parallel_actions")
@@ -0,0 +1,52 @@
+"""Indexes for the hot queries of the API and workers
+
+Revision ID: 0003
+Revises: 0002
+Create Date: 2026-10-18
+
+- ix_chains_schedule_due: the scheduler's due-chain range scan (tasks.claim_due_chains)
+- ix_chains_user_created: a user's chains, keyset paginated (GET /chains/)
+- ix_execution_logs_chain_created: a chain's executions, keyset paginated
+  (GET /chains/{id}/executions); its chain_id prefix also serves chain lookups
+- ix_execution_logs_idempotency_expiry: rows whose idempotency key is still
+  set, by age (tasks.expire_idempotency_keys)
+- ix_transactions_user_created: a user's transactions, keyset paginated
+  (GET /users/me/transactions)
+
+On PostgreSQL the indexes are built CONCURRENTLY, so writes continue while
+they build on a live database.
+"""
+from alembic import op
+import sqlalchemy as sa
+
+revision = "0003"
+down_revision = "0002"
+branch_labels = None
+depends_on = None
+
+INDEXES = [
+    ("ix_chains_schedule_due", "chains", ["trigger_type", "is_active", "next_run_at"], None),
+    ("ix_chains_user_created", "chains", ["user_id", "created_at", "id"], None),
+    ("ix_execution_logs_chain_created", "execution_logs", ["chain_id", "created_at", "id"], None),
+    ("ix_execution_logs_idempotency_expiry", "execution_logs", ["created_at"], "idempotency_key IS NOT NULL"),
+    ("ix_transactions_user_created", "transactions", ["user_id", "created_at", "id"], None),
+]
+
+
+def upgrade():
+    postgresql = op.get_bind().dialect.name == "postgresql"
+    with op.get_context().autocommit_block():
+        for name, table, columns, where in INDEXES:
+            op.create_index(
+                name, table, columns,
+                postgresql_concurrently=postgresql,
+                postgresql_where=sa.text(where) if where else None,
+                sqlite_where=sa.text(where) if where else None
+            )
+
+
+def downgrade():
+    postgresql = op.get_bind().dialect.name == "postgresql"
+    with op.get_context().autocommit_block():
+        for name, table, _, _ in reversed(INDEXES):
+            op.drop_index(name, table_name=table, postgresql_concurrently=postgresql)
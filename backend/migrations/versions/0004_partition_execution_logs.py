@@ -0,0 +1,114 @@
+"""Optionally range-partition execution_logs by month (PostgreSQL)
+
+Revision ID: 0004
+Revises: 0003
+Create Date: 2026-10-18
+
+Runs only with EXECUTION_LOGS_PARTITIONED=true on PostgreSQL; otherwise
+it is a no-op. To partition later, downgrade to 0003 and upgrade again with
+the setting on. Rows are copied into the partitioned table, so plan for
+the time and disk it takes on a large execution_logs.
+
+PostgreSQL requires the partition key in every unique constraint, which
+changes two things:
+- the primary key becomes (id, created_at) and the idempotency unique
+  constraint becomes (chain_id, idempotency_key, created_at). Duplicate
+  deliveries are still rejected by the database: the non-partitioned
+  execution_idempotency_keys table (revision 0011) keeps
+  (chain_id, idempotency_key) unique;
+- transactions.execution_log_id loses its foreign key, because no unique
+  constraint on id alone can exist. Ledger rows are only written by
+  billing for an execution log it has just loaded, which is what keeps
+  the reference valid from then on.
+
+Partitions for upcoming months are created by the
+maintain_execution_log_partitions beat task; rows outside every monthly
+partition land in execution_logs_default.
+"""
+from datetime import datetime
+from alembic import op
+import sqlalchemy as sa
+from app.core.config import settings
+
+revision = "0004"
+down_revision = "0003"
+branch_labels = None
+depends_on = None
+
+
+def month_start(dt):
+    return datetime(dt.year, dt.month, 1)
+
+
+def next_month(month):
+    return datetime(month.year + month.month // 12, month.month % 12 + 1, 1)
+
+
+def is_partitioned(bind) -> bool:
+    return bind.execute(sa.text(
+        "SELECT 1 FROM pg_partitioned_table p JOIN pg_class c ON c.oid = p.partrelid "
+        "WHERE c.relname = 'execution_logs' AND pg_table_is_visible(c.oid)"
+    )).first() is not None
+
+
+def create_indexes(unique_columns: str):
+    op.execute(f"ALTER TABLE execution_logs ADD CONSTRAINT uq_execution_logs_idempotency_key UNIQUE ({unique_columns})")
+    op.execute("ALTER TABLE execution_logs ADD CONSTRAINT execution_logs_chain_id_fkey FOREIGN KEY (chain_id) REFERENCES chains (id)")
+    op.execute("CREATE INDEX ix_execution_logs_id ON execution_logs (id)")
+    op.execute("CREATE INDEX ix_execution_logs_chain_created ON execution_logs (chain_id, created_at, id)")
+    op.execute("CREATE INDEX ix_execution_logs_idempotency_expiry ON execution_logs (created_at) WHERE idempotency_key IS NOT NULL")
+
+
+def replace_table(partition_clause: str):
+    """Swap execution_logs for a copy with the same columns, keeping its id sequence"""
+    op.execute("ALTER TABLE transactions DROP CONSTRAINT IF EXISTS transactions_execution_log_id_fkey")
+    op.execute("ALTER TABLE execution_logs RENAME TO execution_logs_old")
+    op.execute(f"CREATE TABLE execution_logs (LIKE execution_logs_old INCLUDING DEFAULTS) {partition_clause}")
+    op.execute("ALTER SEQUENCE execution_logs_id_seq OWNED BY execution_logs.id")
+
+
+def upgrade():
+    bind = op.get_bind()
+    if not settings.EXECUTION_LOGS_PARTITIONED or bind.dialect.name != "postgresql" or is_partitioned(bind):
+        return
+    
+    # The partition key must be set on every row
+    op.execute("UPDATE execution_logs SET created_at = COALESCE(started_at, now() AT TIME ZONE 'utc') WHERE created_at IS NULL")
+    replace_table("PARTITION BY RANGE (created_at)")
+    op.execute("ALTER TABLE execution_logs ALTER COLUMN created_at SET NOT NULL")
+    
+    first = bind.execute(sa.text("SELECT min(created_at) FROM execution_logs_old")).scalar()
+    now = datetime.utcnow()
+    month = month_start(min(first or now, now))
+    last = month_start(now)
+    for _ in range(settings.EXECUTION_LOGS_PARTITION_MONTHS_AHEAD):
+        last = next_month(last)
+    while month <= last:
+        op.execute(
+            f"CREATE TABLE execution_logs_p{month:%Y_%m} PARTITION OF execution_logs "
+            f"FOR VALUES FROM ('{month:%Y-%m-%d}') TO ('{next_month(month):%Y-%m-%d}')"
+        )
+        month = next_month(month)
+    op.execute("CREATE TABLE execution_logs_default PARTITION OF execution_logs DEFAULT")
+    
+    op.execute("INSERT INTO execution_logs SELECT * FROM execution_logs_old")
+    op.execute("DROP TABLE execution_logs_old")
+    op.execute("ALTER TABLE execution_logs ADD PRIMARY KEY (id, created_at)")
+    create_indexes("chain_id, idempotency_key, created_at")
+
+
+def downgrade():
+    bind = op.get_bind()
+    if bind.dialect.name != "postgresql" or not is_partitioned(bind):
+        return
+    
+    replace_table("")
+    op.execute("INSERT INTO execution_logs SELECT * FROM execution_logs_old")
+    op.execute("DROP TABLE execution_logs_old CASCADE")
+    op.execute("ALTER TABLE execution_logs ALTER COLUMN created_at DROP NOT NULL")
+    op.execute("ALTER TABLE execution_logs ADD PRIMARY KEY (id)")
+    create_indexes("chain_id, idempotency_key")
+    op.execute(
+        "ALTER TABLE transactions ADD CONSTRAINT transactions_execution_log_id_fkey "
+        "FOREIGN KEY (execution_log_id) REFERENCES execution_logs (id)"
+    )
@@ -0,0 +1,39 @@
+"""User plans and daily rollups of archived execution logs
+
+Revision ID: 0005
+Revises: 0004
+Create Date: 2026-10-18
+"""
+from alembic import op
+import sqlalchemy as sa
+
+revision = "0005"
+down_revision = "0004"
+branch_labels = None
+depends_on = None
+
+
+def upgrade():
+    with op.batch_alter_table("users") as batch:
+        batch.add_column(sa.Column("plan", sa.String(), nullable=False, server_default="free"))
+    
+    op.create_table(
+        "execution_daily_rollups",
+        sa.Column("id", sa.Integer(), primary_key=True),
+        sa.Column("chain_id", sa.Integer(), sa.ForeignKey("chains.id"), nullable=False),
+        sa.Column("day", sa.Date(), nullable=False),
+        sa.Column("status_counts", sa.JSON(), nullable=False),
+        sa.Column("total_cost", sa.Float(), nullable=False),
+        sa.Column("duration_histogram", sa.JSON(), nullable=False),
+        sa.Column("archived_rows", sa.Integer(), nullable=False),
+        sa.Column("updated_at", sa.DateTime(), nullable=True),
+        sa.UniqueConstraint("chain_id", "day", name="uq_execution_daily_rollups_chain_day"),
+    )
+    op.create_index("ix_execution_daily_rollups_id", "execution_daily_rollups", ["id"])
+
+
+def downgrade():
+    op.drop_table("execution_daily_rollups")
+    
+    with op.batch_alter_table("users") as batch:
+        batch.drop_column("plan")
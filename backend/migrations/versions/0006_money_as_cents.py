@@ -0,0 +1,51 @@
+"""Store money as integer cents instead of floats
+
+Revision ID: 0006
+Revises: 0005
+Create Date: 2026-10-18
+
+Existing float values are rounded to whole cents. The application reads
+and writes these columns through the Money type, as Decimal amounts.
+"""
+from alembic import op
+import sqlalchemy as sa
+
+revision = "0006"
+down_revision = "0005"
+branch_labels = None
+depends_on = None
+
+COLUMNS = [
+    ("users", "balance", False),
+    ("chains", "execution_cost", True),
+    ("execution_logs", "cost", True),
+    ("transactions", "amount", False),
+    ("execution_daily_rollups", "total_cost", False),
+]
+
+
+def upgrade():
+    postgresql = op.get_bind().dialect.name == "postgresql"
+    op.execute("UPDATE users SET balance = 0 WHERE balance IS NULL")
+    for table, column, nullable in COLUMNS:
+        if not postgresql:
+            # SQLite keeps the stored values when the column type changes
+            op.execute(f"UPDATE {table} SET {column} = round({column} * 100)")
+        with op.batch_alter_table(table) as batch:
+            batch.alter_column(
+                column, type_=sa.BigInteger(), existing_type=sa.Float(), nullable=nullable,
+                postgresql_using=f"round({column} * 100)::bigint"
+            )
+
+
+def downgrade():
+    postgresql = op.get_bind().dialect.name == "postgresql"
+    for table, column, nullable in reversed(COLUMNS):
+        with op.batch_alter_table(table) as batch:
+            batch.alter_column(
+                column, type_=sa.Float(), existing_type=sa.BigInteger(),
+                nullable=True if table == "users" else nullable,
+                postgresql_using=f"{column} / 100.0"
+            )
+        if not postgresql:
+            op.execute(f"UPDATE {table} SET {column} = {column} / 100.0")
@@ -0,0 +1,40 @@
+"""Link executions to the ledger row that charged them
+
+Revision ID: 0007
+Revises: 0006
+Create Date: 2026-10-18
+
+Existing charged executions are linked to their per-execution
+transactions.
+"""
+from alembic import op
+import sqlalchemy as sa
+
+revision = "0007"
+down_revision = "0006"
+branch_labels = None
+depends_on = None
+
+
+def upgrade():
+    with op.batch_alter_table("execution_logs") as batch:
+        batch.add_column(sa.Column("transaction_id", sa.Integer(), nullable=True))
+    
+    op.execute(
+        "UPDATE execution_logs SET transaction_id = "
+        "(SELECT max(t.id) FROM transactions t WHERE t.execution_log_id = execution_logs.id) "
+        "WHERE charged"
+    )
+    op.create_index("ix_execution_logs_transaction_id", "execution_logs", ["transaction_id"])
+    op.create_index(
+        "ix_execution_logs_unbilled", "execution_logs", ["id"],
+        postgresql_where=sa.text("charged AND transaction_id IS NULL"),
+        sqlite_where=sa.text("charged AND transaction_id IS NULL")
+    )
+
+
+def downgrade():
+    op.drop_index("ix_execution_logs_unbilled", table_name="execution_logs")
+    op.drop_index("ix_execution_logs_transaction_id", table_name="execution_logs")
+    with op.batch_alter_table("execution_logs") as batch:
+        batch.drop_column("transaction_id")
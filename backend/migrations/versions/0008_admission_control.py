@@ -0,0 +1,54 @@
+"""Balance reservations and parked executions for admission control
+
+Revision ID: 0008
+Revises: 0007
+Create Date: 2026-10-18
+
+PostgreSQL cannot drop a value from an enum type, so downgrading keeps
+PARKED in executionstatus; parked executions are failed first.
+"""
+from alembic import op
+import sqlalchemy as sa
+
+revision = "0008"
+down_revision = "0007"
+branch_labels = None
+depends_on = None
+
+
+def upgrade():
+    if op.get_bind().dialect.name == "postgresql":
+        # ADD VALUE cannot run inside a transaction block before PostgreSQL 12
+        with op.get_context().autocommit_block():
+            op.execute("ALTER TYPE executionstatus ADD VALUE IF NOT EXISTS 'PARKED'")
+    
+    with op.batch_alter_table("users") as batch:
+        batch.add_column(sa.Column("reserved", sa.BigInteger(), nullable=False, server_default="0"))
+    with op.batch_alter_table("execution_logs") as batch:
+        batch.add_column(sa.Column("reserved_amount", sa.BigInteger(), nullable=True))
+        batch.add_column(sa.Column("reserved_at", sa.DateTime(), nullable=True))
+    
+    op.create_index(
+        "ix_execution_logs_parked", "execution_logs", ["id"],
+        postgresql_where=sa.text("status = 'PARKED'"),
+        sqlite_where=sa.text("status = 'PARKED'")
+    )
+    op.create_index(
+        "ix_execution_logs_reserved", "execution_logs", ["reserved_at"],
+        postgresql_where=sa.text("reserved_amount IS NOT NULL"),
+        sqlite_where=sa.text("reserved_amount IS NOT NULL")
+    )
+
+
+def downgrade():
+    op.execute(
+        "UPDATE execution_logs SET status = 'FAILED', error_message = 'Insufficient balance' "
+        "WHERE status = 'PARKED'"
+    )
+    op.drop_index("ix_execution_logs_reserved", table_name="execution_logs")
+    op.drop_index("ix_execution_logs_parked", table_name="execution_logs")
+    with op.batch_alter_table("execution_logs") as batch:
+        batch.drop_column("reserved_at")
+        batch.drop_column("reserved_amount")
+    with op.batch_alter_table("users") as batch:
+        batch.drop_column("reserved")
@@ -0,0 +1,48 @@
+"""Per-chain hourly and daily execution stats
+
+Revision ID: 0009
+Revises: 0008
+Create Date: 2026-10-18
+
+Existing execution logs start out unrecorded, so the first passes of
+aggregate_execution_stats backfill the stats from the retained history.
+"""
+from alembic import op
+import sqlalchemy as sa
+
+revision = "0009"
+down_revision = "0008"
+branch_labels = None
+depends_on = None
+
+
+def upgrade():
+    op.create_table(
+        "execution_stats",
+        sa.Column("id", sa.Integer(), primary_key=True),
+        sa.Column("chain_id", sa.Integer(), sa.ForeignKey("chains.id"), nullable=False),
+        sa.Column("period", sa.String(8), nullable=False),
+        sa.Column("period_start", sa.DateTime(), nullable=False),
+        sa.Column("status_counts", sa.JSON(), nullable=False),
+        sa.Column("total_cost", sa.BigInteger(), nullable=False),
+        sa.Column("duration_histogram", sa.JSON(), nullable=False),
+        sa.Column("updated_at", sa.DateTime(), nullable=True),
+        sa.UniqueConstraint("chain_id", "period", "period_start", name="uq_execution_stats_chain_period_start"),
+    )
+    op.create_index("ix_execution_stats_id", "execution_stats", ["id"])
+    
+    with op.batch_alter_table("execution_logs") as batch:
+        batch.add_column(sa.Column("stats_recorded", sa.Boolean(), nullable=False, server_default=sa.false()))
+    op.create_index(
+        "ix_execution_logs_unrecorded", "execution_logs", ["id"],
+        postgresql_where=sa.text("status IN ('SUCCESS', 'FAILED') AND NOT stats_recorded"),
+        sqlite_where=sa.text("status IN ('SUCCESS', 'FAILED') AND NOT stats_recorded")
+    )
+
+
+def downgrade():
+    op.drop_index("ix_execution_logs_unrecorded", table_name="execution_logs")
+    with op.batch_alter_table("execution_logs") as batch:
+        batch.drop_column("stats_recorded")
+    
+    op.drop_table("execution_stats")
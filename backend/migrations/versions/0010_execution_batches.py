@@ -0,0 +1,42 @@
+"""Batch triggers
+
+Revision ID: 0010
+Revises: 0009
+Create Date: 2026-10-18
+"""
+from alembic import op
+import sqlalchemy as sa
+
+revision = "0010"
+down_revision = "0009"
+branch_labels = None
+depends_on = None
+
+
+def upgrade():
+    op.create_table(
+        "execution_batches",
+        sa.Column("id", sa.Integer(), primary_key=True),
+        sa.Column("chain_id", sa.Integer(), sa.ForeignKey("chains.id"), nullable=False),
+        sa.Column("total", sa.Integer(), nullable=False),
+        sa.Column("created_at", sa.DateTime(), nullable=True),
+    )
+    op.create_index("ix_execution_batches_id", "execution_batches", ["id"])
+    
+    with op.batch_alter_table("execution_logs") as batch:
+        batch.add_column(sa.Column("batch_id", sa.Integer(), nullable=True))
+        batch.create_foreign_key("fk_execution_logs_batch_id", "execution_batches", ["batch_id"], ["id"])
+    op.create_index(
+        "ix_execution_logs_batch_status", "execution_logs", ["batch_id", "status"],
+        postgresql_where=sa.text("batch_id IS NOT NULL"),
+        sqlite_where=sa.text("batch_id IS NOT NULL")
+    )
+
+
+def downgrade():
+    op.drop_index("ix_execution_logs_batch_status", table_name="execution_logs")
+    with op.batch_alter_table("execution_logs") as batch:
+        batch.drop_constraint("fk_execution_logs_batch_id", type_="foreignkey")
+        batch.drop_column("batch_id")
+    
+    op.drop_table("execution_batches")
@@ -0,0 +1,39 @@
+"""Idempotency keys in their own table
+
+Revision ID: 0011
+Revises: 0010
+Create Date: 2026-10-18
+
+A partitioned execution_logs cannot keep (chain_id, idempotency_key)
+unique, so the keys also go to execution_idempotency_keys, which is never
+partitioned. Keys still held by execution logs are copied over.
+"""
+from alembic import op
+import sqlalchemy as sa
+
+revision = "0011"
+down_revision = "0010"
+branch_labels = None
+depends_on = None
+
+
+def upgrade():
+    op.create_table(
+        "execution_idempotency_keys",
+        sa.Column("chain_id", sa.Integer(), sa.ForeignKey("chains.id", ondelete="CASCADE"), primary_key=True),
+        sa.Column("idempotency_key", sa.String(80), primary_key=True),
+        sa.Column("execution_log_id", sa.Integer(), nullable=False),
+        sa.Column("created_at", sa.DateTime(), nullable=False),
+    )
+    op.create_index("ix_execution_idempotency_keys_created_at", "execution_idempotency_keys", ["created_at"])
+    # On a partitioned table a key may repeat across created_at; keep the first
+    op.execute(
+        "INSERT INTO execution_idempotency_keys (chain_id, idempotency_key, execution_log_id, created_at) "
+        "SELECT chain_id, idempotency_key, min(id), min(COALESCE(created_at, CURRENT_TIMESTAMP)) FROM execution_logs "
+        "WHERE idempotency_key IS NOT NULL GROUP BY chain_id, idempotency_key"
+    )
+
+
+def downgrade():
+    op.drop_index("ix_execution_idempotency_keys_created_at", table_name="execution_idempotency_keys")
+    op.drop_table("execution_idempotency_keys")
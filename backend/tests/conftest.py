@@ -1,9 +1,19 @@
 # Test configuration and fixtures
+import os
+
+os.environ.setdefault("CACHE_INVALIDATION_BACKEND", "memory")
+os.environ.setdefault("WEBHOOK_IDEMPOTENCY_FRONT", "memory")
+os.environ.setdefault("DATABASE_AUTO_CREATE", "true")
+
 import pytest
 from sqlalchemy import create_engine
+from sqlalchemy.ext.asyncio import async_sessionmaker, create_async_engine
 from sqlalchemy.orm import sessionmaker
-from app.core.database import Base, get_db
+from sqlalchemy.pool import NullPool
+from app.core.database import Base, async_database_url, get_async_db, get_db
 from app.main import app
+from app.services.chain_cache import get_chain_cache
+from app.services.principal_cache import get_principal_cache
 
 # Use in-memory SQLite for tests
 SQLALCHEMY_DATABASE_URL = "sqlite:///./test.db"
@@ -13,6 +23,10 @@ engine = create_engine(
 )
 TestingSessionLocal = sessionmaker(autocommit=False, autoflush=False, bind=engine)
 
+# Each TestClient runs its own event loop, so async connections are not pooled
+async_engine = create_async_engine(async_database_url(SQLALCHEMY_DATABASE_URL), poolclass=NullPool)
+TestingAsyncSessionLocal = async_sessionmaker(async_engine, autoflush=False, expire_on_commit=False)
+
 
 @pytest.fixture(scope="function")
 def db_session():
@@ -24,6 +38,9 @@ def db_session():
     finally:
         db.close()
         Base.metadata.drop_all(bind=engine)
+        # Ids are reused by the next test
+        get_chain_cache().invalidate()
+        get_principal_cache().invalidate()
 
 
 @pytest.fixture(scope="function")
@@ -35,7 +52,12 @@ def client(db_session):
         finally:
             pass
     
+    async def override_get_async_db():
+        async with TestingAsyncSessionLocal() as db:
+            yield db
+    
     app.dependency_overrides[get_db] = override_get_db
+    app.dependency_overrides[get_async_db] = override_get_async_db
     from fastapi.testclient import TestClient
     with TestClient(app) as test_client:
         yield test_client
@@ -0,0 +1,63 @@
+import time
+import pytest
+from app.services.action_graph import ActionGraphError, action_dependencies, validate_action_graph
+from app.workers import actions as sync_actions
+from app.workers.async_actions import run_actions_async
+from app.workers.engine import AsyncEngine
+
+
+def test_default_dependencies_are_sequential():
+    """Test actions without depends_on wait for the previous action"""
+    actions = [{"type": "a"}, {"type": "b"}, {"type": "c"}]
+    assert action_dependencies(actions) == [[], [0], [1]]
+
+
+def test_dependencies_resolve_ids_and_indices():
+    """Test depends_on accepts action ids and positions"""
+    actions = [
+        {"id": "fetch", "type": "http_request"},
+        {"type": "send_email", "depends_on": ["fetch"]},
+        {"type": "telegram_message", "depends_on": [0]},
+        {"type": "http_request", "depends_on": [1, 2]},
+    ]
+    assert action_dependencies(actions) == [[], [0], [0], [1, 2]]
+
+
+@pytest.mark.parametrize("actions", [
+    [{"id": "a", "depends_on": ["b"]}, {"id": "b", "depends_on": ["a"]}],
+    [{"id": "a", "depends_on": ["a"]}],
+    [{"id": "a", "depends_on": ["missing"]}],
+    [{"id": "a"}, {"id": "a"}],
+])
+def test_invalid_graphs_are_rejected(actions):
+    """Test cycles, unknown references and duplicate ids are rejected"""
+    with pytest.raises(ActionGraphError):
+        validate_action_graph(actions)
+
+
+def test_independent_actions_run_concurrently(monkeypatch):
+    """Test branches of the graph run in parallel up to the cap"""
+    def slow_action(action):
+        time.sleep(0.2)
+        return {"action_type": action["type"], "result": {}, "success": True}
+
+    monkeypatch.setattr(sync_actions, "run_action", slow_action)
+    actions = [{"type": name, "depends_on": []} for name in ("a", "b", "c", "d")]
+
+    started = time.monotonic()
+    results = sync_actions.run_actions(actions, max_parallel=4)
+    assert time.monotonic() - started < 0.6
+    assert [r["action_type"] for r in results] == ["a", "b", "c", "d"]
+
+
+def test_async_engine_follows_graph():
+    """Test the asyncio engine returns results in declaration order"""
+    actions = [
+        {"id": "first", "type": "unknown_a"},
+        {"type": "unknown_b", "depends_on": []},
+        {"type": "unknown_c", "depends_on": ["first"]},
+    ]
+    results = AsyncEngine(max_in_flight=1).run(run_actions_async(actions, max_parallel=2))
+
+    assert [r["action_type"] for r in results] == ["unknown_a", "unknown_b", "unknown_c"]
+    assert results == sync_actions.run_actions(actions, max_parallel=2)
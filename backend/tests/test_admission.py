@@ -0,0 +1,108 @@
+from datetime import datetime, timedelta
+from decimal import Decimal
+from app.api import webhooks
+from app.core.config import settings
+from app.core.security import create_access_token
+from app.models.models import Chain, ExecutionLog, ExecutionStatus, TriggerType, User
+from app.services.admission import admit, admit_parked, release_stale_reservations
+from app.services.billing import credit
+from app.services.chain_cache import invalidate_chain
+from app.workers import tasks
+from tests.conftest import TestingSessionLocal
+
+
+def make_chain(db_session, balance: str, trigger_type=TriggerType.WEBHOOK):
+    user = User(email="admission@example.com", hashed_password="x", balance=Decimal(balance))
+    db_session.add(user)
+    db_session.flush()
+    chain = Chain(name="paid", user_id=user.id, trigger_type=trigger_type, trigger_config={},
+                  actions=[], execution_cost=Decimal("0.10"))
+    db_session.add(chain)
+    db_session.commit()
+    return user, chain
+
+
+def test_webhook_rejected_once_reservations_cover_balance(client, db_session, monkeypatch):
+    """Test reject mode answers 402 once queued executions hold the whole balance"""
+    monkeypatch.setattr(settings, "ADMISSION_CONTROL", "reject")
+    queued = []
+    monkeypatch.setattr(webhooks.execute_chain, "delay", queued.append)
+    user, chain = make_chain(db_session, "0.25")
+
+    statuses = [client.post(f"/webhooks/{chain.id}", json={"n": n}).status_code for n in range(3)]
+
+    assert statuses == [200, 200, 402]
+    assert len(queued) == 2
+    db_session.refresh(user)
+    assert user.balance == Decimal("0.25")
+    assert user.reserved == Decimal("0.20")
+    assert db_session.query(ExecutionLog).count() == 2
+
+
+def test_reservation_refreshes_cached_principal(client, db_session, monkeypatch):
+    """Test /users/me shows a reservation as soon as a trigger takes it"""
+    monkeypatch.setattr(settings, "ADMISSION_CONTROL", "reject")
+    monkeypatch.setattr(webhooks.execute_chain, "delay", lambda execution_log_id: None)
+    user, chain = make_chain(db_session, "0.25")
+    headers = {"Authorization": f"Bearer {create_access_token({'user_id': user.id})}"}
+    assert client.get("/users/me", headers=headers).json()["reserved"] == 0
+
+    assert client.post(f"/webhooks/{chain.id}", json={}).status_code == 200
+    db_session.expire_all()  # Requests share this session in tests
+    assert client.get("/users/me", headers=headers).json()["reserved"] == 0.1
+
+
+def test_parked_executions_admitted_after_deposit(db_session, monkeypatch):
+    """Test park mode holds executions the balance cannot cover and admits them in order later"""
+    monkeypatch.setattr(settings, "ADMISSION_CONTROL", "park")
+    user, chain = make_chain(db_session, "0.15", TriggerType.MANUAL)
+    now = datetime.utcnow()
+
+    logs = []
+    for _ in range(3):
+        admission = admit(db_session, user.id, chain.execution_cost)
+        logs.append(ExecutionLog(chain_id=chain.id, **admission.log_values(now)))
+    logs.append(ExecutionLog(chain_id=chain.id, status=ExecutionStatus.PARKED, created_at=now - timedelta(days=2)))
+    db_session.add_all(logs)
+    db_session.commit()
+    assert [log.status for log in logs] == [ExecutionStatus.PENDING] + [ExecutionStatus.PARKED] * 3
+
+    assert admit_parked(db_session, now, batch_size=1) == []
+    assert logs[3].status == ExecutionStatus.FAILED  # Parked longer than ADMISSION_PARK_TTL
+
+    credit(db_session, user.id, Decimal("0.10"))
+    db_session.commit()
+    assert admit_parked(db_session, now, batch_size=1) == [logs[1].id]
+    assert logs[2].status == ExecutionStatus.PARKED
+    db_session.refresh(user)
+    assert user.reserved == Decimal("0.20")
+
+
+def test_reservation_consumed_or_released_exactly_once(db_session, monkeypatch):
+    """Test executions consume their reservation, failures release it, and stale ones are released once"""
+    monkeypatch.setattr(settings, "ADMISSION_CONTROL", "reject")
+    monkeypatch.setattr(tasks, "SessionLocal", TestingSessionLocal)
+    user, chain = make_chain(db_session, "1.00", TriggerType.MANUAL)
+    now = datetime.utcnow()
+    logs = [ExecutionLog(chain_id=chain.id, **admit(db_session, user.id, chain.execution_cost).log_values(now))
+            for _ in range(3)]
+    db_session.add_all(logs)
+    db_session.commit()
+
+    assert tasks.execute_chain(logs[0].id)["status"] == "success"
+    chain.is_active = False
+    db_session.commit()
+    invalidate_chain(chain.id)
+    assert tasks.execute_chain(logs[1].id) == {"error": "Chain is not active"}
+
+    db_session.expire_all()
+    assert user.balance == Decimal("0.90")
+    assert user.reserved == Decimal("0.10")
+    assert logs[1].reserved_amount is None
+
+    later = now + timedelta(seconds=settings.ADMISSION_RESERVATION_TTL + 1)
+    assert release_stale_reservations(db_session, later) == {user.id}
+    db_session.commit()
+    assert release_stale_reservations(db_session, later) == set()
+    db_session.refresh(user)
+    assert user.reserved == Decimal("0.00")
@@ -19,7 +19,7 @@ def test_health_check():
     assert response.json() == {"status": "healthy"}
 
 
-def test_register_user():
+def test_register_user(db_session):
     """Test user registration"""
     response = client.post(
         "/auth/register",
@@ -32,7 +32,7 @@ def test_register_user():
     assert response.status_code in [200, 400]
 
 
-def test_login_invalid_credentials():
+def test_login_invalid_credentials(db_session):
     """Test login with invalid credentials"""
     response = client.post(
         "/auth/login",
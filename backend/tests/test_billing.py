@@ -0,0 +1,82 @@
+from concurrent.futures import ThreadPoolExecutor
+from datetime import datetime
+from decimal import Decimal
+from app.core.security import create_access_token
+from app.models.models import Chain, ExecutionLog, Transaction, TriggerType, User
+from app.services.billing import charge, debit, flush_charges, to_money
+from tests.conftest import TestingSessionLocal
+
+
+def charge_once(user_id: int):
+    db = TestingSessionLocal()
+    try:
+        transaction_id = charge(db, user_id, Decimal("0.05"), "Execution of chain: load")
+        db.commit()
+        return transaction_id
+    finally:
+        db.close()
+
+
+def test_parallel_charges_never_overdraw(db_session):
+    """Test hundreds of concurrent charges to one user debit exactly what the balance covers"""
+    user = User(email="billing@example.com", hashed_password="x", balance=Decimal("10.00"))
+    db_session.add(user)
+    db_session.commit()
+
+    with ThreadPoolExecutor(max_workers=16) as pool:
+        results = list(pool.map(charge_once, [user.id] * 300))
+
+    assert sum(1 for transaction_id in results if transaction_id) == 200
+    db_session.refresh(user)
+    assert user.balance == Decimal("0.00")
+    assert db_session.query(Transaction).filter(Transaction.user_id == user.id).count() == 200
+
+
+def test_charge_records_transaction(db_session):
+    """Test a charge debits the balance and writes its ledger row, and insufficient funds do neither"""
+    user = User(email="billing@example.com", hashed_password="x", balance=Decimal("0.25"))
+    db_session.add(user)
+    db_session.commit()
+
+    transaction_id = charge(db_session, user.id, 0.1, "Execution of chain: c", execution_log_id=None)
+    assert charge(db_session, user.id, Decimal("0.20"), "Execution of chain: c") is None
+    db_session.commit()
+
+    db_session.refresh(user)
+    assert user.balance == Decimal("0.15")
+    transaction = db_session.get(Transaction, transaction_id)
+    assert transaction.amount == Decimal("-0.10")
+    assert to_money(19.99) * 100 == 1999
+
+
+def test_aggregated_flush_bills_per_user_and_chain(client, db_session):
+    """Test debited executions are billed with one ledger row per chain that links back to them"""
+    user = User(email="billing@example.com", hashed_password="x", balance=Decimal("1.00"))
+    db_session.add(user)
+    db_session.flush()
+    chains = [Chain(name=f"c{n}", user_id=user.id, trigger_type=TriggerType.MANUAL, trigger_config={}, actions=[]) for n in range(2)]
+    db_session.add_all(chains)
+    db_session.flush()
+    logs = []
+    for chain, count in zip(chains, (3, 2)):
+        for _ in range(count):
+            assert debit(db_session, user.id, Decimal("0.10"))
+            logs.append(ExecutionLog(chain_id=chain.id, cost=Decimal("0.10"), charged=True))
+    db_session.add_all(logs)
+    db_session.commit()
+
+    assert flush_charges(db_session, datetime.utcnow(), batch_size=2) == 5
+    assert flush_charges(db_session, datetime.utcnow(), batch_size=2) == 0
+
+    db_session.refresh(user)
+    assert user.balance == Decimal("0.50")
+    transactions = db_session.query(Transaction).filter(Transaction.user_id == user.id).all()
+    assert sum(t.amount for t in transactions) == Decimal("-0.50")
+    assert len(transactions) == 4  # Batches of two: (c0 x2), (c0 x1, c1 x1), (c1 x1)
+
+    headers = {"Authorization": f"Bearer {create_access_token({'user_id': user.id})}"}
+    covered = []
+    for transaction in transactions:
+        page = client.get(f"/users/me/transactions/{transaction.id}/executions", headers=headers).json()
+        covered.extend(item["id"] for item in page["items"])
+    assert sorted(covered) == sorted(log.id for log in logs)
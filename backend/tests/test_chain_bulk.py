@@ -0,0 +1,75 @@
+from decimal import Decimal
+from app.core.config import settings
+from app.core.security import create_access_token
+from app.models.models import Chain, User
+from app.services.chain_cache import get_cached_chain
+
+SCHEDULE = {"interval_minutes": 5}
+
+
+def user_headers(db_session, email="bulk@example.com"):
+    user = User(email=email, hashed_password="x")
+    db_session.add(user)
+    db_session.commit()
+    return user, {"Authorization": f"Bearer {create_access_token({'user_id': user.id})}"}
+
+
+def chain_item(name, **fields):
+    return {"name": name, "trigger_type": "manual", "trigger_config": {}, "actions": [], **fields}
+
+
+def test_bulk_create_reports_each_item(client, db_session):
+    """Test valid chains are created together and invalid ones are reported by position"""
+    user, headers = user_headers(db_session)
+    cyclic = [
+        {"id": "a", "type": "http_request", "config": {}, "depends_on": ["b"]},
+        {"id": "b", "type": "http_request", "config": {}, "depends_on": ["a"]},
+    ]
+    items = [
+        chain_item("first", execution_cost="0.25"),
+        chain_item("cyclic", actions=cyclic),
+        chain_item("scheduled", trigger_type="schedule", trigger_config=SCHEDULE),
+        chain_item("bad schedule", trigger_type="schedule", trigger_config={"cron": "not a cron"}),
+    ]
+
+    response = client.post("/chains/bulk", json={"chains": items}, headers=headers)
+
+    assert response.status_code == 200
+    body = response.json()
+    assert (body["succeeded"], body["failed"]) == (2, 2)
+    assert [result["ok"] for result in body["results"]] == [True, False, True, False]
+    chains = {chain.name: chain for chain in db_session.query(Chain).filter(Chain.user_id == user.id)}
+    assert set(chains) == {"first", "scheduled"}
+    assert chains["first"].id == body["results"][0]["id"]
+    assert chains["first"].execution_cost == Decimal("0.25")
+    assert chains["scheduled"].next_run_at is not None
+
+
+def test_bulk_update_and_toggle(client, db_session, monkeypatch):
+    """Test bulk updates and toggles apply in one request, skip foreign chains and refresh the cache"""
+    user, headers = user_headers(db_session)
+    _, other_headers = user_headers(db_session, "other@example.com")
+    items = [chain_item(f"c{n}") for n in range(3)] + [chain_item("s", trigger_type="schedule", trigger_config=SCHEDULE)]
+    ids = [result["id"] for result in client.post("/chains/bulk", json={"chains": items}, headers=headers).json()["results"]]
+    assert get_cached_chain(db_session, ids[0]).name == "c0"
+
+    updates = [{"id": ids[0], "name": "renamed"}, {"id": ids[1], "execution_cost": "0.50"}, {"id": ids[0], "name": "again"}]
+    body = client.patch("/chains/bulk", json={"chains": updates}, headers=headers).json()
+    assert [result["ok"] for result in body["results"]] == [True, True, False]
+    assert get_cached_chain(db_session, ids[0]).name == "renamed"
+    assert client.patch("/chains/bulk", json={"chains": updates[:1]}, headers=other_headers).json()["failed"] == 1
+
+    body = client.post("/chains/bulk/deactivate", json={"ids": ids + [ids[0] + 1000]}, headers=headers).json()
+    assert (body["succeeded"], body["failed"]) == (4, 1)
+    assert not get_cached_chain(db_session, ids[2]).is_active
+    db_session.query(Chain).filter(Chain.id == ids[3]).update({Chain.next_run_at: None})
+    db_session.commit()
+
+    assert client.post("/chains/bulk/activate", json={"ids": ids[2:]}, headers=headers).json()["succeeded"] == 2
+    db_session.expire_all()
+    chains = {chain.id: chain for chain in db_session.query(Chain)}
+    assert chains[ids[2]].is_active and not chains[ids[0]].is_active
+    assert chains[ids[3]].next_run_at is not None
+
+    monkeypatch.setattr(settings, "CHAIN_BULK_MAX_ITEMS", 2)
+    assert client.post("/chains/bulk/activate", json={"ids": ids}, headers=headers).status_code == 413
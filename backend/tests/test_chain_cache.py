@@ -0,0 +1,77 @@
+import json
+from app.core.security import create_access_token
+from app.models.models import Chain, TriggerType, User
+from app.services.chain_cache import CachedChain, get_cached_chain, get_chain_cache
+from app.services.local_cache import LocalCache
+from app.services.invalidation import RedisInvalidationBus
+
+
+def create_chain(db_session, name="cached"):
+    user = User(email="cache@example.com", hashed_password="x")
+    db_session.add(user)
+    db_session.flush()
+    chain = Chain(name=name, user_id=user.id, trigger_type=TriggerType.MANUAL, trigger_config={}, actions=[])
+    db_session.add(chain)
+    db_session.commit()
+    return chain
+
+
+def test_lru_eviction_and_ttl(monkeypatch):
+    """Test the least recently used entry is evicted and expired entries miss"""
+    now = [100.0]
+    monkeypatch.setattr("app.services.local_cache.time.monotonic", lambda: now[0])
+    cache = LocalCache(max_size=2, ttl=10)
+    chains = [CachedChain(Chain(id=i, name=f"c{i}", trigger_config={}, actions=[])) for i in range(3)]
+
+    for chain in chains[:2]:
+        cache.put(chain.id, chain, cache.generation)
+    cache.get(0)
+    cache.put(2, chains[2], cache.generation)
+
+    assert cache.get(1) is None
+    assert cache.get(0).name == "c0"
+    now[0] += 11
+    assert cache.get(0) is None
+    assert cache.stats() == {"hits": 2, "misses": 2, "evictions": 1, "invalidations": 0, "size": 2}
+
+
+def test_load_overtaken_by_invalidation_is_not_stored():
+    """Test a row read before an invalidation is not cached"""
+    cache = LocalCache(max_size=10, ttl=60)
+    generation = cache.generation
+    cache.invalidate(1)
+    cache.put(1, CachedChain(Chain(id=1, name="stale", trigger_config={}, actions=[])), generation)
+    assert cache.get(1) is None
+
+
+def test_update_and_delete_invalidate(client, db_session):
+    """Test updating or deleting a chain through the API drops the cached copy"""
+    chain = create_chain(db_session)
+    headers = {"Authorization": f"Bearer {create_access_token({'user_id': chain.user_id})}"}
+
+    assert get_cached_chain(db_session, chain.id).name == "cached"
+    assert get_cached_chain(db_session, chain.id).name == "cached"
+    assert get_chain_cache().stats()["hits"] >= 1
+
+    response = client.put(f"/chains/{chain.id}", json={"name": "renamed"}, headers=headers)
+    assert response.status_code == 200
+    assert get_cached_chain(db_session, chain.id).name == "renamed"
+
+    response = client.delete(f"/chains/{chain.id}", headers=headers)
+    assert response.status_code == 200
+    assert get_cached_chain(db_session, chain.id) is None
+
+
+def test_redis_bus_delivers_foreign_messages_only():
+    """Test pub/sub messages from other processes reach subscribers and own echoes are skipped"""
+    local = RedisInvalidationBus("redis://localhost:6379/0", "test")
+    remote = RedisInvalidationBus("redis://localhost:6379/0", "test")
+    received = []
+    local._subscribers["chain"].append(received.append)
+
+    for origin in (local._origin, remote._origin):
+        local._on_message({"data": json.dumps({"origin": origin, "topic": "chain", "key": 7})})
+
+    assert received == [7]
+    local._on_listener_error(ConnectionError(), None, None)
+    assert received == [7, None]
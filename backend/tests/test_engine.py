@@ -0,0 +1,34 @@
+from app.workers.actions import run_actions
+from app.workers.async_actions import run_actions_async
+from app.workers.engine import AsyncEngine
+
+ACTIONS = [
+    {"type": "http_request", "config": {"method": "GET"}},
+    {"type": "send_email", "config": {"to": "user@example.com"}},
+    {"type": "telegram_message", "config": {}},
+    {"type": "unknown_action", "config": {}},
+]
+
+
+def test_engines_produce_same_result_shape():
+    """Test sync and asyncio engines build identical execution results"""
+    engine = AsyncEngine(max_in_flight=2)
+
+    sync_results = run_actions(ACTIONS)
+    async_results = engine.run(run_actions_async(ACTIONS))
+
+    assert sync_results == async_results
+    assert [r["action_type"] for r in sync_results] == [a["type"] for a in ACTIONS]
+    assert all(r["success"] is False for r in sync_results)
+
+
+def test_async_engine_runs_many_executions():
+    """Test the engine loop serves concurrent callers"""
+    from concurrent.futures import ThreadPoolExecutor
+
+    engine = AsyncEngine(max_in_flight=4)
+    with ThreadPoolExecutor(max_workers=8) as pool:
+        results = list(pool.map(lambda _: engine.run(run_actions_async(ACTIONS[:1])), range(16)))
+
+    assert len(results) == 16
+    assert all(r[0]["result"] == {"error": "URL is required for HTTP request"} for r in results)
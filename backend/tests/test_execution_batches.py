@@ -0,0 +1,72 @@
+import json
+from decimal import Decimal
+from app.api import chains
+from app.core.config import settings
+from app.core.security import create_access_token
+from app.models.models import Chain, ExecutionLog, ExecutionStatus, TriggerType, User
+
+
+def make_chain(db_session, balance="0.00"):
+    user = User(email="batch@example.com", hashed_password="x", balance=Decimal(balance))
+    db_session.add(user)
+    db_session.flush()
+    chain = Chain(name="backfill", user_id=user.id, trigger_type=TriggerType.MANUAL, trigger_config={},
+                  actions=[], execution_cost=Decimal("0.10"))
+    db_session.add(chain)
+    db_session.commit()
+    return chain, {"Authorization": f"Bearer {create_access_token({'user_id': user.id})}"}
+
+
+def test_batch_trigger_inserts_in_chunks_and_reports_progress(client, db_session, monkeypatch):
+    """Test a JSON batch is inserted chunk by chunk, queued once committed and tracked by batch id"""
+    monkeypatch.setattr(settings, "EXECUTION_BATCH_CHUNK_SIZE", 2)
+    published = []
+    monkeypatch.setattr(chains, "publish_executions", lambda ids, batch_size: published.extend(ids))
+    chain, headers = make_chain(db_session)
+
+    response = client.post(
+        f"/chains/{chain.id}/execute/batch", json={"trigger_data": [{"record": n} for n in range(4)] + [None]}, headers=headers
+    )
+
+    assert response.status_code == 202
+    batch = response.json()
+    assert (batch["total"], batch["status_counts"]) == (5, {"pending": 5})
+    logs = db_session.query(ExecutionLog).order_by(ExecutionLog.id).all()
+    assert published == [log.id for log in logs]
+    assert [log.trigger_data for log in logs] == [{"record": n} for n in range(4)] + [None]
+    assert {log.batch_id for log in logs} == {batch["id"]}
+
+    for log, outcome in zip(logs, [ExecutionStatus.SUCCESS] * 3 + [ExecutionStatus.FAILED]):
+        log.status = outcome
+    db_session.commit()
+    progress = client.get(f"/chains/{chain.id}/batches/{batch['id']}", headers=headers).json()
+    assert progress["status_counts"] == {"success": 3, "failed": 1, "pending": 1}
+    assert (progress["finished"], progress["done"]) == (4, False)
+    assert client.get(f"/chains/{chain.id}/batches/{batch['id'] + 1}", headers=headers).status_code == 404
+
+
+def test_ndjson_batch_is_all_or_nothing(client, db_session, monkeypatch):
+    """Test streamed NDJSON lines are parsed as they come and a bad line or short balance writes nothing"""
+    monkeypatch.setattr(settings, "EXECUTION_BATCH_CHUNK_SIZE", 2)
+    monkeypatch.setattr(chains, "publish_executions", lambda ids, batch_size: None)
+    chain, headers = make_chain(db_session, balance="0.25")
+    headers = {**headers, "Content-Type": "application/x-ndjson"}
+
+    def lines():
+        yield b'{"record": 1}\n{"rec'
+        yield b'ord": 2}\n\n{"record": 3}'
+
+    response = client.post(f"/chains/{chain.id}/execute/batch", content=lines(), headers=headers)
+    assert response.status_code == 202
+    assert response.json()["total"] == 3
+
+    response = client.post(f"/chains/{chain.id}/execute/batch", content=b'{"record": 4}\n[1, 2]\n', headers=headers)
+    assert response.status_code == 422
+    assert response.json()["detail"].startswith("Line 2")
+
+    monkeypatch.setattr(settings, "ADMISSION_CONTROL", "reject")
+    body = "".join(json.dumps({"record": n}) + "\n" for n in range(3)).encode()
+    assert client.post(f"/chains/{chain.id}/execute/batch", content=body, headers=headers).status_code == 402
+    assert db_session.query(ExecutionLog).count() == 3
+    db_session.refresh(chain.owner)
+    assert chain.owner.reserved == Decimal("0.00")
@@ -0,0 +1,60 @@
+from datetime import datetime, timedelta
+from decimal import Decimal
+from app.core.security import create_access_token
+from app.models.models import ExecutionLog, ExecutionStats, ExecutionStatus
+from app.services.execution_stats import aggregate, period_start
+from tests.test_retention import add_log, create_chain
+
+
+def test_stats_are_merged_incrementally(db_session):
+    """Test finished executions are counted once per hour and day, across batches and passes"""
+    _, chain = create_chain(db_session, "stats@example.com", "free")
+    morning = datetime(2026, 10, 18, 9, 15)
+    for n in range(3):
+        add_log(db_session, chain, morning + timedelta(minutes=n), duration_ms=100 * (n + 1))
+    add_log(db_session, chain, morning + timedelta(hours=2), status=ExecutionStatus.FAILED, cost=0)
+    db_session.add(ExecutionLog(chain_id=chain.id, status=ExecutionStatus.RUNNING, created_at=morning))
+    db_session.commit()
+
+    assert aggregate(db_session, batch_size=2) == 4
+    add_log(db_session, chain, morning + timedelta(minutes=30))
+    db_session.commit()
+    assert aggregate(db_session, batch_size=2) == 1
+    assert aggregate(db_session, batch_size=2) == 0
+
+    rows = {(row.period, row.period_start): row for row in db_session.query(ExecutionStats)}
+    assert set(rows) == {
+        ("hour", datetime(2026, 10, 18, 9)), ("hour", datetime(2026, 10, 18, 11)), ("day", datetime(2026, 10, 18))
+    }
+    day = rows[("day", datetime(2026, 10, 18))]
+    assert day.status_counts == {"success": 4, "failed": 1}
+    assert day.total_cost == Decimal("0.40")
+    assert sum(day.duration_histogram.values()) == 5
+    assert rows[("hour", datetime(2026, 10, 18, 9))].status_counts == {"success": 4}
+    assert period_start(datetime(2026, 10, 18, 23, 59, 59), "day") == datetime(2026, 10, 18)
+
+
+def test_stats_endpoint_reads_window(client, db_session):
+    """Test /chains/{id}/stats reports per-period and total figures for the requested window only"""
+    user, chain = create_chain(db_session, "stats@example.com", "free")
+    _, other_chain = create_chain(db_session, "other@example.com", "free")
+    today = period_start(datetime.utcnow(), "day")
+    for n in range(4):
+        add_log(db_session, chain, today + timedelta(minutes=n), duration_ms=200)
+    add_log(db_session, chain, today + timedelta(minutes=5), status=ExecutionStatus.FAILED, cost=0)
+    add_log(db_session, chain, today - timedelta(days=3))
+    db_session.commit()
+    aggregate(db_session, batch_size=100)
+
+    headers = {"Authorization": f"Bearer {create_access_token({'user_id': user.id})}"}
+    stats = client.get(f"/chains/{chain.id}/stats", params={"period": "day", "buckets": 2}, headers=headers).json()
+    assert stats["totals"]["executions"] == 5
+    assert stats["totals"]["success_rate"] == 0.8
+    assert stats["totals"]["total_cost"] == 0.4
+    assert 200 <= stats["totals"]["duration_p95_ms"] <= 250
+    assert [bucket["period_start"][:10] for bucket in stats["buckets"]] == [today.date().isoformat()]
+
+    week = client.get(f"/chains/{chain.id}/stats", params={"buckets": 7}, headers=headers).json()
+    assert week["totals"]["executions"] == 6 and len(week["buckets"]) == 2
+    assert client.get(f"/chains/{chain.id}/stats", params={"period": "week"}, headers=headers).status_code == 422
+    assert client.get(f"/chains/{other_chain.id}/stats", headers=headers).status_code == 404
@@ -0,0 +1,87 @@
+import asyncio
+import threading
+from http.server import BaseHTTPRequestHandler, ThreadingHTTPServer
+import pytest
+from app.services.http_pool import AsyncHttpClientPool, HttpClientPool, pool_key
+
+
+class KeepAliveHandler(BaseHTTPRequestHandler):
+    protocol_version = "HTTP/1.1"
+
+    def do_GET(self):
+        body = b"ok"
+        self.send_response(200)
+        self.send_header("Content-Length", str(len(body)))
+        self.end_headers()
+        self.wfile.write(body)
+
+    def log_message(self, *args):
+        pass
+
+
+@pytest.fixture
+def http_server():
+    server = ThreadingHTTPServer(("127.0.0.1", 0), KeepAliveHandler)
+    thread = threading.Thread(target=server.serve_forever, daemon=True)
+    thread.start()
+    yield f"http://127.0.0.1:{server.server_port}"
+    server.shutdown()
+    server.server_close()
+
+
+def test_pool_key_defaults_port():
+    """Test URLs are keyed by scheme, host and port"""
+    assert pool_key("https://API.telegram.org/bot1/sendMessage") == ("https", "api.telegram.org", 443)
+    assert pool_key("http://localhost:8080/x") == ("http", "localhost", 8080)
+
+
+def test_pool_reuses_connections(http_server):
+    """Test repeated requests to one host share a keep-alive connection"""
+    pool = HttpClientPool(max_connections_per_host=2, idle_timeout=60)
+    for _ in range(5):
+        assert pool.request("GET", f"{http_server}/ping", timeout=5).status_code == 200
+
+    host_stats = pool.stats()["hosts"][http_server]
+    assert host_stats["requests"] == 5
+    assert host_stats["connections_opened"] == 1
+    pool.close()
+
+
+def test_pool_evicts_idle_hosts(http_server):
+    """Test hosts idle longer than the timeout are closed"""
+    pool = HttpClientPool(max_connections_per_host=2, idle_timeout=0)
+    pool.request("GET", f"{http_server}/ping", timeout=5)
+    pool._evict_idle(float("inf"))
+
+    assert pool.stats() == {"hosts": {}, "evicted": 1}
+
+
+def test_pool_keeps_streamed_host_until_closed(http_server):
+    """Test a host whose streamed response is still being read is not evicted"""
+    pool = HttpClientPool(max_connections_per_host=2, idle_timeout=0)
+    response = pool.request("GET", f"{http_server}/ping", stream=True, timeout=5)
+    pool._evict_idle(float("inf"))
+    assert pool.stats()["hosts"][http_server]["in_flight"] == 1
+
+    assert b"".join(response.iter_content(1)) == b"ok"
+    assert pool.stats()["hosts"][http_server]["in_flight"] == 0
+    response.close()
+    assert pool.stats()["hosts"][http_server]["in_flight"] == 0
+    pool._evict_idle(float("inf"))
+    assert pool.stats() == {"hosts": {}, "evicted": 1}
+
+
+def test_async_pool_keeps_streamed_host_until_closed(http_server):
+    """Test a host whose streamed response is still being read is not evicted"""
+    pool = AsyncHttpClientPool(max_connections_per_host=2, idle_timeout=0)
+
+    async def stream_and_evict():
+        response = await pool.request("GET", f"{http_server}/ping", stream=True, timeout=5)
+        await pool._evict_idle(float("inf"))
+        assert pool.stats()["hosts"][http_server]["in_flight"] == 1
+        assert await response.aread() == b"ok"
+        assert pool.stats()["hosts"][http_server]["in_flight"] == 0
+        await pool._evict_idle(float("inf"))
+
+    asyncio.run(stream_and_evict())
+    assert pool.stats() == {"hosts": {}, "evicted": 1}
@@ -0,0 +1,36 @@
+from datetime import datetime
+from alembic import command
+from alembic.autogenerate import compare_metadata
+from alembic.config import Config
+from alembic.migration import MigrationContext
+from sqlalchemy import create_engine, inspect
+from app.core.database import Base
+from app.services.partitions import add_months, partition_name
+
+
+def alembic_config(url: str) -> Config:
+    config = Config("alembic.ini")
+    config.set_main_option("sqlalchemy.url", url)
+    return config
+
+
+def test_migrations_match_models(tmp_path):
+    """Test upgrading to head yields the schema of the models and downgrades cleanly"""
+    url = f"sqlite:///{tmp_path / 'migrations.db'}"
+    config = alembic_config(url)
+    engine = create_engine(url)
+
+    command.upgrade(config, "head")
+    with engine.connect() as connection:
+        diff = compare_metadata(MigrationContext.configure(connection), Base.metadata)
+    assert diff == []
+
+    command.downgrade(config, "base")
+    assert inspect(engine).get_table_names() == ["alembic_version"]
+
+
+def test_partition_months():
+    """Test monthly partition bounds roll over year ends"""
+    assert add_months(datetime(2026, 11, 1), 2) == datetime(2027, 1, 1)
+    assert add_months(datetime(2026, 1, 1), -1) == datetime(2025, 12, 1)
+    assert partition_name(datetime(2027, 1, 1)) == "execution_logs_p2027_01"
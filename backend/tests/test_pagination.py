@@ -0,0 +1,63 @@
+from datetime import datetime, timedelta
+from app.core.security import create_access_token
+from app.models.models import Chain, ExecutionLog, Transaction, TriggerType, User
+
+
+def create_user(db_session):
+    user = User(email="pages@example.com", hashed_password="x")
+    db_session.add(user)
+    db_session.commit()
+    return user, {"Authorization": f"Bearer {create_access_token({'user_id': user.id})}"}
+
+
+def walk(client, path, headers, limit):
+    ids, cursor = [], None
+    while True:
+        params = {"limit": limit, **({"cursor": cursor} if cursor else {})}
+        page = client.get(path, params=params, headers=headers).json()
+        ids.extend(item["id"] for item in page["items"])
+        assert page["has_more"] == (page["next_cursor"] is not None)
+        if not page["has_more"]:
+            return ids
+        cursor = page["next_cursor"]
+
+
+def test_chains_page_newest_first_with_ties(client, db_session):
+    """Test every chain is listed exactly once, also across identical created_at values"""
+    user, headers = create_user(db_session)
+    now = datetime.utcnow()
+    created = [now, now, now, now - timedelta(seconds=1), now + timedelta(seconds=1)]
+    chains = [
+        Chain(name=f"c{n}", user_id=user.id, trigger_type=TriggerType.MANUAL, trigger_config={}, actions=[], created_at=at)
+        for n, at in enumerate(created)
+    ]
+    db_session.add_all(chains)
+    db_session.commit()
+
+    expected = [c.id for c in sorted(chains, key=lambda c: (c.created_at, c.id), reverse=True)]
+    assert walk(client, "/chains/", headers, limit=2) == expected
+    assert walk(client, "/chains/", headers, limit=50) == expected
+
+
+def test_executions_and_transactions_pages(client, db_session):
+    """Test executions and transactions page through the same cursor scheme"""
+    user, headers = create_user(db_session)
+    chain = Chain(name="c", user_id=user.id, trigger_type=TriggerType.MANUAL, trigger_config={}, actions=[])
+    db_session.add(chain)
+    db_session.flush()
+    logs = [ExecutionLog(chain_id=chain.id) for _ in range(5)]
+    db_session.add_all(logs)
+    db_session.add_all(Transaction(user_id=user.id, amount=1.0, description="t") for _ in range(3))
+    db_session.commit()
+
+    assert sorted(walk(client, f"/chains/{chain.id}/executions", headers, limit=2)) == [log.id for log in logs]
+    assert len(walk(client, "/users/me/transactions", headers, limit=2)) == 3
+
+
+def test_invalid_cursor_and_limit(client, db_session):
+    """Test malformed cursors and out of range limits are rejected"""
+    _, headers = create_user(db_session)
+
+    assert client.get("/chains/", params={"cursor": "not-a-cursor"}, headers=headers).status_code == 400
+    assert client.get("/chains/", params={"limit": 0}, headers=headers).status_code == 422
+    assert client.get("/chains/", params={"limit": 1000}, headers=headers).status_code == 422
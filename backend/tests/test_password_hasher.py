@@ -0,0 +1,48 @@
+import asyncio
+from app.models.models import User
+from app.services import password_hasher
+from app.services.password_hasher import PasswordHasher
+
+
+def test_login_rehashes_outdated_password(client, db_session, monkeypatch):
+    """Test a password hashed with fewer rounds is upgraded on the next login"""
+    credentials = {"email": "hasher@example.com", "password": "secret-password"}
+    monkeypatch.setattr(password_hasher.get_password_hasher(), "rounds", 4)
+    assert client.post("/auth/register", json=credentials).status_code == 200
+    old_hash = db_session.query(User).filter_by(email=credentials["email"]).one().hashed_password
+    assert old_hash.startswith("$2b$04$")
+
+    monkeypatch.setattr(password_hasher.get_password_hasher(), "rounds", 5)
+    assert client.post("/auth/login", json=credentials).status_code == 200
+    db_session.expire_all()
+    new_hash = db_session.query(User).filter_by(email=credentials["email"]).one().hashed_password
+    assert new_hash.startswith("$2b$05$")
+
+    assert client.post("/auth/login", json={**credentials, "password": "wrong"}).status_code == 401
+    assert client.post("/auth/login", json=credentials).status_code == 200
+
+
+def test_busy_hasher_answers_503(client, monkeypatch):
+    """Test requests beyond the pending limit are rejected instead of queued"""
+    busy = PasswordHasher(workers=1, max_pending=0, queue_timeout=0.01, rounds=4)
+    monkeypatch.setattr(password_hasher, "_hasher", busy)
+
+    response = client.post("/auth/register", json={"email": "busy@example.com", "password": "secret-password"})
+
+    assert response.status_code == 503
+    assert response.headers["retry-after"] == "1"
+    assert busy.stats()["rejected_busy"] == 1
+
+
+def test_hasher_verifies_and_flags_rehash():
+    """Test verify_and_update only returns a new hash when the rounds changed"""
+    hasher = PasswordHasher(workers=1, max_pending=2, queue_timeout=5, rounds=4)
+    try:
+        hashed = asyncio.run(hasher.hash("pw"))
+        assert asyncio.run(hasher.verify_and_update("pw", hashed)) == (True, None)
+        assert asyncio.run(hasher.verify_and_update("nope", hashed)) == (False, None)
+        hasher.rounds = 5
+        valid, new_hash = asyncio.run(hasher.verify_and_update("pw", hashed))
+        assert valid and new_hash.startswith("$2b$05$")
+    finally:
+        hasher.shutdown()
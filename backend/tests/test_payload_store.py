@@ -0,0 +1,41 @@
+from app.core.config import settings
+from app.models.models import PayloadBlob
+from app.services.payload_store import delete_payloads, load_payload, store_payload
+
+LARGE_PAYLOAD = {"rows": [{"id": i, "value": "x" * 100} for i in range(200)]}
+
+
+def test_small_payload_stays_inline(db_session):
+    """Test payloads under the threshold are not offloaded"""
+    inline, ref = store_payload(db_session, {"ok": True})
+    assert inline == {"ok": True}
+    assert ref is None
+    assert load_payload(db_session, inline, ref) == {"ok": True}
+
+
+def test_large_payload_offloaded_to_database(db_session):
+    """Test large payloads are compressed into payload_blobs"""
+    inline, ref = store_payload(db_session, LARGE_PAYLOAD)
+    db_session.commit()
+
+    assert inline is None
+    assert ref.startswith("db:")
+    blob = db_session.query(PayloadBlob).one()
+    assert len(blob.data) < blob.size
+    assert load_payload(db_session, inline, ref) == LARGE_PAYLOAD
+
+    delete_payloads(db_session, [ref])
+    assert db_session.query(PayloadBlob).count() == 0
+
+
+def test_large_payload_offloaded_to_filesystem(db_session, tmp_path, monkeypatch):
+    """Test the filesystem backend writes compressed files"""
+    monkeypatch.setattr(settings, "PAYLOAD_STORE_BACKEND", "filesystem")
+    monkeypatch.setattr(settings, "PAYLOAD_STORE_PATH", str(tmp_path))
+
+    inline, ref = store_payload(db_session, LARGE_PAYLOAD)
+
+    assert ref.startswith("fs:")
+    assert load_payload(db_session, inline, ref) == LARGE_PAYLOAD
+    delete_payloads(db_session, [ref])
+    assert not list(tmp_path.rglob("*.json.*"))
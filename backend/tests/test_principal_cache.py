@@ -0,0 +1,48 @@
+from sqlalchemy import event
+from app.core.security import create_access_token
+from app.models.models import User
+from app.services.principal_cache import invalidate_principal
+from tests.conftest import engine
+
+
+def count_queries(client, path, headers) -> int:
+    statements = []
+    listener = lambda conn, cursor, statement, *args: statements.append(statement)
+    event.listen(engine, "before_cursor_execute", listener)
+    try:
+        assert client.get(path, headers=headers).status_code == 200
+    finally:
+        event.remove(engine, "before_cursor_execute", listener)
+    return len(statements)
+
+
+def create_user(db_session):
+    user = User(email="principal@example.com", hashed_password="x", balance=5.0)
+    db_session.add(user)
+    db_session.commit()
+    return user, {"Authorization": f"Bearer {create_access_token({'user_id': user.id})}"}
+
+
+def test_repeat_requests_skip_user_lookup(client, db_session):
+    """Test only the first authenticated request loads the user"""
+    user, headers = create_user(db_session)
+
+    assert count_queries(client, "/chains/", headers) == 2
+    assert count_queries(client, "/chains/", headers) == 1
+    assert count_queries(client, "/users/me", headers) == 0
+
+
+def test_balance_and_deactivation_invalidate(client, db_session):
+    """Test invalidated principals are reloaded with their new balance and status"""
+    user, headers = create_user(db_session)
+    assert client.get("/users/me", headers=headers).json()["balance"] == 5.0
+
+    user.balance = 7.5
+    db_session.commit()
+    invalidate_principal(user.id)
+    assert client.get("/users/me", headers=headers).json()["balance"] == 7.5
+
+    user.is_active = False
+    db_session.commit()
+    invalidate_principal(user.id)
+    assert client.get("/users/me", headers=headers).status_code == 403
@@ -0,0 +1,82 @@
+import json
+import threading
+from http.server import BaseHTTPRequestHandler, ThreadingHTTPServer
+import pytest
+from app.services.response_capture import extract_fields, parse_json_path
+from app.workers.actions import execute_http_request
+from app.workers.async_actions import execute_http_request_async
+from app.workers.engine import AsyncEngine
+
+DOCUMENT = {"data": {"items": [{"id": 1, "name": "a"}, {"id": 2}]}, "padding": "x" * 5_000_000}
+
+
+class LargeJSONHandler(BaseHTTPRequestHandler):
+    protocol_version = "HTTP/1.1"
+
+    def do_GET(self):
+        body = json.dumps(DOCUMENT).encode()
+        self.send_response(200)
+        self.send_header("Content-Type", "application/json")
+        self.send_header("Content-Length", str(len(body)))
+        self.end_headers()
+        try:
+            self.wfile.write(body)
+        except (BrokenPipeError, ConnectionResetError):
+            pass
+
+    def log_message(self, *args):
+        pass
+
+
+@pytest.fixture
+def json_server():
+    server = ThreadingHTTPServer(("127.0.0.1", 0), LargeJSONHandler)
+    thread = threading.Thread(target=server.serve_forever, daemon=True)
+    thread.start()
+    yield f"http://127.0.0.1:{server.server_port}/data"
+    server.shutdown()
+    server.server_close()
+
+
+def test_parse_json_path():
+    """Test JSON paths are split into keys and indices"""
+    assert parse_json_path("$.data.items[0].id") == ["data", "items", 0, "id"]
+    assert parse_json_path("data['odd key'][*]") == ["data", "odd key", "*"]
+    with pytest.raises(ValueError):
+        parse_json_path("$.data..id")
+
+
+def test_extract_fields():
+    """Test configured fields are picked from a document"""
+    extracted = extract_fields(DOCUMENT, {
+        "first_id": "$.data.items[0].id",
+        "ids": "$.data.items[*].id",
+        "missing": "$.data.total",
+    })
+    assert extracted == {"first_id": 1, "ids": [1, 2], "missing": None}
+
+
+def test_http_capture_is_capped(json_server):
+    """Test only the configured number of bytes is kept"""
+    result = execute_http_request({"url": json_server, "max_response_bytes": 64})
+
+    assert result["status_code"] == 200
+    assert len(result["response"]) == 64
+    assert result["truncated"] is True
+
+
+def test_http_extract_keeps_only_fields(json_server):
+    """Test extraction replaces the raw body with the selected fields"""
+    config = {"url": json_server, "extract": {"name": "$.data.items[0].name"}, "max_response_bytes": 10_000_000}
+    result = execute_http_request(config)
+
+    assert result["extracted"] == {"name": "a"}
+    assert "response" not in result
+
+
+def test_engines_capture_alike(json_server):
+    """Test both engines build the same capped result"""
+    config = {"url": json_server, "max_response_bytes": 128}
+    async_result = AsyncEngine(max_in_flight=1).run(execute_http_request_async(config))
+
+    assert async_result == execute_http_request(config)
@@ -0,0 +1,76 @@
+from datetime import datetime, timedelta
+from decimal import Decimal
+from app.core.config import settings
+from app.core.security import create_access_token
+from app.models.models import Chain, ExecutionDailyRollup, ExecutionLog, ExecutionStatus, Transaction, TriggerType, User
+from app.services.execution_stats import aggregate
+from app.services.retention import expire_execution_logs
+
+
+def create_chain(db_session, email, plan):
+    user = User(email=email, hashed_password="x", plan=plan)
+    db_session.add(user)
+    db_session.flush()
+    chain = Chain(name="c", user_id=user.id, trigger_type=TriggerType.MANUAL, trigger_config={}, actions=[])
+    db_session.add(chain)
+    db_session.flush()
+    return user, chain
+
+
+def add_log(db_session, chain, created_at, status=ExecutionStatus.SUCCESS, duration_ms=100, cost=0.1):
+    log = ExecutionLog(
+        chain_id=chain.id, status=status, trigger_data={"at": created_at.isoformat()},
+        cost=cost, charged=status == ExecutionStatus.SUCCESS, created_at=created_at,
+        started_at=created_at, completed_at=created_at + timedelta(milliseconds=duration_ms)
+    )
+    db_session.add(log)
+    db_session.flush()
+    return log
+
+
+def test_retention_follows_plan_and_keeps_aggregates(client, db_session, tmp_path, monkeypatch):
+    """Test old logs are rolled up, archived and deleted according to their owner's plan"""
+    monkeypatch.setattr(settings, "EXECUTION_LOG_ARCHIVE_PATH", str(tmp_path))
+    monkeypatch.setattr(settings, "EXECUTION_LOG_RETENTION_DAYS", "free:30,pro:90")
+    now = datetime(2026, 6, 30, 12)
+    day = datetime(2026, 5, 1, 8)
+    free_user, free_chain = create_chain(db_session, "free@example.com", "free")
+    _, pro_chain = create_chain(db_session, "pro@example.com", "pro")
+    logs = [add_log(db_session, free_chain, day + timedelta(minutes=n), duration_ms=100 * (n + 1)) for n in range(3)]
+    logs.append(add_log(db_session, free_chain, day, status=ExecutionStatus.FAILED, cost=0.0))
+    recent = add_log(db_session, free_chain, now - timedelta(days=1))
+    add_log(db_session, pro_chain, day)
+    unbilled = add_log(db_session, free_chain, day)
+    parked = add_log(db_session, free_chain, day, status=ExecutionStatus.PARKED, cost=0)
+    reserved = add_log(db_session, free_chain, day, status=ExecutionStatus.PENDING, cost=0)
+    reserved.reserved_amount = Decimal("0.10")
+    charge = Transaction(user_id=free_user.id, amount=-0.3, description="charge", execution_log_id=logs[0].id)
+    db_session.add(charge)
+    db_session.flush()
+    for log in logs[:3]:
+        log.transaction_id = charge.id
+    db_session.commit()
+    archived_ids = sorted(log.id for log in logs)
+
+    aggregate(db_session, batch_size=10)  # Finished logs are only archived once counted into the stats
+    assert expire_execution_logs(db_session, now, batch_size=2) == {"free": 4, "pro": 0, "default": 0}
+
+    remaining = {log.id for log in db_session.query(ExecutionLog)}
+    assert recent.id in remaining and unbilled.id in remaining and len(remaining) == 5
+    assert {parked.id, reserved.id} <= remaining
+    db_session.refresh(charge)
+    assert charge.execution_log_id is None
+    rollup = db_session.query(ExecutionDailyRollup).filter_by(chain_id=free_chain.id).one()
+    assert rollup.status_counts == {"success": 3, "failed": 1}
+    assert rollup.archived_rows == 4
+    assert rollup.total_cost == Decimal("0.30")
+
+    headers = {"Authorization": f"Bearer {create_access_token({'user_id': free_user.id})}"}
+    [summary] = client.get(f"/chains/{free_chain.id}/archives", headers=headers).json()
+    assert summary["day"] == "2026-05-01"
+    assert 100 <= summary["duration_p50_ms"] <= 250
+    archived = client.get(f"/chains/{free_chain.id}/archives/2026-05-01", headers=headers).json()
+    assert sorted(record["id"] for record in archived) == archived_ids
+    failed = client.get(f"/chains/{free_chain.id}/archives/2026-05-01", params={"status": "failed"}, headers=headers).json()
+    assert [record["status"] for record in failed] == ["failed"]
+    assert client.get(f"/chains/{free_chain.id}/archives/2026-05-02", headers=headers).status_code == 404
@@ -0,0 +1,122 @@
+from datetime import datetime, timedelta
+from decimal import Decimal
+import pytest
+from app.models.models import Chain, ExecutionLog, TriggerType, User
+from app.services.schedule import CronSchedule, first_run_at, next_run_at
+from app.workers import tasks
+from app.workers.tasks import claim_due_chains
+
+NOW = datetime(2024, 1, 31, 10, 17, 45)  # A Wednesday
+
+
+@pytest.mark.parametrize("expression, expected", [
+    ("* * * * *", datetime(2024, 1, 31, 10, 18)),
+    ("*/15 * * * *", datetime(2024, 1, 31, 10, 30)),
+    ("0 9 * * *", datetime(2024, 2, 1, 9, 0)),
+    ("30 8 1 * *", datetime(2024, 2, 1, 8, 30)),
+    ("0 0 29 2 *", datetime(2024, 2, 29, 0, 0)),
+    ("0 12 * * mon-fri", datetime(2024, 1, 31, 12, 0)),
+    ("0 12 * * sat,sun", datetime(2024, 2, 3, 12, 0)),
+    ("0 0 13 * 5", datetime(2024, 2, 2, 0, 0)),
+    ("@hourly", datetime(2024, 1, 31, 11, 0)),
+])
+def test_cron_next_after(expression, expected):
+    """Test cron expressions resolve to the next matching minute"""
+    assert CronSchedule(expression).next_after(NOW) == expected
+
+
+@pytest.mark.parametrize("expression", ["* * * *", "61 * * * *", "0 0 30 2 *", "*/0 * * * *", "x * * * *"])
+def test_invalid_cron_rejected(expression):
+    """Test malformed and unsatisfiable expressions raise ValueError"""
+    with pytest.raises(ValueError):
+        CronSchedule(expression).next_after(NOW)
+
+
+def test_interval_schedule():
+    """Test interval chains start immediately and then repeat"""
+    config = {"interval_minutes": 30}
+    assert first_run_at(config, NOW) == NOW
+    assert next_run_at(config, NOW) == NOW + timedelta(minutes=30)
+    with pytest.raises(ValueError):
+        next_run_at({"interval_minutes": 0}, NOW)
+
+
+def test_claim_due_chains_advances_schedule(db_session):
+    """Test only due chains are claimed and their next run moves forward"""
+    user = User(email="scheduler@example.com", hashed_password="x")
+    db_session.add(user)
+    db_session.flush()
+    due = Chain(name="due", user_id=user.id, trigger_type=TriggerType.SCHEDULE,
+                trigger_config={"cron": "0 * * * *"}, actions=[], next_run_at=NOW - timedelta(minutes=1))
+    later = Chain(name="later", user_id=user.id, trigger_type=TriggerType.SCHEDULE,
+                  trigger_config={"interval_minutes": 60}, actions=[], next_run_at=NOW + timedelta(minutes=5))
+    db_session.add_all([due, later])
+    db_session.commit()
+    updated_at = due.updated_at
+
+    execution_log_ids = claim_due_chains(db_session, NOW, limit=10)
+    db_session.commit()
+
+    assert len(execution_log_ids) == 1
+    assert db_session.get(ExecutionLog, execution_log_ids[0]).chain_id == due.id
+    db_session.refresh(due)
+    assert due.next_run_at == datetime(2024, 1, 31, 11, 0)
+    assert due.updated_at == updated_at
+    assert claim_due_chains(db_session, NOW, limit=10) == []
+
+
+def test_claim_due_chains_skips_failing_chain(db_session, monkeypatch):
+    """Test a chain whose schedule or admission fails does not hold up the chains after it"""
+    monkeypatch.setattr(tasks.settings, "ADMISSION_CONTROL", "reject")
+    user = User(email="scheduler@example.com", hashed_password="x", balance=Decimal("1.00"))
+    db_session.add(user)
+    db_session.flush()
+    chains = [
+        Chain(name=name, user_id=user.id, trigger_type=TriggerType.SCHEDULE, trigger_config=config, actions=[],
+              next_run_at=NOW - timedelta(minutes=3 - n))
+        for n, (name, config) in enumerate([
+            ("broken schedule", {"interval_minutes": "soon"}),
+            ("broken admission", {"interval_minutes": 5}),
+            ("fine", {"interval_minutes": 5}),
+        ])
+    ]
+    db_session.add_all(chains)
+    db_session.commit()
+    admit = tasks.admit
+
+    def flaky_admit(db, user_id, execution_cost):
+        if flaky_admit.calls == 1:
+            flaky_admit.calls += 1
+            raise RuntimeError("database hiccup")
+        flaky_admit.calls += 1
+        return admit(db, user_id, execution_cost)
+
+    flaky_admit.calls = 0
+    monkeypatch.setattr(tasks, "admit", flaky_admit)
+
+    execution_log_ids = claim_due_chains(db_session, NOW, limit=10)
+    db_session.commit()
+
+    logs = [db_session.get(ExecutionLog, execution_log_id) for execution_log_id in execution_log_ids]
+    assert [log.chain_id for log in logs] == [chains[0].id, chains[2].id]
+    for chain in chains:
+        db_session.refresh(chain)
+    assert chains[0].next_run_at == NOW + timedelta(hours=1)
+    assert chains[1].next_run_at == NOW + timedelta(minutes=5)
+
+
+def test_publish_executions_batches_groups(monkeypatch):
+    """Test execution logs are published as one group per batch"""
+    published = []
+
+    class FakeGroup:
+        def __init__(self, signatures):
+            self.signatures = list(signatures)
+
+        def apply_async(self):
+            published.append([signature.args[0] for signature in self.signatures])
+
+    monkeypatch.setattr(tasks, "group", FakeGroup)
+    tasks.publish_executions(list(range(7)), batch_size=3)
+
+    assert published == [[0, 1, 2], [3, 4, 5], [6]]
@@ -0,0 +1,87 @@
+import smtplib
+import pytest
+from app.services import smtp_pool
+from app.services.smtp_pool import SMTPPool
+
+
+class FakeSMTP:
+    """In-memory stand-in for smtplib.SMTP"""
+    instances = []
+
+    def __init__(self, host, port, timeout=None):
+        self.sent = []
+        self.logged_in = False
+        self.drop_next = False
+        FakeSMTP.instances.append(self)
+
+    def starttls(self):
+        pass
+
+    def login(self, username, password):
+        self.logged_in = True
+
+    def noop(self):
+        return (250, b"OK")
+
+    def send_message(self, message):
+        if self.drop_next:
+            raise smtplib.SMTPServerDisconnected("connection dropped")
+        self.sent.append(message)
+
+    def quit(self):
+        pass
+
+    def close(self):
+        pass
+
+
+@pytest.fixture
+def fake_smtp(monkeypatch):
+    FakeSMTP.instances = []
+    monkeypatch.setattr(smtp_pool.smtplib, "SMTP", FakeSMTP)
+    return FakeSMTP
+
+
+def make_pool(**kwargs):
+    return SMTPPool("smtp.example.com", 587, "user", "secret", **kwargs)
+
+
+def test_sessions_are_reused(fake_smtp):
+    """Test several sends share one authenticated session"""
+    pool = make_pool()
+    for i in range(3):
+        pool.send(f"message {i}")
+
+    assert len(fake_smtp.instances) == 1
+    assert fake_smtp.instances[0].logged_in
+    assert pool.stats()["messages_sent"] == 3
+
+
+def test_session_recycled_after_max_messages(fake_smtp):
+    """Test a session is replaced once it reaches max_messages"""
+    pool = make_pool(max_messages=2)
+    for i in range(5):
+        pool.send(f"message {i}")
+
+    assert [len(s.sent) for s in fake_smtp.instances] == [2, 2, 1]
+
+
+def test_reconnects_when_relay_drops_connection(fake_smtp):
+    """Test a dropped session is replaced and the message resent"""
+    pool = make_pool()
+    pool.send("first")
+    fake_smtp.instances[0].drop_next = True
+    pool.send("second")
+
+    assert len(fake_smtp.instances) == 2
+    assert fake_smtp.instances[1].sent == ["second"]
+    assert pool.stats()["reconnects"] == 1
+
+
+def test_send_many_pipelines_over_one_session(fake_smtp):
+    """Test queued messages go out over a single session"""
+    pool = make_pool(pipeline=True)
+    errors = pool.send_many(["a", "b", "c"])
+
+    assert errors == [None, None, None]
+    assert fake_smtp.instances[0].sent == ["a", "b", "c"]
@@ -0,0 +1,80 @@
+import json
+import threading
+from http.server import BaseHTTPRequestHandler, ThreadingHTTPServer
+import pytest
+from app.services.telegram_sender import TelegramSender, TokenBucket
+
+
+class StubBotAPI(BaseHTTPRequestHandler):
+    """Minimal Bot API that rate limits the first call per chat"""
+    protocol_version = "HTTP/1.1"
+    calls = []
+    limited = set()
+
+    def do_POST(self):
+        payload = json.loads(self.rfile.read(int(self.headers["Content-Length"])))
+        StubBotAPI.calls.append(payload)
+        if payload["chat_id"] not in StubBotAPI.limited:
+            StubBotAPI.limited.add(payload["chat_id"])
+            status, body = 429, {"ok": False, "error_code": 429, "parameters": {"retry_after": 1}}
+        else:
+            status, body = 200, {"ok": True, "result": {"message_id": len(StubBotAPI.calls)}}
+        data = json.dumps(body).encode()
+        self.send_response(status)
+        self.send_header("Content-Type", "application/json")
+        self.send_header("Content-Length", str(len(data)))
+        self.end_headers()
+        self.wfile.write(data)
+
+    def log_message(self, *args):
+        pass
+
+
+@pytest.fixture
+def bot_api():
+    StubBotAPI.calls = []
+    StubBotAPI.limited = set()
+    server = ThreadingHTTPServer(("127.0.0.1", 0), StubBotAPI)
+    thread = threading.Thread(target=server.serve_forever, daemon=True)
+    thread.start()
+    yield f"http://127.0.0.1:{server.server_port}"
+    server.shutdown()
+    server.server_close()
+
+
+def test_token_bucket_delay():
+    """Test an empty bucket reports the time until its next token"""
+    bucket = TokenBucket(rate=2, capacity=1)
+    now = bucket.updated
+    assert bucket.delay(now) == 0
+    bucket.take()
+    assert bucket.delay(now) == pytest.approx(0.5)
+
+
+def test_retry_after_is_honoured_and_bursts_coalesced(bot_api):
+    """Test a 429 pauses the chat and queued messages go out together"""
+    sender = TelegramSender(bot_api)
+    futures = [sender.send("token", 42, f"message {i}") for i in range(5)]
+    results = [future.result(timeout=10) for future in futures]
+
+    assert all(result["success"] for result in results)
+    assert len(StubBotAPI.calls) == 2
+    assert StubBotAPI.calls[-1]["text"].endswith("message 4")
+
+    stats = sender.stats()
+    assert stats["rate_limited"] == 1
+    assert stats["sent"] == 5
+    assert stats["queue_depth"] == 0
+    assert stats["throttle_seconds_max"] >= 1
+
+
+def test_chats_are_limited_independently(bot_api):
+    """Test one throttled chat does not hold back another"""
+    sender = TelegramSender(bot_api, coalesce=False)
+    StubBotAPI.limited.add("2")
+    slow = sender.send("token", 1, "to chat 1")
+    fast = sender.send("token", 2, "to chat 2")
+
+    assert fast.result(timeout=5)["success"]
+    assert not slow.done()
+    assert slow.result(timeout=5)["success"]
@@ -0,0 +1,146 @@
+from datetime import datetime
+import pytest
+from app.api import webhooks
+from app.core.config import settings
+from app.models.models import Chain, ExecutionLog, TriggerType, User
+from app.services.idempotency import InMemoryIdempotencyFront
+from app.services.webhook_buffer import FileBuffer
+from app.workers import tasks, webhook_ingest
+
+
+def event(chain_id, n=0):
+    return {"chain_id": chain_id, "trigger_data": {"webhook_data": {"n": n}}, "received_at": datetime.utcnow().isoformat()}
+
+
+def test_file_buffer_replays_unacknowledged_batch(tmp_path):
+    """Test a batch read but not acknowledged before a crash is read again"""
+    buffer = FileBuffer(str(tmp_path))
+    for n in range(5):
+        buffer.append(event(1, n))
+
+    first = buffer.read(3, timeout=0)
+    buffer.ack([event_id for event_id, _ in first])
+    assert [e["trigger_data"]["webhook_data"]["n"] for _, e in first] == [0, 1, 2]
+    assert [e["trigger_data"]["webhook_data"]["n"] for _, e in buffer.read(3, timeout=0)] == [3, 4]
+
+    # Crash before the ack: the next consumer resumes at the same offset
+    buffer._drain_lock.close()
+    restarted = FileBuffer(str(tmp_path))
+    replayed = restarted.read(3, timeout=0)
+    assert [e["trigger_data"]["webhook_data"]["n"] for _, e in replayed] == [3, 4]
+    restarted.ack([event_id for event_id, _ in replayed])
+    assert restarted.read(3, timeout=0) == []
+    assert not list(tmp_path.glob("segment-*"))
+
+
+def test_drain_batch_inserts_and_publishes(db_session, tmp_path, monkeypatch):
+    """Test buffered events become execution logs and events for deleted chains are dropped"""
+    published = []
+    monkeypatch.setattr(webhook_ingest, "publish_executions", lambda ids, batch_size: published.extend(ids))
+    user = User(email="ingest@example.com", hashed_password="x")
+    db_session.add(user)
+    db_session.flush()
+    chain = Chain(name="hook", user_id=user.id, trigger_type=TriggerType.WEBHOOK, trigger_config={}, actions=[])
+    db_session.add(chain)
+    db_session.commit()
+
+    buffer = FileBuffer(str(tmp_path))
+    for n in range(3):
+        buffer.append(event(chain.id, n))
+    buffer.append(event(chain.id + 100))
+
+    assert webhook_ingest.drain_batch(db_session, buffer, batch_size=10, timeout=0) == 4
+    logs = db_session.query(ExecutionLog).order_by(ExecutionLog.id).all()
+    assert [log.trigger_data["webhook_data"]["n"] for log in logs] == [0, 1, 2]
+    assert published == [log.id for log in logs]
+    assert webhook_ingest.drain_batch(db_session, buffer, batch_size=10, timeout=0) == 0
+
+
+def test_buffered_webhook_answers_202(client, db_session, tmp_path, monkeypatch):
+    """Test buffered mode accepts the event without creating an execution log"""
+    buffer = FileBuffer(str(tmp_path))
+    monkeypatch.setattr(settings, "WEBHOOK_INGEST_MODE", "buffered")
+    monkeypatch.setattr(webhooks, "get_webhook_buffer", lambda: buffer)
+    user = User(email="ingest@example.com", hashed_password="x")
+    db_session.add(user)
+    db_session.flush()
+    chain = Chain(name="hook", user_id=user.id, trigger_type=TriggerType.WEBHOOK, trigger_config={}, actions=[])
+    db_session.add(chain)
+    db_session.commit()
+
+    response = client.post(f"/webhooks/{chain.id}", json={"order": 1})
+
+    assert response.status_code == 202
+    assert db_session.query(ExecutionLog).count() == 0
+    [(_, buffered)] = buffer.read(10, timeout=0)
+    assert buffered["chain_id"] == chain.id
+    assert buffered["trigger_data"]["webhook_data"] == {"order": 1}
+
+
+def test_retry_is_accepted_after_failed_buffer_append(client, db_session, tmp_path, monkeypatch):
+    """Test a delivery the buffer failed to store does not leave its idempotency key claimed"""
+    buffer = FileBuffer(str(tmp_path))
+    front = InMemoryIdempotencyFront()
+    monkeypatch.setattr(settings, "WEBHOOK_INGEST_MODE", "buffered")
+    monkeypatch.setattr(webhooks, "get_webhook_buffer", lambda: buffer)
+    monkeypatch.setattr(webhooks, "get_idempotency_front", lambda: front)
+    user = User(email="ingest@example.com", hashed_password="x")
+    db_session.add(user)
+    db_session.flush()
+    chain = Chain(name="hook", user_id=user.id, trigger_type=TriggerType.WEBHOOK,
+                  trigger_config={"idempotency_body_hash": True}, actions=[])
+    db_session.add(chain)
+    db_session.commit()
+
+    append = buffer.append_async
+
+    async def broken_append(event):
+        raise OSError("disk full")
+
+    monkeypatch.setattr(buffer, "append_async", broken_append)
+    with pytest.raises(OSError):
+        client.post(f"/webhooks/{chain.id}", json={"order": 1})
+
+    monkeypatch.setattr(buffer, "append_async", append)
+    response = client.post(f"/webhooks/{chain.id}", json={"order": 1})
+    assert response.status_code == 202
+    assert "duplicate" not in response.json()
+    assert [e["trigger_data"]["webhook_data"] for _, e in buffer.read(10, timeout=0)] == [{"order": 1}]
+
+
+def test_replayed_batch_is_not_inserted_twice(db_session, tmp_path, monkeypatch):
+    """Test a batch replayed after a failed publish queues its executions once, without inserting them again"""
+    published = []
+
+    def publish(ids, batch_size):
+        if not published:
+            published.append(None)
+            raise ConnectionError("broker unavailable")
+        published.extend(ids)
+
+    monkeypatch.setattr(webhook_ingest, "publish_executions", publish)
+    user = User(email="ingest@example.com", hashed_password="x")
+    db_session.add(user)
+    db_session.flush()
+    chain = Chain(name="hook", user_id=user.id, trigger_type=TriggerType.WEBHOOK, trigger_config={}, actions=[])
+    db_session.add(chain)
+    db_session.commit()
+
+    buffer = FileBuffer(str(tmp_path))
+    buffer.append(event(chain.id, 0))
+    buffer.append({**event(chain.id, 1), "idempotency_key": "h:retry"})
+    buffer.append({**event(chain.id, 2), "idempotency_key": "h:retry"})
+
+    with pytest.raises(ConnectionError):
+        webhook_ingest.drain_batch(db_session, buffer, batch_size=10, timeout=0)
+    logs = db_session.query(ExecutionLog).order_by(ExecutionLog.id).all()
+    assert [log.trigger_data["webhook_data"]["n"] for log in logs] == [0, 1]
+
+    assert webhook_ingest.drain_batch(db_session, buffer, batch_size=10, timeout=0) == 3
+    assert db_session.query(ExecutionLog).count() == 2
+    assert published[1:] == [log.id for log in logs]
+    assert buffer.read(10, timeout=0) == []
+
+    # Both messages for a re-published execution reach a worker; only one runs it
+    assert "status" in tasks.execute_chain(logs[0].id)
+    assert tasks.execute_chain(logs[0].id) == {"error": "Execution already started"}
@@ -0,0 +1,150 @@
+import hashlib
+import hmac
+import json
+from datetime import datetime, timedelta
+import pytest
+from app.api import webhooks
+from app.core.config import settings
+from app.models.models import Chain, ExecutionIdempotencyKey, ExecutionLog, ExecutionStatus, TriggerType, User
+from app.services.idempotency import InMemoryIdempotencyFront
+from app.workers.tasks import expire_idempotency_keys
+
+
+def create_webhook_chain(db_session, **trigger_config):
+    user = User(email="webhooks@example.com", hashed_password="x")
+    db_session.add(user)
+    db_session.flush()
+    chain = Chain(name="hook", user_id=user.id, trigger_type=TriggerType.WEBHOOK,
+                  trigger_config=trigger_config, actions=[])
+    db_session.add(chain)
+    db_session.commit()
+    return chain
+
+
+def test_webhook_creates_execution(client, db_session, monkeypatch):
+    """Test a webhook stores an execution log through the async session and queues it"""
+    queued = []
+    monkeypatch.setattr(webhooks.execute_chain, "delay", queued.append)
+    chain = create_webhook_chain(db_session)
+
+    response = client.post(f"/webhooks/{chain.id}", json={"order": 42})
+
+    assert response.status_code == 200
+    execution_log_id = response.json()["execution_log_id"]
+    assert queued == [execution_log_id]
+    execution_log = db_session.get(ExecutionLog, execution_log_id)
+    assert execution_log.status == ExecutionStatus.PENDING
+    assert execution_log.trigger_data["webhook_data"] == {"order": 42}
+
+
+def test_webhook_rejects_bad_signature(client, db_session, monkeypatch):
+    """Test signed webhooks are verified before anything is stored"""
+    monkeypatch.setattr(webhooks.execute_chain, "delay", lambda execution_log_id: None)
+    chain = create_webhook_chain(db_session, secret="s3cret")
+    body = json.dumps({"order": 42}).encode()
+    signature = hmac.new(b"s3cret", body, hashlib.sha256).hexdigest()
+
+    bad = client.post(f"/webhooks/{chain.id}", content=body, headers={"X-Webhook-Signature": "0" * 64})
+    good = client.post(f"/webhooks/{chain.id}", content=body, headers={"X-Webhook-Signature": signature})
+
+    assert "execution_log_id" not in bad.json()
+    assert "execution_log_id" in good.json()
+    assert db_session.query(ExecutionLog).count() == 1
+
+
+@pytest.fixture
+def fresh_front(monkeypatch):
+    front = InMemoryIdempotencyFront()
+    monkeypatch.setattr(webhooks, "get_idempotency_front", lambda: front)
+    return front
+
+
+def test_retry_with_idempotency_key_returns_original(client, db_session, monkeypatch, fresh_front):
+    """Test a retried delivery gets the original execution and is not queued again"""
+    queued = []
+    monkeypatch.setattr(webhooks.execute_chain, "delay", queued.append)
+    chain = create_webhook_chain(db_session)
+    headers = {"Idempotency-Key": "delivery-1"}
+
+    first = client.post(f"/webhooks/{chain.id}", json={"order": 42}, headers=headers).json()
+    retry = client.post(f"/webhooks/{chain.id}", json={"order": 42}, headers=headers).json()
+
+    assert retry == {"message": "Duplicate webhook ignored", "execution_log_id": first["execution_log_id"], "duplicate": True}
+    assert queued == [first["execution_log_id"]]
+    assert db_session.query(ExecutionLog).count() == 1
+
+
+def test_unique_constraint_catches_duplicates_without_front(client, db_session, monkeypatch):
+    """Test body-hash keys are enforced by the database when the front is disabled"""
+    monkeypatch.setattr(webhooks.execute_chain, "delay", lambda execution_log_id: None)
+    monkeypatch.setattr(webhooks, "get_idempotency_front", lambda: None)
+    chain = create_webhook_chain(db_session, idempotency_body_hash=True)
+
+    first = client.post(f"/webhooks/{chain.id}", json={"order": 42}).json()
+    retry = client.post(f"/webhooks/{chain.id}", json={"order": 42}).json()
+    other = client.post(f"/webhooks/{chain.id}", json={"order": 43}).json()
+
+    assert retry["execution_log_id"] == first["execution_log_id"]
+    assert retry["duplicate"] is True
+    assert "duplicate" not in other
+    assert db_session.query(ExecutionLog).count() == 2
+
+
+def test_key_table_catches_duplicates_execution_logs_cannot(client, db_session, monkeypatch):
+    """Test the key table rejects a duplicate the execution_logs constraint misses (partitioned tables)"""
+    monkeypatch.setattr(webhooks.execute_chain, "delay", lambda execution_log_id: None)
+    monkeypatch.setattr(webhooks, "get_idempotency_front", lambda: None)
+    chain = create_webhook_chain(db_session)
+    # A partitioned execution_logs only has (chain_id, idempotency_key, created_at) unique
+    original = ExecutionLog(chain_id=chain.id)
+    db_session.add(original)
+    db_session.flush()
+    key = "h:" + hashlib.sha256(b"delivery-1").hexdigest()
+    db_session.add(ExecutionIdempotencyKey(chain_id=chain.id, idempotency_key=key, execution_log_id=original.id))
+    db_session.commit()
+
+    retry = client.post(f"/webhooks/{chain.id}", json={"order": 42}, headers={"Idempotency-Key": "delivery-1"}).json()
+
+    assert retry["execution_log_id"] == original.id
+    assert retry["duplicate"] is True
+    assert db_session.query(ExecutionLog).count() == 1
+
+
+def test_expired_idempotency_keys_are_released(db_session):
+    """Test keys older than the retention window are cleared"""
+    chain = create_webhook_chain(db_session)
+    old = datetime.utcnow() - timedelta(days=2)
+    db_session.add_all([
+        ExecutionLog(chain_id=chain.id, idempotency_key="h:old", created_at=old),
+        ExecutionLog(chain_id=chain.id, idempotency_key="h:new"),
+        ExecutionIdempotencyKey(chain_id=chain.id, idempotency_key="h:old", execution_log_id=1, created_at=old),
+        ExecutionIdempotencyKey(chain_id=chain.id, idempotency_key="h:new", execution_log_id=2),
+    ])
+    db_session.commit()
+
+    assert expire_idempotency_keys() == {"expired_keys": 1}
+    db_session.expire_all()
+    assert {log.idempotency_key for log in db_session.query(ExecutionLog)} == {None, "h:new"}
+    assert [row.idempotency_key for row in db_session.query(ExecutionIdempotencyKey)] == ["h:new"]
+
+
+def test_oversized_body_rejected(client, db_session, monkeypatch):
+    """Test bodies over WEBHOOK_MAX_BODY_BYTES get 413 and create nothing"""
+    monkeypatch.setattr(settings, "WEBHOOK_MAX_BODY_BYTES", 1024)
+    chain = create_webhook_chain(db_session)
+
+    response = client.post(f"/webhooks/{chain.id}", json={"blob": "x" * 2048})
+
+    assert response.status_code == 413
+    assert db_session.query(ExecutionLog).count() == 0
+
+
+def test_only_allowlisted_headers_are_stored(client, db_session, monkeypatch):
+    """Test trigger_data keeps the chain's header allowlist only"""
+    monkeypatch.setattr(webhooks.execute_chain, "delay", lambda execution_log_id: None)
+    chain = create_webhook_chain(db_session, header_allowlist=["X-Event"])
+
+    response = client.post(f"/webhooks/{chain.id}", json={}, headers={"X-Event": "push", "X-Forwarded-For": "10.0.0.1"})
+
+    execution_log = db_session.get(ExecutionLog, response.json()["execution_log_id"])
+    assert execution_log.trigger_data["headers"] == {"x-event": "push"}
@@ -33,6 +33,25 @@ const mockResponse = <T>(data: T): Promise<{ data: T }> => {
   });
 };
 
+// List endpoints return one page at a time; pass next_cursor back to get the next one
+export interface Page<T> {
+  items: T[];
+  next_cursor: string | null;
+  has_more: boolean;
+}
+
+// Demo data is paged by offset, kept opaque like the backend cursor
+const mockPage = <T>(items: T[], limit: number, cursor?: string | null) => {
+  const start = cursor ? Number(cursor) : 0;
+  const end = start + limit;
+  const hasMore = end < items.length;
+  return mockResponse<Page<T>>({
+    items: items.slice(start, end),
+    next_cursor: hasMore ? String(end) : null,
+    has_more: hasMore,
+  });
+};
+
 // Auth API
 export const authAPI = {
   register: (email: string, password: string) => {
@@ -59,11 +78,11 @@ export const userAPI = {
     return api.get('/users/me');
   },
   
-  getTransactions: (limit = 50) => {
+  getTransactions: (limit = 50, cursor?: string | null) => {
     if (DEMO_MODE) {
-      return mockResponse(demoTransactions.slice(0, limit));
+      return mockPage(demoTransactions, limit, cursor);
     }
-    return api.get('/users/me/transactions', { params: { limit } });
+    return api.get<Page<any>>('/users/me/transactions', { params: { limit, cursor } });
   },
   
   deposit: (amount: number, paymentMethodId: string) => {
@@ -80,11 +99,11 @@ export const userAPI = {
 
 // Chain API
 export const chainAPI = {
-  list: () => {
+  list: (cursor?: string | null, limit = 50) => {
     if (DEMO_MODE) {
-      return mockResponse(demoChains);
+      return mockPage(demoChains, limit, cursor);
     }
-    return api.get('/chains/');
+    return api.get<Page<any>>('/chains/', { params: { limit, cursor } });
   },
   
   create: (data: any) => {
@@ -141,11 +160,10 @@ export const chainAPI = {
     return api.post(`/chains/${id}/execute`, { chain_id: id, trigger_data: triggerData });
   },
   
-  getExecutions: (id: number, limit = 50) => {
+  getExecutions: (id: number, limit = 50, cursor?: string | null) => {
     if (DEMO_MODE) {
-      const executions = getDemoExecutionsForChain(id);
-      return mockResponse(executions.slice(0, limit));
+      return mockPage(getDemoExecutionsForChain(id), limit, cursor);
     }
-    return api.get(`/chains/${id}/executions`, { params: { limit } });
+    return api.get<Page<any>>(`/chains/${id}/executions`, { params: { limit, cursor } });
   },
 };
@@ -32,6 +32,7 @@ export default function ChainDetail() {
   const { id } = router.query;
   const [chain, setChain] = useState<Chain | null>(null);
   const [executions, setExecutions] = useState<Execution[]>([]);
+  const [nextCursor, setNextCursor] = useState<string | null>(null);
   const [loading, setLoading] = useState(true);
 
   useEffect(() => {
@@ -54,7 +55,8 @@ export default function ChainDetail() {
       ]);
       
       setChain(chainRes.data);
-      setExecutions(executionsRes.data);
+      setExecutions(executionsRes.data.items);
+      setNextCursor(executionsRes.data.next_cursor);
     } catch (error) {
       console.error('Failed to fetch chain data:', error);
       alert('Failed to load chain data');
@@ -63,6 +65,16 @@ export default function ChainDetail() {
     }
   };
 
+  const loadMoreExecutions = async () => {
+    try {
+      const executionsRes = await chainAPI.getExecutions(Number(id), 20, nextCursor);
+      setExecutions([...executions, ...executionsRes.data.items]);
+      setNextCursor(executionsRes.data.next_cursor);
+    } catch (error) {
+      console.error('Failed to fetch executions:', error);
+    }
+  };
+
   const handleToggleActive = async () => {
     if (!chain) return;
     
@@ -232,6 +244,15 @@ export default function ChainDetail() {
                   ))}
                 </div>
               )}
+
+              {nextCursor && (
+                <button
+                  onClick={loadMoreExecutions}
+                  className="w-full mt-4 text-blue-600 border border-blue-600 py-2 rounded hover:bg-blue-50"
+                >
+                  Load More
+                </button>
+              )}
             </div>
           </div>
 
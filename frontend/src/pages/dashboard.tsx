@@ -18,6 +18,7 @@ export default function Dashboard() {
   const router = useRouter();
   const { user, logout } = useAuthStore();
   const [chains, setChains] = useState<Chain[]>([]);
+  const [nextCursor, setNextCursor] = useState<string | null>(null);
   const [loading, setLoading] = useState(true);
   const [userData, setUserData] = useState<any>(null);
 
@@ -38,7 +39,8 @@ export default function Dashboard() {
         userAPI.getMe()
       ]);
       
-      setChains(chainsRes.data);
+      setChains(chainsRes.data.items);
+      setNextCursor(chainsRes.data.next_cursor);
       setUserData(userRes.data);
     } catch (error) {
       console.error('Failed to fetch data:', error);
@@ -47,6 +49,16 @@ export default function Dashboard() {
     }
   };
 
+  const loadMoreChains = async () => {
+    try {
+      const chainsRes = await chainAPI.list(nextCursor);
+      setChains([...chains, ...chainsRes.data.items]);
+      setNextCursor(chainsRes.data.next_cursor);
+    } catch (error) {
+      console.error('Failed to fetch chains:', error);
+    }
+  };
+
   const handleLogout = () => {
     logout();
     router.push('/');
@@ -167,6 +179,17 @@ export default function Dashboard() {
             ))}
           </div>
         )}
+
+        {nextCursor && (
+          <div className="text-center mt-6">
+            <button
+              onClick={loadMoreChains}
+              className="bg-white text-blue-600 px-6 py-2 rounded-lg shadow hover:bg-gray-50"
+            >
+              Load More
+            </button>
+          </div>
+        )}
       </main>
     </div>
   );